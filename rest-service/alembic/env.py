@@ -17,7 +17,7 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from app.database import Base
-from app.models import usuario, tipo_usuario, categoria_espacio, espacio, caracteristica_espacio, tipo_evento, reserva, estado_reserva, notificacion
+from app.models import usuario, tipo_usuario, categoria_espacio, espacio, caracteristica_espacio, tipo_evento, reserva, estado_reserva, notificacion, disponibilidad_espacio, cache_version, token_revocado, webhook_outbox
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,22 @@
+"""reserva (espacio_id, fecha) index
+
+Revision ID: 0002_reserva_espacio_fecha_index
+Revises: 0001_initial_models
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0002_reserva_espacio_fecha_index'
+down_revision = '0001_initial_models'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Soporta el anti-join de búsqueda de espacios libres y los cálculos de disponibilidad
+    op.create_index('ix_reserva_espacio_fecha', 'reserva', ['espacio_id', 'fecha'])
+
+
+def downgrade():
+    op.drop_index('ix_reserva_espacio_fecha', table_name='reserva')
@@ -0,0 +1,57 @@
+"""reserva: rango generado + exclusión GiST de solapes aprobados
+
+Revision ID: 0003_reserva_exclusion_solape
+Revises: 0002_reserva_espacio_fecha_index
+Create Date: 2026-10-17 00:00:00.000000
+
+Dos reservas Aprobadas del mismo espacio no pueden solaparse: lo garantiza la
+base de datos aunque dos aprobaciones concurrentes pasen a la vez las
+comprobaciones de la aplicación. Las Pendientes siguen pudiendo solaparse
+(fila de espera). Si ya existen aprobadas solapadas, la migración falla y
+deben resolverse a mano antes de aplicarla.
+
+El predicado no fija el id de 'Aprobada': la restricción lee la columna
+`bloquea` de la propia reserva, que mantiene el trigger trg_reserva_bloquea
+resolviendo el estado por nombre. Así la migración no depende de los datos de
+estado_reserva (el seed los crea al arrancar) y el índice no consulta otras
+tablas, lo que permite volcarlo y restaurarlo con pg_dump/pg_restore.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.reserva import RESERVA_BLOQUEA_FUNCTION, RESERVA_BLOQUEA_TRIGGER
+
+# revision identifiers, used by Alembic.
+revision = '0003_reserva_exclusion_solape'
+down_revision = '0002_reserva_espacio_fecha_index'
+branch_labels = None
+depends_on = None
+
+CONSTRAINT_NAME = 'ex_reserva_solape_aprobada'
+
+
+def upgrade():
+    op.execute(RESERVA_BLOQUEA_FUNCTION)
+    op.execute(
+        "ALTER TABLE reserva ADD COLUMN rango tsrange "
+        "GENERATED ALWAYS AS (tsrange(fecha + hora_inicio, fecha + hora_fin, '[)')) STORED"
+    )
+    op.add_column('reserva', sa.Column('bloquea', sa.Boolean(), nullable=False, server_default=sa.text('false')))
+    op.execute(RESERVA_BLOQUEA_TRIGGER)
+    # las filas existentes no pasan por el trigger
+    op.execute(
+        "UPDATE reserva SET bloquea = true "
+        "WHERE estado_id IN (SELECT id FROM estado_reserva WHERE nombre = 'Aprobada')"
+    )
+    op.execute(
+        f"ALTER TABLE reserva ADD CONSTRAINT {CONSTRAINT_NAME} "
+        "EXCLUDE USING gist (espacio_id WITH =, rango WITH &&) WHERE (bloquea)"
+    )
+
+
+def downgrade():
+    op.execute(f'ALTER TABLE reserva DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}')
+    op.execute('DROP TRIGGER IF EXISTS trg_reserva_bloquea ON reserva')
+    op.drop_column('reserva', 'bloquea')
+    op.drop_column('reserva', 'rango')
+    op.execute('DROP FUNCTION IF EXISTS reserva_set_bloquea()')
@@ -0,0 +1,28 @@
+"""cache_version: contadores de versión de cachés en memoria
+
+Revision ID: 0004_cache_version
+Revises: 0003_reserva_exclusion_solape
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004_cache_version'
+down_revision = '0003_reserva_exclusion_solape'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cache_version',
+        sa.Column('nombre', sa.String(length=50), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('actualizado_en', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+    op.execute("INSERT INTO cache_version (nombre, version) VALUES ('catalogo', 0)")
+
+
+def downgrade():
+    op.drop_table('cache_version')
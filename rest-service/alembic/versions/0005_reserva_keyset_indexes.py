@@ -0,0 +1,24 @@
+"""reserva (fecha, id) indexes for keyset pagination
+
+Revision ID: 0005_reserva_keyset_indexes
+Revises: 0004_cache_version
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0005_reserva_keyset_indexes'
+down_revision = '0004_cache_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GET /api/reservas pagina con WHERE (fecha, id) < cursor ORDER BY fecha DESC, id DESC
+    op.create_index('ix_reserva_fecha_id', 'reserva', ['fecha', 'id'])
+    op.create_index('ix_reserva_usuario_fecha_id', 'reserva', ['usuario_id', 'fecha', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_reserva_usuario_fecha_id', table_name='reserva')
+    op.drop_index('ix_reserva_fecha_id', table_name='reserva')
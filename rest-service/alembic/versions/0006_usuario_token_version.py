@@ -0,0 +1,22 @@
+"""usuario.token_version para revocar tokens con claims de rol
+
+Revision ID: 0006_usuario_token_version
+Revises: 0005_reserva_keyset_indexes
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006_usuario_token_version'
+down_revision = '0005_reserva_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('usuario', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('usuario', 'token_version')
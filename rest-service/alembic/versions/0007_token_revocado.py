@@ -0,0 +1,32 @@
+"""token_revocado: lista de revocación de JWT por jti
+
+Revision ID: 0007_token_revocado
+Revises: 0006_usuario_token_version
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0007_token_revocado'
+down_revision = '0006_usuario_token_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'token_revocado',
+        sa.Column('jti', sa.String(length=64), primary_key=True),
+        sa.Column('usuario_id', sa.Integer(), sa.ForeignKey('usuario.id', ondelete='CASCADE'), nullable=True),
+        sa.Column('expira_en', sa.TIMESTAMP(), nullable=False),
+        sa.Column('creado_en', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+    op.create_index('ix_token_revocado_expira_en', 'token_revocado', ['expira_en'])
+    op.create_index('ix_token_revocado_creado_en', 'token_revocado', ['creado_en'])
+
+
+def downgrade():
+    op.drop_index('ix_token_revocado_creado_en', table_name='token_revocado')
+    op.drop_index('ix_token_revocado_expira_en', table_name='token_revocado')
+    op.drop_table('token_revocado')
@@ -0,0 +1,41 @@
+"""webhook_outbox: eventos para el servicio WebSocket (patrón outbox)
+
+Revision ID: 0008_webhook_outbox
+Revises: 0007_token_revocado
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0008_webhook_outbox'
+down_revision = '0007_token_revocado'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'webhook_outbox',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('evento', sa.String(length=100), nullable=False),
+        sa.Column('payload', postgresql.JSONB(), nullable=False),
+        sa.Column('estado', sa.String(length=20), nullable=False, server_default='pendiente'),
+        sa.Column('intentos', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('proximo_intento', sa.TIMESTAMP(), nullable=False),
+        sa.Column('ultimo_error', sa.Text(), nullable=True),
+        sa.Column('enviado_en', sa.TIMESTAMP(), nullable=True),
+        sa.Column('creado_en', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+    op.create_index(
+        'ix_webhook_outbox_pendientes',
+        'webhook_outbox',
+        ['proximo_intento', 'id'],
+        postgresql_where=sa.text("estado = 'pendiente'"),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_webhook_outbox_pendientes', table_name='webhook_outbox')
+    op.drop_table('webhook_outbox')
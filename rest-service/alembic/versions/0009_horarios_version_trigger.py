@@ -0,0 +1,36 @@
+"""disponibilidad_espacio: trigger que versiona los horarios en cache_version
+
+Revision ID: 0009_horarios_version_trigger
+Revises: 0008_webhook_outbox
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0009_horarios_version_trigger'
+down_revision = '0008_webhook_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_horarios_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO cache_version (nombre, version) VALUES ('horarios', 1)
+            ON CONFLICT (nombre) DO UPDATE SET version = cache_version.version + 1, actualizado_en = CURRENT_TIMESTAMP;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_disponibilidad_espacio_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON disponibilidad_espacio
+            FOR EACH STATEMENT EXECUTE PROCEDURE bump_horarios_version()
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS trg_disponibilidad_espacio_version ON disponibilidad_espacio")
+    op.execute("DROP FUNCTION IF EXISTS bump_horarios_version()")
@@ -7,8 +7,90 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production-09f26e402edf8c5d56c0")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Caché LRU de JWT ya decodificados (clave: hash del token; vence con su exp)
+    JWT_DECODE_CACHE_ENABLED: bool = True
+    JWT_DECODE_CACHE_SIZE: int = 4096
+    # Ruta async (asyncpg + AsyncSession) para los GET más consultados; si está activa
+    # sus endpoints se registran antes que los sync equivalentes. Sin URL propia se
+    # deriva de DATABASE_URL con el driver postgresql+asyncpg.
+    ASYNC_DB_ENABLED: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Pool de conexiones por worker. Sin pre-ping se confía en DB_POOL_RECYCLE y en la
+    # invalidación automática tras un error de desconexión (un round trip menos por checkout)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Conteo de SQL por petición (cabecera Server-Timing) y aviso de sentencias repetidas (N+1)
+    SQL_INSTRUMENTATION_ENABLED: bool = False
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
     WEBSOCKET_SERVICE_URL: str = os.getenv("WEBSOCKET_SERVICE_URL", "http://localhost:3001")
-    
+    # Caché de disponibilidad por (espacio, fecha, incluir_pendientes), versionada en
+    # cache_version por espacio y por horarios; el TTL acota el tamaño útil
+    AVAILABILITY_CACHE_SIZE: int = 2048
+    AVAILABILITY_CACHE_TTL_SECONDS: int = 60
+    # Jornada usada por los espacios sin filas en disponibilidad_espacio (HH:MM)
+    JORNADA_INICIO: str = "08:00"
+    JORNADA_FIN: str = "18:00"
+    AVAILABILITY_TEMPLATE_TTL_SECONDS: int = 300
+    # Cada cuánto relee un worker la tabla cache_version para detectar cambios de otros workers
+    CACHE_VERSION_CHECK_SECONDS: float = 5
+    # Tamaño de página por defecto y máximo permitido en los listados paginados
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 200
+    # Filas por bloque del cursor de servidor en GET /api/reservas/export
+    EXPORT_BATCH_SIZE: int = 1000
+    # Identidad autenticada (id, rol, estado) cacheada por worker; los cambios se
+    # publican con la versión 'principales' de cache_version y el TTL es la cota final
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    # Hash de contraseñas en procesos aparte (0 = en el hilo de la petición) con un
+    # máximo de operaciones en vuelo; por encima se responde 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
+    PASSWORD_HASH_TIMEOUT_SECONDS: float = 10
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 2
+    # Rondas de pbkdf2_sha256; los hashes con menos rondas se regeneran al iniciar sesión
+    PASSWORD_HASH_ROUNDS: int = 29000
+    # Revocación de JWT: filtro de Bloom por worker, completado cada REFRESH y
+    # reconstruido (sin expirados) cada REBUILD segundos
+    REVOCATION_REFRESH_SECONDS: float = 5
+    REVOCATION_REBUILD_SECONDS: float = 600
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    # Outbox de webhooks: cada worker reclama hasta BATCH_SIZE eventos por vuelta con
+    # FOR UPDATE SKIP LOCKED (aplazándolos CLAIM_SECONDS, por si el worker cae durante
+    # el envío) y los envía fuera de la transacción; los fallos se reintentan con backoff
+    # exponencial y tras MAX_ATTEMPTS quedan como 'fallido'. Los enviados se borran
+    # pasadas RETENTION_HOURS
+    OUTBOX_DISPATCHER_ENABLED: bool = True
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_CLAIM_SECONDS: float = 120
+    OUTBOX_POLL_SECONDS: float = 1
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_BACKOFF_BASE_SECONDS: float = 2
+    OUTBOX_BACKOFF_MAX_SECONDS: float = 300
+    OUTBOX_RETENTION_HOURS: int = 24
+    # Envío de webhooks: POST por lotes al endpoint WEBHOOK_BATCH_PATH del servicio
+    # WebSocket sobre conexiones keep-alive (false = un POST por evento). Si el
+    # receptor responde 404/405 a los lotes se usa WEBHOOK_EVENT_PATH, un POST por evento. Tras
+    # un commit se espera FLUSH_WINDOW_MS para juntar en un lote los eventos cercanos.
+    # El circuito se abre tras BREAKER_FAILURES fallos seguidos y reintenta pasados
+    # BREAKER_RESET_SECONDS, sin gastar intentos de los eventos mientras está abierto
+    WEBHOOK_BATCH_ENABLED: bool = True
+    WEBHOOK_BATCH_PATH: str = "/api/webhooks/batch"
+    WEBHOOK_EVENT_PATH: str = "/api/webhooks/{evento}"
+    WEBHOOK_TIMEOUT_SECONDS: float = 5
+    WEBHOOK_MAX_CONNECTIONS: int = 10
+    WEBHOOK_FLUSH_WINDOW_MS: int = 50
+    WEBHOOK_BREAKER_FAILURES: int = 5
+    WEBHOOK_BREAKER_RESET_SECONDS: float = 30
+    # disponibilidad_actualizada: un evento por (espacio, fecha) cuando pasan DEBOUNCE_MS
+    # sin más cambios en ese espacio/día, y como mucho DEBOUNCE_MAX_MS tras el primero
+    DISPONIBILIDAD_DEBOUNCE_MS: int = 500
+    DISPONIBILIDAD_DEBOUNCE_MAX_MS: int = 5000
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,20 +1,35 @@
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional, Union
 from pydantic import BaseModel, EmailStr
-from datetime import timedelta, date, time as time_cls
+from datetime import datetime, timedelta, date, time as time_cls
 from pathlib import Path
+import os
 import secrets
 import time
 
 from .database import get_db, engine, Base, SessionLocal
+from .config import settings
 from .models import tipo_usuario, usuario, categoria_espacio, espacio, caracteristica_espacio, tipo_evento, reserva as reserva_model, estado_reserva as estado_reserva_model
-from .routes import reservas as reservas_router, notificaciones as notificaciones_router
-from .utils.password_handler import verify_password, get_password_hash
-from .utils.jwt_handler import create_access_token
-from .utils.dependencies import get_current_user, require_admin
-from .services.reserva_service import calc_availability
+from .routes import reservas as reservas_router, notificaciones as notificaciones_router, internal as internal_router
+from .services import availability_events, outbox, password_pool, revocation
+from .utils.jwt_handler import create_access_token, decode_access_token, user_claims
+from .utils.dependencies import security, get_current_user, get_token_claims, require_admin, require_admin_claims, is_admin
+from .services.principals import Principal, TokenClaims, invalidate_principals
+from .services.catalog import catalog, invalidate_catalog, CATALOG_VERSION
+from .services.cache_versions import current_version, bump_version, ESPACIOS_VERSION
+from .utils.etag import make_etag, etag_or_not_modified
+from .utils.metrics import PrometheusMiddleware, render_metrics, mark_process_dead
+from .utils.sql_stats import SQLStatsMiddleware
+from .services.availability import (
+    calc_availability,
+    calc_availability_batch,
+    find_free_espacios,
+    MAX_BATCH_DIAS,
+    MAX_BUSQUEDA_RESULTADOS,
+)
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 MEDIA_ROOT = PROJECT_ROOT / "attached_assets"
@@ -38,7 +53,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Server-Timing"],
 )
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    app.add_middleware(SQLStatsMiddleware)
+# se añade después de CORS para quedar por fuera y medir también su tiempo
+app.add_middleware(PrometheusMiddleware, fastapi_app=app)
 
 
 # Middleware: strip Authorization header for auth endpoints
@@ -66,8 +86,13 @@ async def _strip_auth_header_for_auth_paths(request, call_next):
     return await call_next(request)
 
 # registrar routers modulares
+if settings.ASYNC_DB_ENABLED:
+    # debe ir primero: Starlette resuelve con la primera ruta registrada que coincide
+    from .routes import async_reads as async_reads_router
+    app.include_router(async_reads_router.router)
 app.include_router(reservas_router.router)
 app.include_router(notificaciones_router.router)
+app.include_router(internal_router.router)
 
 
 # --- Small inline Pydantic schemas (for simple endpoints) ---
@@ -167,73 +192,6 @@ class TipoEventoUpdate(BaseModel):
     color_hex: Optional[str] = None
 
 
-def _calc_availability(db: Session, espacio_id: int, fecha: date, incluir_pendientes: bool = True):
-    """
-    Calcula slots libres y ocupados entre 08:00-18:00 para un espacio/fecha.
-    Usa reservas con estado Aprobada y opcionalmente Pendiente como bloqueantes.
-    """
-    jornada_ini = time_cls(8, 0)
-    jornada_fin = time_cls(18, 0)
-
-    estados_bloqueantes = db.query(estado_reserva_model.EstadoReserva).filter(
-        estado_reserva_model.EstadoReserva.nombre.in_(
-            ["Aprobada"] + (["Pendiente"] if incluir_pendientes else [])
-        )
-    ).all()
-    blocking_ids = {e.id for e in estados_bloqueantes}
-
-    reservas = (
-        db.query(reserva_model.Reserva)
-        .filter(
-            reserva_model.Reserva.espacio_id == espacio_id,
-            reserva_model.Reserva.fecha == fecha,
-            reserva_model.Reserva.estado_id.in_(blocking_ids) if blocking_ids else True,
-        )
-        .order_by(reserva_model.Reserva.hora_inicio.asc())
-        .all()
-    )
-
-    ocupados = []
-    intervals = []
-    for r in reservas:
-        ocupados.append(
-            {
-                "id": r.id,
-                "estado": getattr(r.estado, "nombre", None),
-                "hora_inicio": r.hora_inicio.strftime("%H:%M"),
-                "hora_fin": r.hora_fin.strftime("%H:%M"),
-                "titulo": r.titulo,
-                "usuario_id": r.usuario_id,
-            }
-        )
-        intervals.append((r.hora_inicio, r.hora_fin))
-
-    # Calcular libres a partir de intervalos ocupados
-    libres = []
-    cursor = jornada_ini
-    for ini, fin in intervals:
-        if ini > cursor:
-            libres.append(
-                {"hora_inicio": cursor.strftime("%H:%M"), "hora_fin": ini.strftime("%H:%M")}
-            )
-        if fin > cursor:
-            cursor = fin
-    if cursor < jornada_fin:
-        libres.append({"hora_inicio": cursor.strftime("%H:%M"), "hora_fin": jornada_fin.strftime("%H:%M")})
-
-    espacio_obj = db.query(espacio.Espacio).filter(espacio.Espacio.id == espacio_id).first()
-    nombre_espacio = espacio_obj.nombre if espacio_obj else None
-
-    return {
-        "espacio_id": espacio_id,
-        "espacio_nombre": nombre_espacio,
-        "fecha": fecha.isoformat(),
-        "dia_semana": fecha.strftime("%A"),
-        "ocupados": ocupados,
-        "libres": libres,
-    }
-
-
 async def _save_uploaded_file(upload: UploadFile, directory: Path, filename_prefix: str) -> str:
     if upload.content_type not in ALLOWED_IMAGE_TYPES:
         raise HTTPException(status_code=400, detail="Unsupported file type")
@@ -254,11 +212,17 @@ async def _save_uploaded_file(upload: UploadFile, directory: Path, filename_pref
     return file_path.relative_to(PROJECT_ROOT).as_posix()
 
 
-def _ensure_owner_or_admin(target_user_id: int, current_user: usuario.Usuario):
-    if current_user.tipo_usuario.nivel_prioridad != 1 and current_user.id != target_user_id:
+def _ensure_owner_or_admin(db: Session, target_user_id: int, current_user: Union[Principal, TokenClaims]):
+    if current_user.id != target_user_id and not is_admin(db, current_user):
         raise HTTPException(status_code=403, detail="Operation allowed only for admins or resource owners")
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/")
 def read_root():
     return {
@@ -276,7 +240,7 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
     
     new_user = usuario.Usuario(
         email=request.email,
-        password_hash=get_password_hash(request.password),
+        password_hash=password_pool.hash_password(request.password),
         nombre=request.nombre,
         apellido=request.apellido,
         telefono=request.telefono,
@@ -287,7 +251,7 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(new_user)
     
-    access_token = create_access_token(data={"sub": new_user.id})
+    access_token = create_access_token(data=user_claims(new_user, catalog.tipo_usuario(db, new_user.tipo_usuario_id)))
     
     return {
         "access_token": access_token,
@@ -305,16 +269,27 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
 def login(request: LoginRequest, db: Session = Depends(get_db)):
     user = db.query(usuario.Usuario).filter(usuario.Usuario.email == request.email).first()
     
-    if not user or not verify_password(request.password, user.password_hash):
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
+    valid, new_hash = password_pool.verify_and_update(request.password, user.password_hash)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password"
+        )
+    if new_hash:
+        # el hash usaba parámetros antiguos (PASSWORD_HASH_ROUNDS cambió): guardar el nuevo
+        user.password_hash = new_hash
+        db.add(user)
+        db.commit()
     
     if user.estado != "activo":
         raise HTTPException(status_code=403, detail="User account is not active")
     
-    access_token = create_access_token(data={"sub": user.id})
+    access_token = create_access_token(data=user_claims(user, catalog.tipo_usuario(db, user.tipo_usuario_id)))
     
     return {
         "access_token": access_token,
@@ -330,11 +305,20 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
 
 
 @app.post("/api/auth/logout")
-def logout(current_user: usuario.Usuario = Depends(get_current_user)):
-    # JWT es stateless; indicar al cliente que elimine el token
+def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    # el token ya fue validado por get_current_user; revocar su jti hasta que expire
+    payload = decode_access_token(credentials.credentials) or {}
+    jti = payload.get("jti")
+    if jti:
+        revocation.revoke(db, jti, current_user.id, datetime.utcfromtimestamp(payload["exp"]))
+        db.commit()
     return {
         "success": True,
-        "message": "Sesión cerrada. Elimina el token en el cliente.",
+        "message": "Sesión cerrada. El token fue revocado; elimínalo también en el cliente.",
         "user_id": current_user.id
     }
 
@@ -348,19 +332,66 @@ def get_disponibilidad(
 ):
     if not espacio_id:
         raise HTTPException(status_code=400, detail="espacio_id es requerido")
-    payload = _calc_availability(db, espacio_id, fecha, incluir_pendientes)
+    payload = calc_availability(db, espacio_id, fecha, incluir_pendientes)
     return payload
 
+
+@app.get("/api/disponibilidad/batch")
+def get_disponibilidad_batch(
+    fecha_inicio: date,
+    fecha_fin: date,
+    espacio_ids: Optional[List[int]] = Query(None),
+    categoria_id: Optional[int] = None,
+    incluir_pendientes: bool = True,
+    db: Session = Depends(get_db),
+):
+    if not espacio_ids and not categoria_id:
+        raise HTTPException(status_code=400, detail="espacio_ids o categoria_id es requerido")
+    if fecha_fin < fecha_inicio:
+        raise HTTPException(status_code=400, detail="fecha_fin debe ser posterior o igual a fecha_inicio")
+    if (fecha_fin - fecha_inicio).days + 1 > MAX_BATCH_DIAS:
+        raise HTTPException(status_code=400, detail=f"El rango no puede superar {MAX_BATCH_DIAS} días")
+    try:
+        return calc_availability_batch(db, fecha_inicio, fecha_fin, espacio_ids, categoria_id, incluir_pendientes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/disponibilidad/buscar")
+def buscar_espacios_libres(
+    fecha: date,
+    hora_inicio: time_cls,
+    hora_fin: time_cls,
+    capacidad_min: Optional[int] = None,
+    categoria_id: Optional[int] = None,
+    incluir_pendientes: bool = True,
+    limit: int = Query(20, ge=1, le=MAX_BUSQUEDA_RESULTADOS),
+    db: Session = Depends(get_db),
+):
+    if hora_fin <= hora_inicio:
+        raise HTTPException(status_code=400, detail="hora_fin debe ser posterior a hora_inicio")
+    espacios_libres = find_free_espacios(
+        db, fecha, hora_inicio, hora_fin, capacidad_min, categoria_id, incluir_pendientes, limit
+    )
+    return {
+        "fecha": fecha.isoformat(),
+        "hora_inicio": hora_inicio.strftime("%H:%M"),
+        "hora_fin": hora_fin.strftime("%H:%M"),
+        "capacidad_min": capacidad_min,
+        "espacios": espacios_libres,
+    }
+
 @app.get("/api/auth/me")
-def get_me(current_user: usuario.Usuario = Depends(get_current_user)):
+def get_me(current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    user = db.query(usuario.Usuario).filter(usuario.Usuario.id == current_user.id).first()
     return {
-        "id": current_user.id,
-        "email": current_user.email,
-        "nombre": current_user.nombre,
-        "apellido": current_user.apellido,
-        "telefono": current_user.telefono,
-        "tipo_usuario_id": current_user.tipo_usuario_id,
-        "estado": current_user.estado
+        "id": user.id,
+        "email": user.email,
+        "nombre": user.nombre,
+        "apellido": user.apellido,
+        "telefono": user.telefono,
+        "tipo_usuario_id": user.tipo_usuario_id,
+        "estado": user.estado
     }
 
 
@@ -368,9 +399,10 @@ def get_me(current_user: usuario.Usuario = Depends(get_current_user)):
 def change_password(
     payload: ChangePasswordRequest,
     db: Session = Depends(get_db),
-    current_user: usuario.Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    if not verify_password(payload.current_password, current_user.password_hash):
+    db_user = db.query(usuario.Usuario).filter(usuario.Usuario.id == current_user.id).first()
+    if not password_pool.verify_password(payload.current_password, db_user.password_hash):
         raise HTTPException(status_code=400, detail="La contraseña actual no es válida")
 
     if len(payload.new_password) < 8:
@@ -378,20 +410,22 @@ def change_password(
     if payload.new_password == payload.current_password:
         raise HTTPException(status_code=400, detail="La nueva contraseña debe ser diferente a la actual")
 
-    db_user = db.query(usuario.Usuario).filter(usuario.Usuario.id == current_user.id).first()
-    db_user.password_hash = get_password_hash(payload.new_password)
+    db_user.password_hash = password_pool.hash_password(payload.new_password)
+    # los tokens emitidos con la contraseña anterior dejan de ser válidos
+    db_user.token_version = (db_user.token_version or 0) + 1
     db.add(db_user)
+    invalidate_principals(db)
     db.commit()
     return {"success": True}
 
 @app.get("/api/usuarios")
 def get_usuarios(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: TokenClaims = Depends(require_admin_claims)
 ):
-    users = db.query(usuario.Usuario).offset(skip).limit(limit).all()
+    users = db.query(usuario.Usuario).order_by(usuario.Usuario.id).offset(skip).limit(limit).all()
     return [
         {
             "id": u.id,
@@ -410,9 +444,9 @@ def get_usuarios(
 def get_usuario_detail(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: usuario.Usuario = Depends(get_current_user)
+    current_user: TokenClaims = Depends(get_token_claims)
 ):
-    _ensure_owner_or_admin(user_id, current_user)
+    _ensure_owner_or_admin(db, user_id, current_user)
     user = db.query(usuario.Usuario).filter(usuario.Usuario.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
@@ -433,21 +467,25 @@ def update_usuario(
     user_id: int,
     data: UserUpdateRequest,
     db: Session = Depends(get_db),
-    current_user: usuario.Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    _ensure_owner_or_admin(user_id, current_user)
+    _ensure_owner_or_admin(db, user_id, current_user)
     user = db.query(usuario.Usuario).filter(usuario.Usuario.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
     payload = data.dict(exclude_unset=True)
-    if "tipo_usuario_id" in payload and current_user.tipo_usuario.nivel_prioridad != 1:
+    if "tipo_usuario_id" in payload and not is_admin(db, current_user):
         raise HTTPException(status_code=403, detail="Solo un administrador puede cambiar el rol")
 
     for field, value in payload.items():
         setattr(user, field, value)
+    if "tipo_usuario_id" in payload or "estado" in payload:
+        # el rol va firmado en el token: forzar a obtener uno nuevo
+        user.token_version = (user.token_version or 0) + 1
 
     db.add(user)
+    invalidate_principals(db)
     db.commit()
     db.refresh(user)
     return {
@@ -466,7 +504,7 @@ def update_usuario(
 def delete_usuario(
     user_id: int,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     user = db.query(usuario.Usuario).filter(usuario.Usuario.id == user_id).first()
     if not user:
@@ -475,6 +513,7 @@ def delete_usuario(
         raise HTTPException(status_code=400, detail="No puedes eliminar tu propio usuario")
 
     db.delete(user)
+    invalidate_principals(db)
     db.commit()
     return {"success": True}
 
@@ -484,7 +523,7 @@ def patch_usuario_estado(
     user_id: int,
     data: UserStateUpdate,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     if data.estado not in VALID_USER_STATES:
         raise HTTPException(status_code=400, detail=f"Estado inválido. Usa uno de: {', '.join(sorted(VALID_USER_STATES))}")
@@ -492,7 +531,9 @@ def patch_usuario_estado(
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     user.estado = data.estado
+    user.token_version = (user.token_version or 0) + 1
     db.add(user)
+    invalidate_principals(db)
     db.commit()
     return {"success": True, "estado": user.estado}
 
@@ -502,9 +543,9 @@ async def upload_usuario_avatar(
     user_id: int,
     avatar: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: usuario.Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    _ensure_owner_or_admin(user_id, current_user)
+    _ensure_owner_or_admin(db, user_id, current_user)
     user = db.query(usuario.Usuario).filter(usuario.Usuario.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
@@ -517,8 +558,11 @@ async def upload_usuario_avatar(
     return {"success": True, "avatar_url": user.avatar_url}
 
 @app.get("/api/tipos-usuario")
-def get_tipos_usuario(db: Session = Depends(get_db)):
-    tipos = db.query(tipo_usuario.TipoUsuario).all()
+def get_tipos_usuario(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = etag_or_not_modified(request, response, make_etag("tipos-usuario", current_version(db, CATALOG_VERSION)))
+    if not_modified:
+        return not_modified
+    tipos = catalog.tipos_usuario(db)
     return [{
         "id": t.id,
         "nombre": t.nombre,
@@ -531,10 +575,11 @@ def get_tipos_usuario(db: Session = Depends(get_db)):
 def create_tipo_usuario(
     data: TipoUsuarioCreate,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     new_tipo = tipo_usuario.TipoUsuario(**data.dict())
     db.add(new_tipo)
+    invalidate_catalog(db)
     db.commit()
     db.refresh(new_tipo)
     return new_tipo
@@ -545,14 +590,24 @@ def update_tipo_usuario(
     tipo_id: int,
     data: TipoUsuarioUpdate,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     tipo_obj = db.query(tipo_usuario.TipoUsuario).filter(tipo_usuario.TipoUsuario.id == tipo_id).first()
     if not tipo_obj:
         raise HTTPException(status_code=404, detail="Tipo de usuario no encontrado")
-    for field, value in data.dict(exclude_unset=True).items():
+    cambios = data.dict(exclude_unset=True)
+    cambia_nivel = "nivel_prioridad" in cambios and cambios["nivel_prioridad"] != tipo_obj.nivel_prioridad
+    for field, value in cambios.items():
         setattr(tipo_obj, field, value)
     db.add(tipo_obj)
+    if cambia_nivel:
+        # el nivel viaja firmado en los tokens: los de este tipo de usuario dejan de ser válidos
+        db.query(usuario.Usuario).filter(usuario.Usuario.tipo_usuario_id == tipo_id).update(
+            {usuario.Usuario.token_version: usuario.Usuario.token_version + 1},
+            synchronize_session=False,
+        )
+        invalidate_principals(db)
+    invalidate_catalog(db)
     db.commit()
     db.refresh(tipo_obj)
     return tipo_obj
@@ -562,7 +617,7 @@ def update_tipo_usuario(
 def delete_tipo_usuario(
     tipo_id: int,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     tipo_obj = db.query(tipo_usuario.TipoUsuario).filter(tipo_usuario.TipoUsuario.id == tipo_id).first()
     if not tipo_obj:
@@ -571,12 +626,16 @@ def delete_tipo_usuario(
     if users_count > 0:
         raise HTTPException(status_code=400, detail="No puedes eliminar un tipo con usuarios asignados")
     db.delete(tipo_obj)
+    invalidate_catalog(db)
     db.commit()
     return {"success": True}
 
 @app.get("/api/categorias-espacio")
-def get_categorias(db: Session = Depends(get_db)):
-    cats = db.query(categoria_espacio.CategoriaEspacio).all()
+def get_categorias(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = etag_or_not_modified(request, response, make_etag("categorias-espacio", current_version(db, CATALOG_VERSION)))
+    if not_modified:
+        return not_modified
+    cats = catalog.categorias(db)
     return [{
         "id": c.id,
         "nombre": c.nombre,
@@ -589,10 +648,18 @@ def get_categorias(db: Session = Depends(get_db)):
 def create_categoria(
     data: CategoriaEspacioCreate,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
+    exists = (
+        db.query(categoria_espacio.CategoriaEspacio)
+        .filter(categoria_espacio.CategoriaEspacio.nombre == data.nombre)
+        .first()
+    )
+    if exists:
+        raise HTTPException(status_code=400, detail="Ya existe una categoría con ese nombre")
     new_cat = categoria_espacio.CategoriaEspacio(**data.dict())
     db.add(new_cat)
+    invalidate_catalog(db)
     db.commit()
     db.refresh(new_cat)
     return new_cat
@@ -603,7 +670,7 @@ def update_categoria(
     categoria_id: int,
     data: CategoriaEspacioUpdate,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     cat = db.query(categoria_espacio.CategoriaEspacio).filter(categoria_espacio.CategoriaEspacio.id == categoria_id).first()
     if not cat:
@@ -611,6 +678,7 @@ def update_categoria(
     for field, value in data.dict(exclude_unset=True).items():
         setattr(cat, field, value)
     db.add(cat)
+    invalidate_catalog(db)
     db.commit()
     db.refresh(cat)
     return cat
@@ -620,7 +688,7 @@ def update_categoria(
 def delete_categoria(
     categoria_id: int,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     cat = db.query(categoria_espacio.CategoriaEspacio).filter(categoria_espacio.CategoriaEspacio.id == categoria_id).first()
     if not cat:
@@ -629,15 +697,22 @@ def delete_categoria(
     if espacios_count:
         raise HTTPException(status_code=400, detail="No puedes eliminar una categoría con espacios asociados")
     db.delete(cat)
+    invalidate_catalog(db)
     db.commit()
     return {"success": True}
 
 @app.get("/api/espacios")
 def get_espacios(
+    request: Request,
+    response: Response,
     categoria_id: Optional[int] = None,
     estado: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
+    etag = make_etag("espacios", current_version(db, ESPACIOS_VERSION), request.url.query)
+    not_modified = etag_or_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
     query = db.query(espacio.Espacio)
     if categoria_id:
         query = query.filter(espacio.Espacio.categoria_id == categoria_id)
@@ -656,8 +731,17 @@ def get_espacios(
     } for e in espacios_list]
 
 @app.get("/api/espacios/{espacio_id}")
-def get_espacio(espacio_id: int, db: Session = Depends(get_db)):
-    esp = db.query(espacio.Espacio).filter(espacio.Espacio.id == espacio_id).first()
+def get_espacio(espacio_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    etag = make_etag("espacio", espacio_id, current_version(db, ESPACIOS_VERSION))
+    not_modified = etag_or_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    esp = (
+        db.query(espacio.Espacio)
+        .options(selectinload(espacio.Espacio.caracteristicas))
+        .filter(espacio.Espacio.id == espacio_id)
+        .first()
+    )
     if not esp:
         raise HTTPException(status_code=404, detail="Espacio not found")
     
@@ -684,10 +768,13 @@ def get_espacio(espacio_id: int, db: Session = Depends(get_db)):
 def create_espacio(
     data: EspacioCreate,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
+    if db.query(espacio.Espacio).filter(espacio.Espacio.codigo == data.codigo).first():
+        raise HTTPException(status_code=400, detail="El código ya está en uso")
     new_espacio = espacio.Espacio(**data.dict())
     db.add(new_espacio)
+    bump_version(db, ESPACIOS_VERSION)
     db.commit()
     db.refresh(new_espacio)
     return new_espacio
@@ -697,7 +784,7 @@ def create_caracteristica(
     espacio_id: int,
     data: CaracteristicaCreate,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     esp = db.query(espacio.Espacio).filter(espacio.Espacio.id == espacio_id).first()
     if not esp:
@@ -708,6 +795,7 @@ def create_caracteristica(
         **data.dict()
     )
     db.add(new_car)
+    bump_version(db, ESPACIOS_VERSION)
     db.commit()
     db.refresh(new_car)
     return new_car
@@ -718,7 +806,7 @@ def update_espacio(
     espacio_id: int,
     data: EspacioUpdate,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     esp = db.query(espacio.Espacio).filter(espacio.Espacio.id == espacio_id).first()
     if not esp:
@@ -737,6 +825,7 @@ def update_espacio(
     for field, value in payload.items():
         setattr(esp, field, value)
     db.add(esp)
+    bump_version(db, ESPACIOS_VERSION)
     db.commit()
     db.refresh(esp)
     return esp
@@ -746,12 +835,13 @@ def update_espacio(
 def delete_espacio(
     espacio_id: int,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     esp = db.query(espacio.Espacio).filter(espacio.Espacio.id == espacio_id).first()
     if not esp:
         raise HTTPException(status_code=404, detail="Espacio no encontrado")
     db.delete(esp)
+    bump_version(db, ESPACIOS_VERSION)
     db.commit()
     return {"success": True}
 
@@ -761,7 +851,7 @@ def patch_espacio_estado(
     espacio_id: int,
     data: EspacioEstadoUpdate,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     esp = db.query(espacio.Espacio).filter(espacio.Espacio.id == espacio_id).first()
     if not esp:
@@ -770,6 +860,7 @@ def patch_espacio_estado(
         raise HTTPException(status_code=400, detail="Estado requerido")
     esp.estado = data.estado
     db.add(esp)
+    bump_version(db, ESPACIOS_VERSION)
     db.commit()
     return {"success": True, "estado": esp.estado}
 
@@ -779,7 +870,7 @@ async def upload_espacio_imagen(
     espacio_id: int,
     imagen: UploadFile = File(...),
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     esp = db.query(espacio.Espacio).filter(espacio.Espacio.id == espacio_id).first()
     if not esp:
@@ -788,6 +879,7 @@ async def upload_espacio_imagen(
     stored_path = await _save_uploaded_file(imagen, SPACE_IMAGE_DIR, f"espacio_{espacio_id}")
     esp.imagen_url = f"/{stored_path}"
     db.add(esp)
+    bump_version(db, ESPACIOS_VERSION)
     db.commit()
     db.refresh(esp)
     return {"success": True, "imagen_url": esp.imagen_url}
@@ -797,9 +889,14 @@ async def upload_espacio_imagen(
 def list_caracteristicas(
     espacio_id: int,
     db: Session = Depends(get_db),
-    current_user: usuario.Usuario = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    esp = db.query(espacio.Espacio).filter(espacio.Espacio.id == espacio_id).first()
+    esp = (
+        db.query(espacio.Espacio)
+        .options(selectinload(espacio.Espacio.caracteristicas))
+        .filter(espacio.Espacio.id == espacio_id)
+        .first()
+    )
     if not esp:
         raise HTTPException(status_code=404, detail="Espacio no encontrado")
     return [
@@ -818,7 +915,7 @@ def update_caracteristica(
     caracteristica_id: int,
     data: CaracteristicaUpdate,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     car = (
         db.query(caracteristica_espacio.CaracteristicaEspacio)
@@ -830,6 +927,7 @@ def update_caracteristica(
     for field, value in data.dict(exclude_unset=True).items():
         setattr(car, field, value)
     db.add(car)
+    bump_version(db, ESPACIOS_VERSION)
     db.commit()
     db.refresh(car)
     return car
@@ -839,7 +937,7 @@ def update_caracteristica(
 def delete_caracteristica(
     caracteristica_id: int,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     car = (
         db.query(caracteristica_espacio.CaracteristicaEspacio)
@@ -849,12 +947,16 @@ def delete_caracteristica(
     if not car:
         raise HTTPException(status_code=404, detail="Característica no encontrada")
     db.delete(car)
+    bump_version(db, ESPACIOS_VERSION)
     db.commit()
     return {"success": True}
 
 @app.get("/api/tipos-evento")
-def get_tipos_evento(db: Session = Depends(get_db)):
-    tipos = db.query(tipo_evento.TipoEvento).all()
+def get_tipos_evento(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = etag_or_not_modified(request, response, make_etag("tipos-evento", current_version(db, CATALOG_VERSION)))
+    if not_modified:
+        return not_modified
+    tipos = catalog.tipos_evento(db)
     return [{
         "id": t.id,
         "nombre": t.nombre,
@@ -867,10 +969,11 @@ def get_tipos_evento(db: Session = Depends(get_db)):
 def create_tipo_evento(
     data: TipoEventoCreate,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     new_tipo = tipo_evento.TipoEvento(**data.dict())
     db.add(new_tipo)
+    invalidate_catalog(db)
     db.commit()
     db.refresh(new_tipo)
     return new_tipo
@@ -881,7 +984,7 @@ def update_tipo_evento(
     tipo_evento_id: int,
     data: TipoEventoUpdate,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     tipo_obj = db.query(tipo_evento.TipoEvento).filter(tipo_evento.TipoEvento.id == tipo_evento_id).first()
     if not tipo_obj:
@@ -889,6 +992,7 @@ def update_tipo_evento(
     for field, value in data.dict(exclude_unset=True).items():
         setattr(tipo_obj, field, value)
     db.add(tipo_obj)
+    invalidate_catalog(db)
     db.commit()
     db.refresh(tipo_obj)
     return tipo_obj
@@ -898,7 +1002,7 @@ def update_tipo_evento(
 def delete_tipo_evento(
     tipo_evento_id: int,
     db: Session = Depends(get_db),
-    admin: usuario.Usuario = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     tipo_obj = db.query(tipo_evento.TipoEvento).filter(tipo_evento.TipoEvento.id == tipo_evento_id).first()
     if not tipo_obj:
@@ -907,6 +1011,7 @@ def delete_tipo_evento(
     if reservas_count:
         raise HTTPException(status_code=400, detail="No puedes eliminar un tipo de evento con reservas asociadas")
     db.delete(tipo_obj)
+    invalidate_catalog(db)
     db.commit()
     return {"success": True}
 
@@ -957,6 +1062,20 @@ def startup():
             if not exists:
                 db.add(tipo_usuario.TipoUsuario(**td))
 
+        invalidate_catalog(db)
         db.commit()
     finally:
         db.close()
+
+    # un dispatcher por worker; FOR UPDATE SKIP LOCKED evita que dos envíen el mismo evento
+    if settings.OUTBOX_DISPATCHER_ENABLED:
+        outbox.start_dispatcher()
+
+
+@app.on_event('shutdown')
+def shutdown():
+    # primero los avisos agrupados, para que su evento llegue al outbox antes de parar el dispatcher
+    availability_events.shutdown()
+    outbox.stop_dispatcher()
+    password_pool.shutdown()
+    mark_process_dead(os.getpid())
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, BigInteger, String, TIMESTAMP, func
+from ..database import Base
+
+class CacheVersion(Base):
+    """Contador de versión por nombre de caché; cada worker lo consulta para saber si debe recargar."""
+    __tablename__ = "cache_version"
+
+    nombre = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    actualizado_en = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
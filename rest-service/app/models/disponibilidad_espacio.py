@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, Time, Boolean, ForeignKey, Index, DDL, event, text
+from ..database import Base
+
+# Cualquier escritura (también fuera de esta API) incrementa la versión 'horarios' de
+# cache_version, así cada worker recarga las plantillas semanales en su próxima consulta
+HORARIOS_VERSION_TRIGGER = """
+CREATE OR REPLACE FUNCTION bump_horarios_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO cache_version (nombre, version) VALUES ('horarios', 1)
+    ON CONFLICT (nombre) DO UPDATE SET version = cache_version.version + 1, actualizado_en = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+DROP TRIGGER IF EXISTS trg_disponibilidad_espacio_version ON disponibilidad_espacio;
+CREATE TRIGGER trg_disponibilidad_espacio_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON disponibilidad_espacio
+    FOR EACH STATEMENT EXECUTE PROCEDURE bump_horarios_version();
+"""
+
+class DisponibilidadEspacio(Base):
+    """Horario semanal de apertura de un espacio (una fila por franja y día)."""
+    __tablename__ = "disponibilidad_espacio"
+    __table_args__ = (Index("ix_disp_espacio", "espacio_id"),)
+
+    id = Column(Integer, primary_key=True)
+    espacio_id = Column(Integer, ForeignKey("espacio.id", ondelete="CASCADE"), nullable=False)
+    dia_semana = Column(String(10), nullable=False)
+    hora_inicio = Column(Time, nullable=False)
+    hora_fin = Column(Time, nullable=False)
+    activo = Column(Boolean, nullable=False, server_default=text("true"))
+
+
+# create_all (arranque sin Alembic) también instala el trigger de la migración 0009
+event.listen(
+    DisponibilidadEspacio.__table__,
+    "after_create",
+    DDL(HORARIOS_VERSION_TRIGGER).execute_if(dialect="postgresql"),
+)
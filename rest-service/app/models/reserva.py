@@ -1,9 +1,47 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Time, Boolean, Text, TIMESTAMP, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Integer, String, ForeignKey, Date, Time, Boolean, Text, TIMESTAMP, Index, DDL, event, func, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint, TSRANGE
+from sqlalchemy.orm import deferred, relationship
 from ..database import Base
 
+# La exclusión de solapes solo afecta a las reservas que ocupan el horario. Qué estado
+# lo ocupa ('Aprobada') se resuelve por nombre en un trigger que mantiene la columna
+# `bloquea` de la propia fila, así la restricción solo lee columnas de reserva y el
+# esquema no fija el id que tenga 'Aprobada' en cada base. La migración 0003 usa
+# este mismo SQL.
+RESERVA_BLOQUEA_FUNCTION = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+CREATE OR REPLACE FUNCTION reserva_set_bloquea() RETURNS trigger AS $$
+BEGIN
+    NEW.bloquea := EXISTS (SELECT 1 FROM estado_reserva WHERE id = NEW.estado_id AND nombre = 'Aprobada');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+RESERVA_BLOQUEA_TRIGGER = """
+DROP TRIGGER IF EXISTS trg_reserva_bloquea ON reserva;
+CREATE TRIGGER trg_reserva_bloquea
+    BEFORE INSERT OR UPDATE OF estado_id, bloquea ON reserva
+    FOR EACH ROW EXECUTE PROCEDURE reserva_set_bloquea();
+"""
+
 class Reserva(Base):
     __tablename__ = "reserva"
+    __table_args__ = (
+        # disponibilidad, búsqueda de espacios libres y detección de solapes filtran por espacio/fecha
+        Index("ix_reserva_espacio_fecha", "espacio_id", "fecha"),
+        # paginación por cursor de GET /api/reservas: ORDER BY fecha DESC, id DESC
+        Index("ix_reserva_fecha_id", "fecha", "id"),
+        Index("ix_reserva_usuario_fecha_id", "usuario_id", "fecha", "id"),
+        # dos reservas Aprobadas del mismo espacio no pueden solaparse (migración 0003)
+        ExcludeConstraint(
+            (Column("espacio_id"), "="),
+            (Column("rango"), "&&"),
+            name="ex_reserva_solape_aprobada",
+            using="gist",
+            where=text("bloquea"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     codigo = Column(String(100), unique=True, nullable=False, index=True)
@@ -21,10 +59,26 @@ class Reserva(Base):
     asistentes_estimada = Column(Integer, nullable=True)
     creado_en = Column(TIMESTAMP, server_default=func.current_timestamp())
     actualizado_en = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+    # solo lo usa la restricción de exclusión; no se carga salvo que se pida
+    rango = deferred(Column(TSRANGE, Computed("tsrange(fecha + hora_inicio, fecha + hora_fin, '[)')", persisted=True)))
+    # la mantiene trg_reserva_bloquea a partir de estado_id; no se escribe desde la aplicación
+    bloquea = deferred(Column(Boolean, nullable=False, server_default=text("false")))
 
     usuario = relationship("Usuario")
     espacio = relationship("Espacio")
     tipo_evento = relationship("TipoEvento")
     estado = relationship("EstadoReserva")
 
-    //
\ No newline at end of file
+
+# create_all (arranque sin Alembic) necesita btree_gist y la función antes de crear la
+# tabla, y el trigger después
+event.listen(
+    Reserva.__table__,
+    "before_create",
+    DDL(RESERVA_BLOQUEA_FUNCTION).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Reserva.__table__,
+    "after_create",
+    DDL(RESERVA_BLOQUEA_TRIGGER).execute_if(dialect="postgresql"),
+)
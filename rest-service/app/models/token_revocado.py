@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, TIMESTAMP, func
+from ..database import Base
+
+class TokenRevocado(Base):
+    """JWT revocado antes de su expiración (logout); la fila sobra una vez pasado `expira_en`."""
+    __tablename__ = "token_revocado"
+
+    jti = Column(String(64), primary_key=True)
+    usuario_id = Column(Integer, ForeignKey("usuario.id", ondelete="CASCADE"), nullable=True)
+    expira_en = Column(TIMESTAMP, nullable=False, index=True)
+    creado_en = Column(TIMESTAMP, server_default=func.current_timestamp(), index=True)
@@ -20,6 +20,8 @@ class Usuario(Base):
     tipo_usuario_id = Column(Integer, ForeignKey("tipo_usuario.id"), nullable=False)
     estado = Column(String(20), nullable=False, default="activo")
     avatar_url = Column(String(500))
+    # Se incrementa al cambiar contraseña, rol o estado; invalida los tokens ya emitidos
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     creado_en = Column(TIMESTAMP, server_default=func.current_timestamp())
     actualizado_en = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
     
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from ..database import Base
+
+class WebhookOutbox(Base):
+    """Evento pendiente de enviar al servicio WebSocket, escrito en la misma transacción que el cambio que lo origina."""
+    __tablename__ = "webhook_outbox"
+
+    id = Column(Integer, primary_key=True)
+    evento = Column(String(100), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    # pendiente | enviado | fallido (agotó OUTBOX_MAX_ATTEMPTS)
+    estado = Column(String(20), nullable=False, default="pendiente", server_default="pendiente")
+    intentos = Column(Integer, nullable=False, default=0, server_default="0")
+    proximo_intento = Column(TIMESTAMP, nullable=False)
+    ultimo_error = Column(Text)
+    enviado_en = Column(TIMESTAMP)
+    creado_en = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        # el dispatcher solo lee pendientes; el índice parcial no crece con el histórico enviado
+        Index(
+            "ix_webhook_outbox_pendientes",
+            "proximo_intento",
+            "id",
+            postgresql_where=text("estado = 'pendiente'"),
+        ),
+    )
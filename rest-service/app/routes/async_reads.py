@@ -0,0 +1,129 @@
+"""Versiones async (asyncpg + AsyncSession) de los GET más consultados.
+
+Solo se registran con `ASYNC_DB_ENABLED`; `main` las incluye antes que las
+rutas sync equivalentes, que quedan como respaldo con las mismas URLs y
+respuestas. El código compartido con la versión sync (filtros, cursor,
+serialización, motor de disponibilidad y catálogo) se reutiliza tal cual; lo
+que necesita una `Session` sync corre dentro de `AsyncSession.run_sync`.
+"""
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from ..config import settings
+from ..database import get_async_db
+from ..models import espacio as espacio_model, notificacion as notificacion_model, reserva as reserva_model
+from ..schemas.notificacion import NotificacionResponse
+from ..services.availability import calc_availability
+from ..services.cache_versions import current_version, ESPACIOS_VERSION
+from ..services.catalog import catalog
+from ..services.principals import TokenClaims
+from ..services.reserva_export import filtrar_reservas
+from ..utils.dependencies import get_token_claims
+from ..utils.etag import make_etag, etag_or_not_modified
+from ..utils.pagination import next_cursor
+from .notificaciones import notificacion_response
+from .reservas import apply_keyset, parse_include, reserva_list_item
+
+router = APIRouter(tags=["async"])
+
+
+@router.get("/api/disponibilidad")
+async def get_disponibilidad(
+    espacio_id: int,
+    fecha: date,
+    incluir_pendientes: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+):
+    if not espacio_id:
+        raise HTTPException(status_code=400, detail="espacio_id es requerido")
+    return await db.run_sync(calc_availability, espacio_id, fecha, incluir_pendientes)
+
+
+@router.get("/api/espacios")
+async def get_espacios(
+    request: Request,
+    response: Response,
+    categoria_id: Optional[int] = None,
+    estado: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    version = await db.run_sync(current_version, ESPACIOS_VERSION)
+    etag = make_etag("espacios", version, request.url.query)
+    not_modified = etag_or_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    stmt = select(espacio_model.Espacio)
+    if categoria_id:
+        stmt = stmt.filter(espacio_model.Espacio.categoria_id == categoria_id)
+    if estado:
+        stmt = stmt.filter(espacio_model.Espacio.estado == estado)
+    espacios_list = (await db.execute(stmt)).scalars().all()
+    return [{
+        "id": e.id,
+        "codigo": e.codigo,
+        "nombre": e.nombre,
+        "categoria_id": e.categoria_id,
+        "capacidad_maxima": e.capacidad_maxima,
+        "imagen_url": e.imagen_url,
+        "estado": e.estado
+    } for e in espacios_list]
+
+
+@router.get("/api/reservas")
+async def list_reservas(
+    response: Response,
+    usuario_id: int = None,
+    espacio_id: int = None,
+    estado_id: int = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    if fecha_desde and fecha_hasta and fecha_desde > fecha_hasta:
+        raise HTTPException(status_code=400, detail='fecha_desde debe ser anterior o igual a fecha_hasta')
+    incluir = parse_include(include)
+    stmt = filtrar_reservas(
+        select(reserva_model.Reserva), usuario_id, espacio_id, estado_id, fecha_desde, fecha_hasta
+    )
+    # en async no hay carga perezosa: las relaciones pedidas deben venir cargadas
+    if 'espacio' in incluir:
+        stmt = stmt.options(selectinload(reserva_model.Reserva.espacio))
+    if 'usuario' in incluir:
+        stmt = stmt.options(selectinload(reserva_model.Reserva.usuario))
+    rows = (await db.execute(apply_keyset(stmt, cursor, limit))).scalars().all()
+    siguiente = next_cursor(rows, limit)
+    if siguiente:
+        response.headers['X-Next-Cursor'] = siguiente
+    rows = rows[:limit]
+    estados = {}
+    if 'estado' in incluir:
+        estados = {e.id: e for e in await db.run_sync(catalog.estados)}
+    return [reserva_list_item(r, incluir, estados) for r in rows]
+
+
+@router.get("/api/notificaciones", response_model=List[NotificacionResponse])
+async def list_notificaciones(
+    usuario_id: int,
+    limit: Optional[int] = 100,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenClaims = Depends(get_token_claims),
+):
+    if usuario_id != current_user.id and not current_user.es_admin:
+        raise HTTPException(status_code=403, detail='No tienes permiso para ver notificaciones de otro usuario')
+    Notificacion = notificacion_model.Notificacion
+    stmt = (
+        select(Notificacion)
+        .filter(Notificacion.usuario_id == usuario_id)
+        .order_by(Notificacion.creado_en.desc())
+        .limit(limit)
+    )
+    rows = (await db.execute(stmt)).scalars().all()
+    return [notificacion_response(r) for r in rows]
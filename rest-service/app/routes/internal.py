@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from .. import database
+from ..config import settings
+from ..database import get_db
+from ..services import availability_events, outbox, password_pool, revocation
+from ..services.availability import availability_cache
+from ..services.catalog import catalog
+from ..services.principals import TokenClaims, principal_cache
+from ..utils.dependencies import require_admin_claims
+from ..utils.db_pool import pool_metrics, pool_status
+from ..utils.jwt_handler import decode_cache
+
+router = APIRouter(prefix="/api/internal", tags=["internal"])
+
+
+@router.get("/cache")
+def get_cache_stats(admin: TokenClaims = Depends(require_admin_claims)):
+    """Estadísticas de las cachés en memoria de este worker (solo administradores)."""
+    return {
+        'disponibilidad': availability_cache.stats(),
+        'catalogo': catalog.stats(),
+        'principales': principal_cache.stats(),
+        'jwt': decode_cache.stats(),
+    }
+
+
+@router.get("/password-pool")
+def get_password_pool_stats(admin: TokenClaims = Depends(require_admin_claims)):
+    """Operaciones de hash en vuelo, en cola, rechazadas y tiempo medio en este worker."""
+    return password_pool.stats()
+
+
+@router.get("/revocation")
+def get_revocation_stats(admin: TokenClaims = Depends(require_admin_claims)):
+    """Filtro de Bloom de tokens revocados: entradas, tamaño y cuántas comprobaciones llegaron a la base."""
+    return revocation.stats()
+
+
+@router.get("/outbox")
+def get_outbox_stats(db: Session = Depends(get_db), admin: TokenClaims = Depends(require_admin_claims)):
+    """Eventos del outbox por estado, contadores del dispatcher y lotes/circuitos del cliente de webhooks de este worker."""
+    return {**outbox.stats(db), 'disponibilidad': availability_events.stats()}
+
+
+@router.get("/db-pool")
+def get_db_pool_stats(admin: TokenClaims = Depends(require_admin_claims)):
+    """Configuración, ocupación actual y contadores del pool de conexiones de este worker."""
+    return {
+        'config': {
+            'pool_size': settings.DB_POOL_SIZE,
+            'max_overflow': settings.DB_MAX_OVERFLOW,
+            'pool_timeout': settings.DB_POOL_TIMEOUT,
+            'pool_recycle': settings.DB_POOL_RECYCLE,
+            'pre_ping': settings.DB_POOL_PRE_PING,
+        },
+        'status': pool_status(database.engine),
+        'metrics': pool_metrics.snapshot(),
+        'async_status': pool_status(database.async_engine.sync_engine) if database.async_engine else None,
+    }
@@ -1,64 +1,134 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import Integer, insert, literal, select
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import date
 from ..database import get_db
-from ..schemas.notificacion import NotificacionCreate, NotificacionResponse
-from ..services.notification_service import create_notification, emit_webhook
+from ..schemas.notificacion import NotificacionCreate, NotificacionDifusion, NotificacionResponse
+from ..services.outbox import enqueue_webhook, enqueue_webhooks
+from ..services.catalog import catalog
 from .. import models
-from ..utils.dependencies import get_current_user
+from ..services.principals import Principal, TokenClaims
+from ..utils.dependencies import get_current_user, get_token_claims, is_admin, require_admin
 
 router = APIRouter(prefix="/api/notificaciones", tags=["notificaciones"])
 
 
+def notificacion_response(r) -> NotificacionResponse:
+    return NotificacionResponse(
+        id=r.id,
+        usuario_id=r.usuario_id,
+        titulo=r.titulo,
+        mensaje=r.mensaje,
+        leida=bool(r.leida),
+        reserva_id=r.reserva_id,
+        espacio_id=r.espacio_id,
+        metadata=r.metadata_info or {},
+        leida_at=r.leida_at,
+        creado_en=r.creado_en,
+    )
+
+
 @router.post("", response_model=dict)
-def post_notificacion(payload: NotificacionCreate, db: Session = Depends(get_db), current_user: models.usuario.Usuario = Depends(get_current_user)):
-    """Crear una notificación en la BD y emitir webhook al servicio WebSocket.
+def post_notificacion(payload: NotificacionCreate, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    """Crear una notificación en la BD y encolar su webhook al servicio WebSocket.
 
     Sólo el propio usuario o un administrador pueden crear notificaciones para un usuario.
     """
     # permiso: si el payload.usuario_id no es el del current_user, sólo admins (nivel_prioridad == 1) pueden hacerlo
     if payload.usuario_id is not None and payload.usuario_id != current_user.id:
-        if getattr(current_user.tipo_usuario, 'nivel_prioridad', None) != 1:
+        if not is_admin(db, current_user):
             raise HTTPException(status_code=403, detail='No tienes permiso para crear notificaciones para otro usuario')
 
     # si no se envió usuario_id, asumir current_user
     if payload.usuario_id is None:
         payload.usuario_id = current_user.id
 
-    n = create_notification(db, payload.dict())
-    # emitir al WebSocket para entrega en tiempo real
-    emit_webhook('notificacion', {
+    datos = payload.dict()
+    datos['metadata_info'] = datos.pop('metadata') or {}
+    n = models.notificacion.Notificacion(**datos)
+    db.add(n)
+    db.flush()
+    # entrega en tiempo real vía outbox, en la misma transacción que la notificación
+    enqueue_webhook(db, 'notificacion', {
         'usuario_id': n.usuario_id,
         'titulo': n.titulo,
         'mensaje': n.mensaje,
         'notificacion_id': n.id,
     })
+    db.commit()
     return {'success': True, 'id': n.id}
 
 
+@router.post("/difusion", response_model=dict)
+def post_difusion(payload: NotificacionDifusion, db: Session = Depends(get_db), admin: Principal = Depends(require_admin)):
+    """Crear la misma notificación para un conjunto de usuarios (solo administradores).
+
+    Las filas se insertan con un único `INSERT ... SELECT` sobre `usuario` y sus
+    eventos `notificacion` (el mismo que envía `post_notificacion`) entran al
+    outbox con otro único INSERT; el dispatcher los agrupa en lotes.
+    """
+    destinos = [payload.usuario_ids is not None, payload.espacio_id is not None, payload.tipo_usuario_id is not None]
+    if sum(destinos) != 1:
+        raise HTTPException(status_code=400, detail='Indica exactamente un destino: usuario_ids, espacio_id o tipo_usuario_id')
+
+    Usuario = models.usuario.Usuario
+    Notificacion = models.notificacion.Notificacion
+    metadata = dict(payload.metadata or {}, tipo='difusion')
+    q = select(
+        Usuario.id,
+        literal(payload.titulo),
+        literal(payload.mensaje),
+        literal(payload.espacio_id, Integer),
+        literal(metadata, JSONB),
+    ).where(Usuario.estado == 'activo')
+    if payload.usuario_ids is not None:
+        q = q.where(Usuario.id.in_(set(payload.usuario_ids)))
+    elif payload.espacio_id is not None:
+        # usuarios con reservas vigentes (pendientes o aprobadas) en el espacio y el rango de fechas
+        Reserva = models.reserva.Reserva
+        estados = [e.id for e in (catalog.estado_por_nombre(db, 'Pendiente'), catalog.estado_por_nombre(db, 'Aprobada')) if e]
+        reservas = select(Reserva.id).where(
+            Reserva.usuario_id == Usuario.id,
+            Reserva.espacio_id == payload.espacio_id,
+            Reserva.fecha >= (payload.fecha_desde or date.today()),
+            Reserva.estado_id.in_(estados),
+        )
+        if payload.fecha_hasta is not None:
+            reservas = reservas.where(Reserva.fecha <= payload.fecha_hasta)
+        q = q.where(reservas.exists())
+    else:
+        q = q.where(Usuario.tipo_usuario_id == payload.tipo_usuario_id)
+
+    columnas = Notificacion.__table__.c
+    creadas = db.execute(
+        insert(Notificacion)
+        .from_select([columnas.usuario_id, columnas.titulo, columnas.mensaje, columnas.espacio_id, columnas.metadata], q)
+        .returning(Notificacion.id, Notificacion.usuario_id)
+    ).all()
+    enqueue_webhooks(db, 'notificacion', [
+        {
+            'usuario_id': n.usuario_id,
+            'titulo': payload.titulo,
+            'mensaje': payload.mensaje,
+            'notificacion_id': n.id,
+        }
+        for n in creadas
+    ])
+    db.commit()
+    return {'success': True, 'enviadas': len(creadas)}
+
+
 @router.get("", response_model=List[NotificacionResponse])
-def list_notificaciones(usuario_id: int, limit: Optional[int] = 100, db: Session = Depends(get_db), current_user: models.usuario.Usuario = Depends(get_current_user)):
+def list_notificaciones(usuario_id: int, limit: Optional[int] = 100, db: Session = Depends(get_db), current_user: TokenClaims = Depends(get_token_claims)):
     """Listar notificaciones para un usuario usando ORM (autorizado).
 
     Sólo devuelve notificaciones si el `usuario_id` solicitado es igual al current_user o si el current_user es admin.
     """
-    if usuario_id != current_user.id and getattr(current_user.tipo_usuario, 'nivel_prioridad', None) != 1:
+    if usuario_id != current_user.id and not is_admin(db, current_user):
         raise HTTPException(status_code=403, detail='No tienes permiso para ver notificaciones de otro usuario')
 
     q = db.query(models.notificacion.Notificacion).filter(models.notificacion.Notificacion.usuario_id == usuario_id)
     rows = q.order_by(models.notificacion.Notificacion.creado_en.desc()).limit(limit).all()
-    out = []
-    for r in rows:
-        out.append(NotificacionResponse(
-            id=r.id,
-            usuario_id=r.usuario_id,
-            titulo=r.titulo,
-            mensaje=r.mensaje,
-            leida=bool(r.leida),
-            reserva_id=r.reserva_id,
-            espacio_id=r.espacio_id,
-            metadata=r.metadata_info or {},
-            leida_at=r.leida_at,
-            creado_en=r.creado_en,
-        ))
-    return out
+    return [notificacion_response(r) for r in rows]
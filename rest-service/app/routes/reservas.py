@@ -1,24 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, update, tuple_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from datetime import date
+from typing import Optional
+from ..config import settings
 from ..database import get_db
 from ..schemas.reserva import ReservaCreate, ReservaResponse, ReservaEstadoUpdate
-from ..services.reserva_service import create_reserva, calc_availability
-from ..models import reserva as reserva_model
-from ..utils.dependencies import get_current_user
+from ..services.reserva_service import create_reserva
+from ..models import reserva as reserva_model, notificacion as notificacion_model
+from ..services.principals import Principal, TokenClaims
+from ..utils.dependencies import get_current_user, is_admin, require_admin_claims
+from ..utils.db_errors import is_reserva_overlap
+from ..utils.pagination import InvalidCursor, decode_cursor, next_cursor
 from .. import models
-from ..services.notification_service import schedule_emit_webhook
+from ..services.outbox import enqueue_webhook
+from ..utils.metrics import RESERVAS_APROBADAS, RESERVAS_CREADAS
+from ..services.availability import invalidate_availability
+from ..services.availability_events import schedule_disponibilidad
+from ..services.catalog import catalog
+from ..services.reserva_export import FORMATOS, filtrar_reservas, stream_export
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/reservas", tags=["reservas"])
 
-@router.post("", response_model=ReservaResponse)
-def post_reserva(data: ReservaCreate, db: Session = Depends(get_db), current_user: models.usuario.Usuario = Depends(get_current_user), background_tasks: BackgroundTasks = None):
-    try:
-        new_res = create_reserva(db, current_user.id, data)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+LIST_INCLUDES = {'estado', 'espacio', 'usuario'}
+
+SOLAPE_DETAIL = 'El espacio ya tiene una reserva aprobada que se solapa con ese horario'
+
+
+def parse_include(include: Optional[str]) -> set:
+    incluir = {i.strip() for i in include.split(',') if i.strip()} if include else set()
+    desconocidos = incluir - LIST_INCLUDES
+    if desconocidos:
+        raise HTTPException(status_code=400, detail=f"include no soportado: {', '.join(sorted(desconocidos))}")
+    return incluir
+
+
+def apply_keyset(q, cursor: Optional[str], limit: int):
+    """Orden (fecha, id) descendente desde el cursor; pide limit + 1 filas para saber si hay más.
+
+    Sirve tanto para `Query` como para `select()` (ruta async).
+    """
+    if cursor:
+        try:
+            cursor_fecha, cursor_id = decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail='Cursor inválido')
+        q = q.filter(
+            tuple_(reserva_model.Reserva.fecha, reserva_model.Reserva.id) < tuple_(cursor_fecha, cursor_id)
+        )
+    return q.order_by(reserva_model.Reserva.fecha.desc(), reserva_model.Reserva.id.desc()).limit(limit + 1)
+
+
+def reserva_list_item(r, incluir: set, estados: dict) -> dict:
+    item = {
+        'id': r.id,
+        'codigo': r.codigo,
+        'usuario_id': r.usuario_id,
+        'espacio_id': r.espacio_id,
+        'tipo_evento_id': r.tipo_evento_id,
+        'estado_id': r.estado_id,
+        'fecha': r.fecha.isoformat(),
+        'hora_inicio': r.hora_inicio.strftime('%H:%M'),
+        'hora_fin': r.hora_fin.strftime('%H:%M'),
+        'titulo': r.titulo,
+        'descripcion': r.descripcion,
+        'es_bloqueo': r.es_bloqueo,
+    }
+    if 'estado' in incluir:
+        estado = estados.get(r.estado_id)
+        item['estado'] = {'id': estado.id, 'nombre': estado.nombre, 'color_hex': estado.color_hex} if estado else None
+    if 'espacio' in incluir:
+        item['espacio'] = {'id': r.espacio.id, 'codigo': r.espacio.codigo, 'nombre': r.espacio.nombre} if r.espacio else None
+    if 'usuario' in incluir:
+        # el listado es público: solo el nombre, sin datos de contacto
+        item['usuario'] = {
+            'id': r.usuario.id,
+            'nombre': r.usuario.nombre,
+            'apellido': r.usuario.apellido,
+        } if r.usuario else None
+    return item
+
 
-    # schedule webhook emission (non-blocking)
-    payload_out = {
+def _encolar_reserva_creada(db: Session, new_res) -> None:
+    """Eventos y notificación de una reserva nueva, en la transacción que la crea."""
+    estado = catalog.estado(db, new_res.estado_id) if new_res.estado_id else None
+    estado_nombre = estado.nombre if estado else 'Pendiente'
+    enqueue_webhook(db, 'reserva_creada', {
         'reserva_id': new_res.id,
         'usuario_id': new_res.usuario_id,
         'espacio_id': new_res.espacio_id,
@@ -27,31 +99,55 @@ def post_reserva(data: ReservaCreate, db: Session = Depends(get_db), current_use
         'hora_inicio': new_res.hora_inicio.strftime('%H:%M'),
         'hora_fin': new_res.hora_fin.strftime('%H:%M'),
         'titulo': new_res.titulo,
-        'estado': getattr(new_res.estado, 'nombre', None) or 'Pendiente'
-    }
-    if background_tasks is not None:
-        schedule_emit_webhook(background_tasks, 'reserva_creada', payload_out)
-        avail = calc_availability(db, new_res.espacio_id, new_res.fecha, True)
-        schedule_emit_webhook(background_tasks, 'disponibilidad_actualizada', avail)
-        # notificación al usuario: reserva registrada en estado pendiente/aprobada
-        try:
-            from ..services.notification_service import create_notification
-            create_notification(db, {
-                'usuario_id': new_res.usuario_id,
-                'titulo': 'Reserva creada',
-                'mensaje': f"Tu reserva '{new_res.titulo or new_res.codigo}' fue registrada en estado {payload_out['estado']}",
-                'reserva_id': new_res.id,
-                'espacio_id': new_res.espacio_id,
-                'metadata': {'tipo': 'reserva_creada', 'estado': payload_out['estado']},
-            })
-            schedule_emit_webhook(background_tasks, 'notificacion', {
-                'usuario_id': new_res.usuario_id,
-                'titulo': 'Reserva creada',
-                'mensaje': f"Tu reserva '{new_res.titulo or new_res.codigo}' fue registrada en estado {payload_out['estado']}",
-                'notificacion_id': new_res.id,
-            })
-        except Exception:
-            pass
+        'estado': estado_nombre,
+    })
+    # notificación al usuario: reserva registrada en estado pendiente/aprobada. En un
+    # savepoint para que un fallo al guardarla no impida crear la reserva.
+    n = notificacion_model.Notificacion(
+        usuario_id=new_res.usuario_id,
+        titulo='Reserva creada',
+        mensaje=f"Tu reserva '{new_res.titulo or new_res.codigo}' fue registrada en estado {estado_nombre}",
+        reserva_id=new_res.id,
+        espacio_id=new_res.espacio_id,
+        metadata_info={'tipo': 'reserva_creada', 'estado': estado_nombre},
+    )
+    # lo pendiente de la reserva se escribe fuera del savepoint: sus errores no se ignoran
+    db.flush()
+    try:
+        with db.begin_nested():
+            db.add(n)
+            db.flush()
+    except SQLAlchemyError:
+        logger.exception("No se pudo crear la notificación de la reserva %s", new_res.id)
+        return
+    enqueue_webhook(db, 'notificacion', {
+        'usuario_id': n.usuario_id,
+        'titulo': n.titulo,
+        'mensaje': n.mensaje,
+        'notificacion_id': n.id,
+    })
+
+
+@router.post("", response_model=ReservaResponse)
+def post_reserva(data: ReservaCreate, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    if data.es_bloqueo and not is_admin(db, current_user):
+        raise HTTPException(status_code=403, detail='Solo un administrador puede bloquear un espacio')
+    # reserva, eventos y notificación en un único commit: existen juntos o no existen
+    try:
+        new_res = create_reserva(db, current_user.id, data)
+        _encolar_reserva_creada(db, new_res)
+        invalidate_availability(db, new_res.espacio_id)
+        db.commit()
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except IntegrityError as e:
+        db.rollback()
+        if is_reserva_overlap(e):
+            raise HTTPException(status_code=409, detail=SOLAPE_DETAIL)
+        raise
+    RESERVAS_CREADAS.inc()
+    schedule_disponibilidad(new_res.espacio_id, new_res.fecha)
 
     return ReservaResponse(
         id=new_res.id,
@@ -69,38 +165,81 @@ def post_reserva(data: ReservaCreate, db: Session = Depends(get_db), current_use
     )
 
 @router.get("")
-def list_reservas(usuario_id: int = None, espacio_id: int = None, estado_id: int = None, db: Session = Depends(get_db)):
-    q = db.query(reserva_model.Reserva)
-    if usuario_id:
-        q = q.filter(reserva_model.Reserva.usuario_id == usuario_id)
-    if espacio_id:
-        q = q.filter(reserva_model.Reserva.espacio_id == espacio_id)
-    if estado_id:
-        q = q.filter(reserva_model.Reserva.estado_id == estado_id)
-    rows = q.order_by(reserva_model.Reserva.fecha.desc()).all()
-    out = []
-    for r in rows:
-        out.append({
-            'id': r.id,
-            'codigo': r.codigo,
-            'usuario_id': r.usuario_id,
-            'espacio_id': r.espacio_id,
-            'tipo_evento_id': r.tipo_evento_id,
-            'estado_id': r.estado_id,
-            'fecha': r.fecha.isoformat(),
-            'hora_inicio': r.hora_inicio.strftime('%H:%M'),
-            'hora_fin': r.hora_fin.strftime('%H:%M'),
-            'titulo': r.titulo,
-            'descripcion': r.descripcion,
-            'es_bloqueo': r.es_bloqueo,
-        })
-    return out
+def list_reservas(
+    response: Response,
+    usuario_id: int = None,
+    espacio_id: int = None,
+    estado_id: int = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    include: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Lista reservas de la más reciente a la más antigua, paginadas por cursor.
+
+    Si hay más resultados, la cabecera `X-Next-Cursor` trae el valor a enviar
+    como `cursor` para pedir la página siguiente. `include=estado,espacio,usuario`
+    añade esos objetos relacionados, cargados por lotes (una consulta por relación).
+    """
+    if fecha_desde and fecha_hasta and fecha_desde > fecha_hasta:
+        raise HTTPException(status_code=400, detail='fecha_desde debe ser anterior o igual a fecha_hasta')
+    incluir = parse_include(include)
+    q = filtrar_reservas(
+        db.query(reserva_model.Reserva), usuario_id, espacio_id, estado_id, fecha_desde, fecha_hasta
+    )
+    # estado sale del catálogo en memoria; espacio y usuario se cargan con un IN por página
+    if 'espacio' in incluir:
+        q = q.options(selectinload(reserva_model.Reserva.espacio))
+    if 'usuario' in incluir:
+        q = q.options(selectinload(reserva_model.Reserva.usuario))
+    rows = apply_keyset(q, cursor, limit).all()
+    siguiente = next_cursor(rows, limit)
+    if siguiente:
+        response.headers['X-Next-Cursor'] = siguiente
+    rows = rows[:limit]
+    estados = {e.id: e for e in catalog.estados(db)} if 'estado' in incluir else {}
+    return [reserva_list_item(r, incluir, estados) for r in rows]
+
+@router.get("/export")
+def export_reservas(
+    formato: str = Query('ndjson', pattern='^(ndjson|csv)$'),
+    usuario_id: int = None,
+    espacio_id: int = None,
+    estado_id: int = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    incluir_nombres: bool = False,
+    admin: TokenClaims = Depends(require_admin_claims),
+):
+    """Exporta reservas en NDJSON o CSV (solo administradores), en streaming y ordenadas por fecha."""
+    if fecha_desde and fecha_hasta and fecha_desde > fecha_hasta:
+        raise HTTPException(status_code=400, detail='fecha_desde debe ser anterior o igual a fecha_hasta')
+    filtros = {
+        'usuario_id': usuario_id,
+        'espacio_id': espacio_id,
+        'estado_id': estado_id,
+        'fecha_desde': fecha_desde,
+        'fecha_hasta': fecha_hasta,
+    }
+    return StreamingResponse(
+        stream_export(formato, incluir_nombres, filtros),
+        media_type=FORMATOS[formato],
+        headers={'Content-Disposition': f'attachment; filename="reservas.{formato}"'},
+    )
 
 @router.get("/{reserva_id}")
 def get_reserva(reserva_id: int, db: Session = Depends(get_db)):
-    r = db.query(reserva_model.Reserva).filter(reserva_model.Reserva.id == reserva_id).first()
+    r = (
+        db.query(reserva_model.Reserva)
+        .options(joinedload(reserva_model.Reserva.usuario), joinedload(reserva_model.Reserva.espacio))
+        .filter(reserva_model.Reserva.id == reserva_id)
+        .first()
+    )
     if not r:
         raise HTTPException(status_code=404, detail='Reserva not found')
+    estado = catalog.estado(db, r.estado_id) if r.estado_id else None
     return {
         'id': r.id,
         'codigo': r.codigo,
@@ -116,7 +255,7 @@ def get_reserva(reserva_id: int, db: Session = Depends(get_db)):
             'codigo': r.espacio.codigo,
         } if r.espacio else None,
         'tipo_evento_id': r.tipo_evento_id,
-        'estado': getattr(r.estado, 'nombre', None),
+        'estado': estado.nombre if estado else None,
         'fecha': r.fecha.isoformat(),
         'hora_inicio': r.hora_inicio.strftime('%H:%M'),
         'hora_fin': r.hora_fin.strftime('%H:%M'),
@@ -127,118 +266,117 @@ def get_reserva(reserva_id: int, db: Session = Depends(get_db)):
     }
 
 @router.patch("/{reserva_id}/estado")
-def update_reserva_estado(reserva_id: int, data: ReservaEstadoUpdate, db: Session = Depends(get_db), current_user: models.usuario.Usuario = Depends(get_current_user)):
-    r = db.query(reserva_model.Reserva).filter(reserva_model.Reserva.id == reserva_id).first()
+def update_reserva_estado(reserva_id: int, data: ReservaEstadoUpdate, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    Reserva = reserva_model.Reserva
+    r = db.query(Reserva).filter(Reserva.id == reserva_id).first()
     if not r:
         raise HTTPException(status_code=404, detail='Reserva not found')
-    if current_user.tipo_usuario.nivel_prioridad != 1 and current_user.id != r.usuario_id:
+    if current_user.id != r.usuario_id and not is_admin(db, current_user):
         raise HTTPException(status_code=403, detail='Permission denied')
-    estado = db.query(models.estado_reserva.EstadoReserva).filter(models.estado_reserva.EstadoReserva.id == data.estado_id).first()
+    estado = catalog.estado(db, data.estado_id)
     if not estado:
         raise HTTPException(status_code=404, detail='Estado not found')
+    estado_pendiente = catalog.estado_por_nombre(db, 'Pendiente')
+    estado_rechazada = catalog.estado_por_nombre(db, 'Rechazada')
 
     # Si se aprueba, rechazar otras pendientes que choquen en el mismo espacio/fecha/horario
+    # con un único UPDATE ... RETURNING en lugar de cargar y modificar cada fila
     pendientes_rechazadas = []
-    if estado.nombre.lower() == 'aprobada':
-        estado_pendiente = (
-            db.query(models.estado_reserva.EstadoReserva)
-            .filter(models.estado_reserva.EstadoReserva.nombre == 'Pendiente')
-            .first()
-        )
-        estado_rechazada = (
-            db.query(models.estado_reserva.EstadoReserva)
-            .filter(models.estado_reserva.EstadoReserva.nombre == 'Rechazada')
-            .first()
-        )
-        if estado_pendiente and estado_rechazada:
-            solapadas = (
-                db.query(reserva_model.Reserva)
-                .join(models.estado_reserva.EstadoReserva, reserva_model.Reserva.estado_id == models.estado_reserva.EstadoReserva.id)
-                .filter(
-                    reserva_model.Reserva.id != r.id,
-                    reserva_model.Reserva.espacio_id == r.espacio_id,
-                    reserva_model.Reserva.fecha == r.fecha,
-                    models.estado_reserva.EstadoReserva.id == estado_pendiente.id,
-                    reserva_model.Reserva.hora_inicio < r.hora_fin,
-                    reserva_model.Reserva.hora_fin > r.hora_inicio,
-                )
-                .all()
+    if estado.nombre.lower() == 'aprobada' and estado_pendiente and estado_rechazada:
+        pendientes_rechazadas = db.execute(
+            update(Reserva)
+            .where(
+                Reserva.id != r.id,
+                Reserva.espacio_id == r.espacio_id,
+                Reserva.fecha == r.fecha,
+                Reserva.estado_id == estado_pendiente.id,
+                Reserva.hora_inicio < r.hora_fin,
+                Reserva.hora_fin > r.hora_inicio,
             )
-            for other in solapadas:
-                other.estado_id = estado_rechazada.id
-                pendientes_rechazadas.append(other)
-                db.add(other)
+            .values(estado_id=estado_rechazada.id)
+            .returning(Reserva.id, Reserva.usuario_id, Reserva.espacio_id, Reserva.titulo, Reserva.codigo)
+            .execution_options(synchronize_session=False)
+        ).all()
 
     r.estado_id = estado.id
     db.add(r)
-    db.commit()
-    db.refresh(r)
 
-    from ..services.notification_service import schedule_emit_webhook
-    from ..services.notification_service import create_notification
-    payload = {
-        'reserva_id': r.id,
+    # Notificaciones del cambio (reserva actualizada + pendientes rechazadas) en un solo INSERT
+    notificaciones = [{
         'usuario_id': r.usuario_id,
+        'titulo': 'Actualizar estado de reserva',
+        'mensaje': f"Tu reserva '{r.titulo or r.codigo}' ahora está en estado {estado.nombre}",
+        'reserva_id': r.id,
         'espacio_id': r.espacio_id,
-        'nuevo_estado': estado.nombre,
-    }
-    # schedule webhook para la reserva actualizada
-    schedule_emit_webhook(None, 'reserva_actualizada', payload)
+        'metadata_info': {'tipo': 'reserva_estado', 'estado': estado.nombre},
+    }] + [{
+        'usuario_id': other.usuario_id,
+        'titulo': 'Actualizar estado de reserva',
+        'mensaje': f"Tu reserva '{other.titulo or other.codigo}' ahora está en estado Rechazada",
+        'reserva_id': other.id,
+        'espacio_id': other.espacio_id,
+        'metadata_info': {'tipo': 'reserva_estado', 'estado': 'Rechazada'},
+    } for other in pendientes_rechazadas]
+    Notificacion = notificacion_model.Notificacion
+    notificaciones_creadas = db.execute(
+        insert(Notificacion).returning(Notificacion.id, Notificacion.usuario_id, Notificacion.titulo, Notificacion.mensaje),
+        notificaciones,
+    ).all()
 
-    # Emitir webhook para las pendientes rechazadas automáticamente
+    espacio_id, fecha, usuario_id = r.espacio_id, r.fecha, r.usuario_id
+    # eventos al outbox en la misma transacción: se envían si y solo si el cambio se confirma
+    enqueue_webhook(db, 'reserva_actualizada', {
+        'reserva_id': reserva_id,
+        'usuario_id': usuario_id,
+        'espacio_id': espacio_id,
+        'nuevo_estado': estado.nombre,
+    })
+    # pendientes rechazadas automáticamente
     for other in pendientes_rechazadas:
-        schedule_emit_webhook(
-            None,
-            'reserva_actualizada',
-            {
-                'reserva_id': other.id,
-                'usuario_id': other.usuario_id,
-                'espacio_id': other.espacio_id,
-                'nuevo_estado': 'Rechazada',
-            },
-        )
-
-    # Notificar disponibilidad del espacio/fecha tras cambio de estado
-    avail = calc_availability(db, r.espacio_id, r.fecha, True)
-    schedule_emit_webhook(None, 'disponibilidad_actualizada', avail)
-
-    # Crear notificación para el usuario del cambio de estado
-    try:
-        create_notification(db, {
-            'usuario_id': r.usuario_id,
-            'titulo': 'Actualizar estado de reserva',
-            'mensaje': f"Tu reserva '{r.titulo or r.codigo}' ahora está en estado {estado.nombre}",
-            'reserva_id': r.id,
-            'espacio_id': r.espacio_id,
-            'metadata': {'tipo': 'reserva_estado', 'estado': estado.nombre},
+        enqueue_webhook(db, 'reserva_actualizada', {
+            'reserva_id': other.id,
+            'usuario_id': other.usuario_id,
+            'espacio_id': other.espacio_id,
+            'nuevo_estado': 'Rechazada',
         })
-        schedule_emit_webhook(None, 'notificacion', {
-            'usuario_id': r.usuario_id,
-            'titulo': 'Actualizar estado de reserva',
-            'mensaje': f"Tu reserva '{r.titulo or r.codigo}' ahora está en estado {estado.nombre}",
-            'notificacion_id': r.id,
+    for n in notificaciones_creadas:
+        enqueue_webhook(db, 'notificacion', {
+            'usuario_id': n.usuario_id,
+            'titulo': n.titulo,
+            'mensaje': n.mensaje,
+            'notificacion_id': n.id,
         })
-    except Exception:
-        pass
+    invalidate_availability(db, espacio_id)
+    try:
+        db.commit()
+    except IntegrityError as e:
+        # la exclusión GiST impide aprobar dos reservas solapadas aunque lleguen a la vez
+        db.rollback()
+        if is_reserva_overlap(e):
+            raise HTTPException(status_code=409, detail=SOLAPE_DETAIL)
+        raise
+    if estado.nombre.lower() == 'aprobada':
+        RESERVAS_APROBADAS.inc()
+
+    # disponibilidad del espacio/fecha: un solo evento por ráfaga de cambios, fuera del request
+    schedule_disponibilidad(espacio_id, fecha)
 
-    return {'success': True, 'reserva_id': r.id, 'nuevo_estado': estado.nombre}
+    return {'success': True, 'reserva_id': reserva_id, 'nuevo_estado': estado.nombre}
 
 @router.delete("/{reserva_id}")
-def delete_reserva(reserva_id: int, db: Session = Depends(get_db), current_user: models.usuario.Usuario = Depends(get_current_user)):
+def delete_reserva(reserva_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     r = db.query(reserva_model.Reserva).filter(reserva_model.Reserva.id == reserva_id).first()
     if not r:
         raise HTTPException(status_code=404, detail='Reserva not found')
-    if current_user.tipo_usuario.nivel_prioridad != 1 and current_user.id != r.usuario_id:
+    if current_user.id != r.usuario_id and not is_admin(db, current_user):
         raise HTTPException(status_code=403, detail='Permission denied')
+    espacio_id, fecha = r.espacio_id, r.fecha
     db.delete(r)
-    db.commit()
-    from ..services.notification_service import schedule_emit_webhook
-    payload = {
+    enqueue_webhook(db, 'reserva_cancelada', {
         'reserva_id': reserva_id,
-        'espacio_id': r.espacio_id,
-    }
-    # schedule webhook (no BackgroundTasks available here)
-    schedule_emit_webhook(None, 'reserva_cancelada', payload)
-    avail = calc_availability(db, r.espacio_id, r.fecha, True)
-    schedule_emit_webhook(None, 'disponibilidad_actualizada', avail)
+        'espacio_id': espacio_id,
+    })
+    invalidate_availability(db, espacio_id)
+    db.commit()
+    schedule_disponibilidad(espacio_id, fecha)
     return {'success': True}
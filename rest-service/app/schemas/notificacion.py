@@ -1,7 +1,7 @@
 # app/schemas/notificacion.py
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
-from datetime import datetime
+from typing import Optional, Dict, Any, List
+from datetime import date, datetime
 
 class NotificacionCreate(BaseModel):
     """Schema para crear una notificación"""
@@ -13,6 +13,22 @@ class NotificacionCreate(BaseModel):
     espacio_id: Optional[int] = None
     metadata: Optional[Dict[str, Any]] = {}
 
+class NotificacionDifusion(BaseModel):
+    """Schema para enviar la misma notificación a un conjunto de usuarios.
+
+    Exactamente un destino: `usuario_ids`, `espacio_id` (usuarios con reservas
+    pendientes o aprobadas en el espacio entre `fecha_desde`, hoy por defecto,
+    y `fecha_hasta`) o `tipo_usuario_id`. Solo usuarios activos.
+    """
+    titulo: str
+    mensaje: str
+    metadata: Optional[Dict[str, Any]] = {}
+    usuario_ids: Optional[List[int]] = None
+    espacio_id: Optional[int] = None
+    fecha_desde: Optional[date] = None
+    fecha_hasta: Optional[date] = None
+    tipo_usuario_id: Optional[int] = None
+
 class NotificacionResponse(BaseModel):
     """Schema de respuesta de notificación"""
     id: int
@@ -0,0 +1,383 @@
+"""Motor único de disponibilidad de espacios.
+
+El horario de apertura sale de `disponibilidad_espacio` (plantilla semanal por
+espacio, cargada una vez y cacheada hasta que cambia la versión 'horarios' de
+`cache_version`, que un trigger incrementa con cada escritura en esa tabla);
+los espacios sin filas usan la jornada por defecto de `settings`. Los huecos libres se obtienen restando a esa
+plantilla los intervalos ocupados, ambos ordenados, en un solo barrido.
+"""
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from datetime import date, datetime, timedelta, time as time_cls
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import (
+    espacio as espacio_model,
+    reserva as reserva_model,
+    disponibilidad_espacio as disponibilidad_model,
+)
+from ..utils.lru_cache import LRUCache
+from . import cache_versions
+from .catalog import catalog
+
+Intervalo = Tuple[time_cls, time_cls]
+
+# Límites del cálculo en lote para que una sola petición no recorra todo el histórico
+MAX_BATCH_DIAS = 31
+MAX_BATCH_ESPACIOS = 200
+MAX_BUSQUEDA_RESULTADOS = 100
+
+_DIAS_SEMANA = {
+    "lunes": 0, "monday": 0, "lun": 0, "mon": 0, "1": 0,
+    "martes": 1, "tuesday": 1, "mar": 1, "tue": 1, "2": 1,
+    "miercoles": 2, "wednesday": 2, "mie": 2, "wed": 2, "3": 2,
+    "jueves": 3, "thursday": 3, "jue": 3, "thu": 3, "4": 3,
+    "viernes": 4, "friday": 4, "vie": 4, "fri": 4, "5": 4,
+    "sabado": 5, "saturday": 5, "sab": 5, "sat": 5, "6": 5,
+    "domingo": 6, "sunday": 6, "dom": 6, "sun": 6, "7": 6,
+}
+
+availability_cache = LRUCache(
+    maxsize=settings.AVAILABILITY_CACHE_SIZE,
+    ttl=settings.AVAILABILITY_CACHE_TTL_SECONDS,
+)
+# Versión de cache_version que incrementa el trigger de disponibilidad_espacio
+HORARIOS_VERSION = "horarios"
+
+
+def _reservas_version(espacio_id: int) -> str:
+    """Versión de cache_version que cambia con cada alta, cambio de estado o baja de reservas del espacio."""
+    return f"disponibilidad:{espacio_id}"
+
+_templates: Dict[int, Dict[int, List[Intervalo]]] = {}
+_templates_loaded_at: Optional[float] = None
+_templates_version: Optional[int] = None
+_templates_lock = threading.Lock()
+
+
+def _parse_hora(value: str) -> time_cls:
+    return datetime.strptime(value, "%H:%M").time()
+
+
+def _jornada_default() -> List[Intervalo]:
+    return [(_parse_hora(settings.JORNADA_INICIO), _parse_hora(settings.JORNADA_FIN))]
+
+
+def _weekday(dia_semana: str) -> Optional[int]:
+    """Convierte 'Lunes', 'miércoles', 'monday' o '1' (ISO) en 0..6; None si no se reconoce."""
+    normalizado = unicodedata.normalize("NFKD", (dia_semana or "").strip().lower())
+    normalizado = "".join(c for c in normalizado if not unicodedata.combining(c))
+    return _DIAS_SEMANA.get(normalizado)
+
+
+def _merge(intervalos: Iterable[Intervalo]) -> List[Intervalo]:
+    """Ordena y fusiona intervalos solapados o contiguos."""
+    merged: List[Intervalo] = []
+    for ini, fin in sorted(intervalos):
+        if fin <= ini:
+            continue
+        if merged and ini <= merged[-1][1]:
+            if fin > merged[-1][1]:
+                merged[-1] = (merged[-1][0], fin)
+        else:
+            merged.append((ini, fin))
+    return merged
+
+
+def _subtract(ventanas: Sequence[Intervalo], ocupados: Sequence[Intervalo]) -> List[Intervalo]:
+    """Resta los intervalos ocupados (ordenados por inicio) a las ventanas de apertura (ordenadas y disjuntas)."""
+    libres: List[Intervalo] = []
+    j = 0
+    for ini, fin in ventanas:
+        # los ocupados que terminan antes de esta ventana tampoco afectan a las siguientes
+        while j < len(ocupados) and ocupados[j][1] <= ini:
+            j += 1
+        cursor = ini
+        k = j
+        while k < len(ocupados) and ocupados[k][0] < fin and cursor < fin:
+            o_ini, o_fin = ocupados[k]
+            if o_ini > cursor:
+                libres.append((cursor, o_ini))
+            if o_fin > cursor:
+                cursor = o_fin
+            k += 1
+        if cursor < fin:
+            libres.append((cursor, fin))
+    return libres
+
+
+def _load_templates(db: Session) -> Dict[int, Dict[int, List[Intervalo]]]:
+    """Carga todas las franjas activas en una consulta y las agrupa por espacio y día."""
+    D = disponibilidad_model.DisponibilidadEspacio
+    rows = (
+        db.query(D.espacio_id, D.dia_semana, D.hora_inicio, D.hora_fin)
+        .filter(D.activo.is_(True))
+        .all()
+    )
+    crudo: Dict[int, Dict[int, List[Intervalo]]] = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        dia = _weekday(row.dia_semana)
+        if dia is None:
+            continue
+        crudo[row.espacio_id][dia].append((row.hora_inicio, row.hora_fin))
+    return {
+        espacio_id: {dia: _merge(franjas) for dia, franjas in por_dia.items()}
+        for espacio_id, por_dia in crudo.items()
+    }
+
+
+def _get_templates(db: Session) -> Dict[int, Dict[int, List[Intervalo]]]:
+    global _templates, _templates_loaded_at, _templates_version
+    version = cache_versions.current_version(db, HORARIOS_VERSION)
+    now = time.monotonic()
+    with _templates_lock:
+        fresh = (
+            _templates_loaded_at is not None
+            and _templates_version == version
+            and now - _templates_loaded_at < settings.AVAILABILITY_TEMPLATE_TTL_SECONDS
+        )
+        if fresh:
+            return _templates
+    # fuera del lock (ver CatalogCache._get): en run_sync la consulta cede el event loop
+    loaded = _load_templates(db)
+    with _templates_lock:
+        if _templates_loaded_at is None or _templates_loaded_at <= now:
+            _templates = loaded
+            _templates_loaded_at = now
+            _templates_version = version
+        return _templates
+
+
+def opening_hours(db: Session, espacio_id: int, fecha: date) -> List[Intervalo]:
+    """Ventanas de apertura de un espacio en una fecha.
+
+    Un espacio con horario configurado pero sin franjas ese día está cerrado.
+    """
+    template = _get_templates(db).get(espacio_id)
+    if template is None:
+        return _jornada_default()
+    return template.get(fecha.weekday(), [])
+
+
+def _blocking_estados(db: Session, incluir_pendientes: bool) -> Dict[int, str]:
+    """Devuelve {estado_id: nombre} de los estados que bloquean un horario."""
+    nombres = ["Aprobada"] + (["Pendiente"] if incluir_pendientes else [])
+    return {e.id: e.nombre for e in catalog.estados(db) if e.nombre in nombres}
+
+
+def _load_reservas(db: Session, espacio_ids: List[int], fecha_inicio: date, fecha_fin: date, estados: Dict[int, str]):
+    """Reservas bloqueantes del rango agrupadas por (espacio_id, fecha), ordenadas por hora de inicio."""
+    Reserva = reserva_model.Reserva
+    rows = (
+        db.query(
+            Reserva.id,
+            Reserva.espacio_id,
+            Reserva.fecha,
+            Reserva.estado_id,
+            Reserva.hora_inicio,
+            Reserva.hora_fin,
+            Reserva.titulo,
+            Reserva.usuario_id,
+        )
+        .filter(
+            Reserva.espacio_id.in_(espacio_ids),
+            Reserva.fecha >= fecha_inicio,
+            Reserva.fecha <= fecha_fin,
+            Reserva.estado_id.in_(list(estados)),
+        )
+        .order_by(Reserva.espacio_id.asc(), Reserva.fecha.asc(), Reserva.hora_inicio.asc())
+        .all()
+    )
+    por_dia = defaultdict(list)
+    for r in rows:
+        por_dia[(r.espacio_id, r.fecha)].append(r)
+    return por_dia
+
+
+def _format_libres(db: Session, espacio_id: int, fecha: date, rows) -> List[dict]:
+    libres = _subtract(opening_hours(db, espacio_id, fecha), [(r.hora_inicio, r.hora_fin) for r in rows])
+    return [{"hora_inicio": ini.strftime("%H:%M"), "hora_fin": fin.strftime("%H:%M")} for ini, fin in libres]
+
+
+def _compute_availability(db: Session, espacio_id: int, fecha: date, incluir_pendientes: bool) -> dict:
+    estados = _blocking_estados(db, incluir_pendientes)
+    rows = _load_reservas(db, [espacio_id], fecha, fecha, estados).get((espacio_id, fecha), [])
+
+    espacio_obj = db.query(espacio_model.Espacio.nombre).filter(espacio_model.Espacio.id == espacio_id).first()
+
+    return {
+        "espacio_id": espacio_id,
+        "espacio_nombre": espacio_obj.nombre if espacio_obj else None,
+        "fecha": fecha.isoformat(),
+        "dia_semana": fecha.strftime("%A"),
+        "ocupados": [
+            {
+                "id": r.id,
+                "estado": estados.get(r.estado_id),
+                "hora_inicio": r.hora_inicio.strftime("%H:%M"),
+                "hora_fin": r.hora_fin.strftime("%H:%M"),
+                "titulo": r.titulo,
+                "usuario_id": r.usuario_id,
+            }
+            for r in rows
+        ],
+        "libres": _format_libres(db, espacio_id, fecha, rows),
+    }
+
+
+def calc_availability(db: Session, espacio_id: int, fecha: date, incluir_pendientes: bool = True) -> dict:
+    """
+    Calcula slots libres y ocupados de un espacio/fecha según su horario semanal.
+    Usa reservas con estado Aprobada y opcionalmente Pendiente como bloqueantes.
+
+    El resultado se cachea por (espacio, fecha, incluir_pendientes) junto con las
+    versiones de las reservas del espacio y de los horarios: un cambio en
+    cualquier worker deja de usarse en todos en cuanto releen `cache_version`.
+    Se comparte entre peticiones: tratarlo como de solo lectura.
+    """
+    key = (
+        cache_versions.current_version(db, _reservas_version(espacio_id)),
+        cache_versions.current_version(db, HORARIOS_VERSION),
+        espacio_id,
+        fecha,
+        incluir_pendientes,
+    )
+    payload = availability_cache.get(key)
+    if payload is not None:
+        return payload
+    payload = _compute_availability(db, espacio_id, fecha, incluir_pendientes)
+    availability_cache.set(key, payload)
+    return payload
+
+
+def invalidate_availability(db: Session, espacio_id: int) -> None:
+    """Invalida la disponibilidad cacheada del espacio en todos los workers; se publica con el commit del llamador."""
+    cache_versions.bump_version(db, _reservas_version(espacio_id))
+
+
+def calc_availability_batch(
+    db: Session,
+    fecha_inicio: date,
+    fecha_fin: date,
+    espacio_ids: Optional[List[int]] = None,
+    categoria_id: Optional[int] = None,
+    incluir_pendientes: bool = True,
+) -> dict:
+    """
+    Calcula slots libres/ocupados para varios espacios y un rango de fechas.
+
+    Usa tres consultas en total (estados, espacios y reservas del rango) sin
+    importar cuántos espacios o días se pidan, y agrupa las reservas en memoria.
+    Lanza ValueError si la selección supera `MAX_BATCH_ESPACIOS` espacios.
+    """
+    if espacio_ids and len(set(espacio_ids)) > MAX_BATCH_ESPACIOS:
+        raise ValueError(f"No se pueden pedir más de {MAX_BATCH_ESPACIOS} espacios a la vez")
+    estados = _blocking_estados(db, incluir_pendientes)
+
+    q_espacios = db.query(espacio_model.Espacio.id, espacio_model.Espacio.nombre)
+    if espacio_ids:
+        q_espacios = q_espacios.filter(espacio_model.Espacio.id.in_(espacio_ids))
+    if categoria_id:
+        q_espacios = q_espacios.filter(espacio_model.Espacio.categoria_id == categoria_id)
+    # uno de más para detectar que la categoría excede el límite en lugar de recortarla en silencio
+    espacios = q_espacios.order_by(espacio_model.Espacio.id.asc()).limit(MAX_BATCH_ESPACIOS + 1).all()
+    if len(espacios) > MAX_BATCH_ESPACIOS:
+        raise ValueError(f"La selección supera {MAX_BATCH_ESPACIOS} espacios; acótala con espacio_ids")
+
+    por_dia = _load_reservas(db, [e.id for e in espacios], fecha_inicio, fecha_fin, estados) if espacios else {}
+
+    dias = [fecha_inicio + timedelta(days=n) for n in range((fecha_fin - fecha_inicio).days + 1)]
+    out = []
+    for esp in espacios:
+        dias_out = []
+        for dia in dias:
+            rows = por_dia.get((esp.id, dia), [])
+            dias_out.append(
+                {
+                    "fecha": dia.isoformat(),
+                    "ocupados": [
+                        {
+                            "id": r.id,
+                            "estado": estados.get(r.estado_id),
+                            "hora_inicio": r.hora_inicio.strftime("%H:%M"),
+                            "hora_fin": r.hora_fin.strftime("%H:%M"),
+                        }
+                        for r in rows
+                    ],
+                    "libres": _format_libres(db, esp.id, dia, rows),
+                }
+            )
+        out.append({"espacio_id": esp.id, "espacio_nombre": esp.nombre, "dias": dias_out})
+
+    return {
+        "fecha_inicio": fecha_inicio.isoformat(),
+        "fecha_fin": fecha_fin.isoformat(),
+        "incluir_pendientes": incluir_pendientes,
+        "espacios": out,
+    }
+
+
+def _fits(ventanas: Sequence[Intervalo], hora_inicio: time_cls, hora_fin: time_cls) -> bool:
+    return any(ini <= hora_inicio and hora_fin <= fin for ini, fin in ventanas)
+
+
+def find_free_espacios(
+    db: Session,
+    fecha: date,
+    hora_inicio: time_cls,
+    hora_fin: time_cls,
+    capacidad_min: Optional[int] = None,
+    categoria_id: Optional[int] = None,
+    incluir_pendientes: bool = True,
+    limit: int = MAX_BUSQUEDA_RESULTADOS,
+) -> List[dict]:
+    """
+    Espacios activos libres en fecha/horario, ordenados por mejor ajuste de capacidad.
+
+    Los conflictos se descartan con un anti-join (NOT EXISTS) en una sola consulta;
+    el horario de apertura se comprueba en memoria con las plantillas cacheadas.
+    """
+    estados = _blocking_estados(db, incluir_pendientes)
+    Reserva = reserva_model.Reserva
+    Espacio = espacio_model.Espacio
+
+    conflicto = exists().where(
+        Reserva.espacio_id == Espacio.id,
+        Reserva.fecha == fecha,
+        Reserva.hora_inicio < hora_fin,
+        Reserva.hora_fin > hora_inicio,
+        Reserva.estado_id.in_(list(estados)),
+    )
+    q = (
+        db.query(Espacio.id, Espacio.codigo, Espacio.nombre, Espacio.categoria_id, Espacio.capacidad_maxima)
+        .filter(Espacio.estado == "activo", ~conflicto)
+    )
+    if capacidad_min:
+        q = q.filter(Espacio.capacidad_maxima >= capacidad_min)
+    if categoria_id:
+        q = q.filter(Espacio.categoria_id == categoria_id)
+    candidatos = q.order_by(Espacio.capacidad_maxima.asc(), Espacio.id.asc()).all()
+
+    out = []
+    for esp in candidatos:
+        if not _fits(opening_hours(db, esp.id, fecha), hora_inicio, hora_fin):
+            continue
+        out.append(
+            {
+                "id": esp.id,
+                "codigo": esp.codigo,
+                "nombre": esp.nombre,
+                "categoria_id": esp.categoria_id,
+                "capacidad_maxima": esp.capacidad_maxima,
+                "holgura": esp.capacidad_maxima - capacidad_min if capacidad_min else None,
+            }
+        )
+        if len(out) >= limit:
+            break
+    return out
@@ -0,0 +1,49 @@
+"""Eventos `disponibilidad_actualizada` agrupados por (espacio_id, fecha).
+
+Cada cambio de una reserva solo avisa con `schedule_disponibilidad`; la
+disponibilidad se calcula una vez cuando la ráfaga de cambios de ese espacio
+y día se calma (`DISPONIBILIDAD_DEBOUNCE_MS`, como mucho
+`DISPONIBILIDAD_DEBOUNCE_MAX_MS` desde el primer aviso) y se deja en el outbox
+con el estado más reciente. Una aprobación que rechaza N pendientes, o una
+cancelación masiva, produce un único evento por espacio y día.
+"""
+from datetime import date
+from typing import Tuple
+
+from ..config import settings
+from ..database import SessionLocal
+from ..utils.debounce import Debouncer
+from .availability import calc_availability
+from .outbox import enqueue_webhook
+
+
+def _emit(key: Tuple[int, date]) -> None:
+    espacio_id, fecha = key
+    db = SessionLocal()
+    try:
+        avail = calc_availability(db, espacio_id, fecha, True)
+        enqueue_webhook(db, 'disponibilidad_actualizada', avail)
+        db.commit()
+    finally:
+        db.close()
+
+
+debouncer = Debouncer(
+    _emit,
+    window=settings.DISPONIBILIDAD_DEBOUNCE_MS / 1000,
+    max_wait=settings.DISPONIBILIDAD_DEBOUNCE_MAX_MS / 1000,
+    name="disponibilidad-debounce",
+)
+
+
+def schedule_disponibilidad(espacio_id: int, fecha: date) -> None:
+    """Avisa de un cambio en el espacio/día; llamar después del commit."""
+    debouncer.schedule((espacio_id, fecha))
+
+
+def shutdown() -> None:
+    debouncer.stop()
+
+
+def stats() -> dict:
+    return debouncer.stats()
@@ -0,0 +1,60 @@
+"""Versiones compartidas de las cachés en memoria.
+
+Cada worker guarda su propia copia de los datos cacheados; la tabla
+`cache_version` indica cuándo deben recargarse. La versión se relee como
+mucho cada `CACHE_VERSION_CHECK_SECONDS`, así que la mayoría de peticiones no
+tocan la base de datos para saber si su caché sigue vigente.
+"""
+import threading
+import time
+from typing import Dict, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.cache_version import CacheVersion
+
+# Versión que cambia con cualquier alta/edición/baja de espacios o sus características
+ESPACIOS_VERSION = "espacios"
+
+_known: Dict[str, Tuple[int, float]] = {}
+_lock = threading.Lock()
+
+
+def current_version(db: Session, nombre: str) -> int:
+    """Versión vigente de una caché; 0 si todavía no se ha incrementado nunca."""
+    now = time.monotonic()
+    with _lock:
+        known = _known.get(nombre)
+        if known is not None and now - known[1] < settings.CACHE_VERSION_CHECK_SECONDS:
+            return known[0]
+    # una sola consulta refresca todas las versiones conocidas
+    rows = db.execute(select(CacheVersion.nombre, CacheVersion.version)).all()
+    with _lock:
+        for row in rows:
+            _known[row.nombre] = (row.version, now)
+        if nombre not in _known:
+            _known[nombre] = (0, now)
+        return _known[nombre][0]
+
+
+def bump_version(db: Session, nombre: str) -> None:
+    """Incrementa la versión dentro de la transacción del llamador (se publica con su commit)."""
+    stmt = insert(CacheVersion).values(nombre=nombre, version=1)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[CacheVersion.nombre],
+            set_={"version": CacheVersion.version + 1},
+        )
+    )
+    forget(nombre)
+    # lo que se lea antes del commit puede ser la versión vieja; olvidarla otra vez al confirmar
+    event.listen(db, "after_commit", lambda session: forget(nombre), once=True)
+
+
+def forget(nombre: str) -> None:
+    """Obliga a este worker a releer la versión en la próxima consulta."""
+    with _lock:
+        _known.pop(nombre, None)
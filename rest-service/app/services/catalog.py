@@ -0,0 +1,174 @@
+"""Caché en memoria de las tablas de catálogo.
+
+EstadoReserva, TipoUsuario, TipoEvento y CategoriaEspacio son tablas pequeñas
+que se leen en casi cada petición y cambian muy pocas veces. Se cargan
+completas en una instantánea inmutable por worker, asociada a la versión
+'catalogo' de `cache_version`; los CRUD de administración incrementan esa
+versión con `invalidate_catalog` y cada worker recarga al verla cambiar.
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..models import estado_reserva, tipo_usuario, tipo_evento, categoria_espacio
+from . import cache_versions
+
+CATALOG_VERSION = "catalogo"
+
+
+@dataclass(frozen=True)
+class EstadoReservaInfo:
+    id: int
+    nombre: str
+    color_hex: Optional[str]
+    permite_edicion: Optional[bool]
+    es_final: Optional[bool]
+    orden: Optional[int]
+
+
+@dataclass(frozen=True)
+class TipoUsuarioInfo:
+    id: int
+    nombre: str
+    descripcion: Optional[str]
+    nivel_prioridad: int
+    permisos: dict = field(default_factory=dict)
+
+    @property
+    def es_admin(self) -> bool:
+        return self.nivel_prioridad == 1
+
+
+@dataclass(frozen=True)
+class TipoEventoInfo:
+    id: int
+    nombre: str
+    descripcion: Optional[str]
+    requiere_aprobacion: Optional[bool]
+    color_hex: Optional[str]
+
+
+@dataclass(frozen=True)
+class CategoriaEspacioInfo:
+    id: int
+    nombre: str
+    descripcion: Optional[str]
+    requiere_aprobacion: Optional[bool]
+    capacidad_maxima: Optional[int]
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    version: int
+    estados: Dict[int, EstadoReservaInfo]
+    tipos_usuario: Dict[int, TipoUsuarioInfo]
+    tipos_evento: Dict[int, TipoEventoInfo]
+    categorias: Dict[int, CategoriaEspacioInfo]
+    estados_por_nombre: Dict[str, EstadoReservaInfo]
+
+
+def _load(db: Session, version: int) -> _Snapshot:
+    estados = {
+        e.id: EstadoReservaInfo(e.id, e.nombre, e.color_hex, e.permite_edicion, e.es_final, e.orden)
+        for e in db.query(estado_reserva.EstadoReserva).order_by(estado_reserva.EstadoReserva.id).all()
+    }
+    tipos_usuario = {
+        t.id: TipoUsuarioInfo(t.id, t.nombre, t.descripcion, t.nivel_prioridad, t.permisos or {})
+        for t in db.query(tipo_usuario.TipoUsuario).order_by(tipo_usuario.TipoUsuario.id).all()
+    }
+    tipos_evento = {
+        t.id: TipoEventoInfo(t.id, t.nombre, t.descripcion, t.requiere_aprobacion, t.color_hex)
+        for t in db.query(tipo_evento.TipoEvento).order_by(tipo_evento.TipoEvento.id).all()
+    }
+    categorias = {
+        c.id: CategoriaEspacioInfo(c.id, c.nombre, c.descripcion, c.requiere_aprobacion, c.capacidad_maxima)
+        for c in db.query(categoria_espacio.CategoriaEspacio).order_by(categoria_espacio.CategoriaEspacio.id).all()
+    }
+    return _Snapshot(
+        version=version,
+        estados=estados,
+        tipos_usuario=tipos_usuario,
+        tipos_evento=tipos_evento,
+        categorias=categorias,
+        estados_por_nombre={e.nombre.lower(): e for e in estados.values()},
+    )
+
+
+class CatalogCache:
+    def __init__(self):
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def _get(self, db: Session) -> _Snapshot:
+        version = cache_versions.current_version(db, CATALOG_VERSION)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        # La carga va fuera del lock: dentro de AsyncSession.run_sync la consulta cede
+        # el event loop, y otra petición del mismo hilo que esperase el lock lo bloquearía.
+        # Dos recargas simultáneas consultan dos veces; se queda la de versión más nueva.
+        loaded = _load(db, version)
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version <= loaded.version:
+                snapshot = loaded
+                self._snapshot = snapshot
+                self.reloads += 1
+            return snapshot
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+    # --- Estados de reserva ---
+    def estado(self, db: Session, estado_id: int) -> Optional[EstadoReservaInfo]:
+        return self._get(db).estados.get(estado_id)
+
+    def estado_por_nombre(self, db: Session, nombre: str) -> Optional[EstadoReservaInfo]:
+        return self._get(db).estados_por_nombre.get(nombre.lower())
+
+    def estados(self, db: Session) -> List[EstadoReservaInfo]:
+        return list(self._get(db).estados.values())
+
+    # --- Tipos de usuario ---
+    def tipo_usuario(self, db: Session, tipo_usuario_id: int) -> Optional[TipoUsuarioInfo]:
+        return self._get(db).tipos_usuario.get(tipo_usuario_id)
+
+    def tipos_usuario(self, db: Session) -> List[TipoUsuarioInfo]:
+        return list(self._get(db).tipos_usuario.values())
+
+    # --- Tipos de evento ---
+    def tipo_evento(self, db: Session, tipo_evento_id: int) -> Optional[TipoEventoInfo]:
+        return self._get(db).tipos_evento.get(tipo_evento_id)
+
+    def tipos_evento(self, db: Session) -> List[TipoEventoInfo]:
+        return list(self._get(db).tipos_evento.values())
+
+    # --- Categorías de espacio ---
+    def categoria(self, db: Session, categoria_id: int) -> Optional[CategoriaEspacioInfo]:
+        return self._get(db).categorias.get(categoria_id)
+
+    def categorias(self, db: Session) -> List[CategoriaEspacioInfo]:
+        return list(self._get(db).categorias.values())
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "reloads": self.reloads,
+            "estados": len(snapshot.estados) if snapshot else 0,
+            "tipos_usuario": len(snapshot.tipos_usuario) if snapshot else 0,
+            "tipos_evento": len(snapshot.tipos_evento) if snapshot else 0,
+            "categorias": len(snapshot.categorias) if snapshot else 0,
+        }
+
+
+catalog = CatalogCache()
+
+
+def invalidate_catalog(db: Session) -> None:
+    """Marca el catálogo como modificado; llamar antes del commit del cambio."""
+    cache_versions.bump_version(db, CATALOG_VERSION)
+    catalog.clear()
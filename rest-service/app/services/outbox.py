@@ -0,0 +1,226 @@
+"""Outbox transaccional para los webhooks hacia el servicio WebSocket.
+
+Los endpoints no llaman al servicio WebSocket: `enqueue_webhook` añade una
+fila a `webhook_outbox` en la transacción del propio cambio, así que el evento
+existe si y solo si el cambio se confirmó. Un hilo dispatcher por worker drena
+la tabla por lotes: los reclama con `FOR UPDATE SKIP LOCKED` (varios workers se
+reparten las filas sin enviarlas dos veces), los envía fuera de la transacción y
+reintenta los fallos con backoff exponencial.
+La latencia de las peticiones ya no depende del servicio WebSocket.
+"""
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, event, func, insert
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.webhook_outbox import WebhookOutbox
+from ..utils.circuit_breaker import CircuitOpen
+from ..utils.metrics import WEBHOOKS_EMITIDOS, WEBHOOKS_FALLIDOS
+from .webhook_client import EnvioAplazado, Evento, webhook_client
+
+logger = logging.getLogger(__name__)
+
+PENDIENTE = "pendiente"
+ENVIADO = "enviado"
+FALLIDO = "fallido"
+
+# cada cuántas vueltas del dispatcher se borran los enviados antiguos
+_PURGE_EVERY = 600
+
+_wake = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_stats = {"batches": 0, "delivered": 0, "retried": 0, "dead": 0, "deferred": 0, "purged": 0}
+
+
+def enqueue_webhook(db: Session, evento: str, payload: dict) -> None:
+    """Añade el evento a la transacción del llamador; se envía cuando esta se confirma."""
+    db.add(WebhookOutbox(evento=evento, payload=payload, proximo_intento=datetime.utcnow()))
+    # despertar al dispatcher de este worker en cuanto haya commit en lugar de esperar al sondeo
+    event.listen(db, "after_commit", lambda session: _wake.set(), once=True)
+
+
+def enqueue_webhooks(db: Session, evento: str, payloads: List[dict]) -> None:
+    """Como `enqueue_webhook` para muchos eventos del mismo tipo, en un solo INSERT."""
+    if not payloads:
+        return
+    ahora = datetime.utcnow()
+    db.execute(insert(WebhookOutbox), [{"evento": evento, "payload": p, "proximo_intento": ahora} for p in payloads])
+    event.listen(db, "after_commit", lambda session: _wake.set(), once=True)
+
+
+def backoff_seconds(intentos: int) -> float:
+    """Espera antes del siguiente intento: base * 2^(intentos-1) con tope y jitter (50-100 %)."""
+    delay = min(
+        settings.OUTBOX_BACKOFF_MAX_SECONDS,
+        settings.OUTBOX_BACKOFF_BASE_SECONDS * (2 ** max(intentos - 1, 0)),
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _claim(limite: int) -> List[Evento]:
+    """Reclama un lote de eventos vencidos en una transacción corta.
+
+    Las filas se aplazan `OUTBOX_CLAIM_SECONDS` antes del commit: otros workers
+    no las ven mientras este las envía y, si el worker cae a mitad de envío,
+    vuelven a estar pendientes pasado ese tiempo (el receptor descarta
+    duplicados por id).
+    """
+    db = SessionLocal()
+    try:
+        ahora = datetime.utcnow()
+        rows = (
+            db.query(WebhookOutbox)
+            .filter(WebhookOutbox.estado == PENDIENTE, WebhookOutbox.proximo_intento <= ahora)
+            .order_by(WebhookOutbox.proximo_intento, WebhookOutbox.id)
+            .limit(limite)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        eventos = [(row.id, row.evento, row.payload) for row in rows]
+        for row in rows:
+            row.proximo_intento = ahora + timedelta(seconds=settings.OUTBOX_CLAIM_SECONDS)
+        db.commit()
+        return eventos
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _record(resultados: Dict[int, Optional[Exception]]) -> None:
+    """Guarda el resultado de cada envío (segunda transacción corta)."""
+    db = SessionLocal()
+    try:
+        rows = db.query(WebhookOutbox).filter(WebhookOutbox.id.in_(list(resultados))).all()
+        proximos = {}
+        # por id: el evento anterior de una reserva se registra antes que sus aplazados
+        for row in sorted(rows, key=lambda r: r.id):
+            e = resultados.get(row.id)
+            if isinstance(e, CircuitOpen):
+                # no se llegó a intentar: esperar a que el circuito admita una prueba
+                row.proximo_intento = datetime.utcnow() + timedelta(seconds=e.retry_after)
+                _stats["deferred"] += 1
+                continue
+            if isinstance(e, EnvioAplazado):
+                # tampoco se intentó; si espera a otro evento, no sale antes que él
+                row.proximo_intento = proximos.get(e.tras) or datetime.utcnow()
+                proximos[row.id] = row.proximo_intento
+                _stats["deferred"] += 1
+                continue
+            row.intentos += 1
+            if e is not None:
+                WEBHOOKS_FALLIDOS.labels(row.evento).inc()
+                row.ultimo_error = str(e)[:1000]
+                if row.intentos >= settings.OUTBOX_MAX_ATTEMPTS:
+                    row.estado = FALLIDO
+                    _stats["dead"] += 1
+                    logger.error("webhook %s (outbox %s) descartado tras %s intentos: %s", row.evento, row.id, row.intentos, e)
+                else:
+                    row.proximo_intento = datetime.utcnow() + timedelta(seconds=backoff_seconds(row.intentos))
+                    proximos[row.id] = row.proximo_intento
+                    _stats["retried"] += 1
+            else:
+                WEBHOOKS_EMITIDOS.labels(row.evento).inc()
+                row.estado = ENVIADO
+                row.enviado_en = datetime.utcnow()
+                _stats["delivered"] += 1
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def drain_once(deliver_batch: Optional[Callable[[List[Evento]], Dict[int, Optional[Exception]]]] = None) -> int:
+    """Envía un lote de eventos vencidos; devuelve cuántos se procesaron.
+
+    Reclamar, enviar y registrar van por separado: ninguna transacción ni lock
+    de fila queda abierto mientras se espera al servicio WebSocket.
+    """
+    deliver_batch = deliver_batch or webhook_client.deliver_batch
+    eventos = _claim(settings.OUTBOX_BATCH_SIZE)
+    if not eventos:
+        return 0
+    resultados = deliver_batch(eventos)
+    _record({ev[0]: resultados.get(ev[0]) for ev in eventos})
+    _stats["batches"] += 1
+    return len(eventos)
+
+
+def purge_sent() -> int:
+    db = SessionLocal()
+    try:
+        limite = datetime.utcnow() - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+        result = db.execute(
+            delete(WebhookOutbox).where(WebhookOutbox.estado == ENVIADO, WebhookOutbox.enviado_en < limite)
+        )
+        db.commit()
+        _stats["purged"] += result.rowcount or 0
+        return result.rowcount or 0
+    finally:
+        db.close()
+
+
+def _run() -> None:
+    vueltas = 0
+    while not _stop.is_set():
+        try:
+            procesados = drain_once()
+            vueltas += 1
+            if vueltas % _PURGE_EVERY == 0:
+                purge_sent()
+        except Exception:
+            logger.exception("error drenando webhook_outbox")
+            procesados = 0
+        if procesados < settings.OUTBOX_BATCH_SIZE:
+            # lote incompleto: no queda nada vencido, esperar al sondeo o a un commit local
+            if _wake.wait(settings.OUTBOX_POLL_SECONDS):
+                # ventana corta para que los eventos de un mismo cambio salgan en un solo lote
+                _stop.wait(settings.WEBHOOK_FLUSH_WINDOW_MS / 1000)
+            _wake.clear()
+
+
+def start_dispatcher() -> None:
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="webhook-outbox", daemon=True)
+    _thread.start()
+
+
+def stop_dispatcher(timeout: float = 5) -> None:
+    global _thread
+    _stop.set()
+    _wake.set()
+    if _thread is not None:
+        _thread.join(timeout)
+        _thread = None
+    webhook_client.close()
+
+
+def stats(db: Session) -> dict:
+    por_estado = dict(
+        db.query(WebhookOutbox.estado, func.count(WebhookOutbox.id)).group_by(WebhookOutbox.estado).all()
+    )
+    mas_antiguo = (
+        db.query(func.min(WebhookOutbox.creado_en)).filter(WebhookOutbox.estado == PENDIENTE).scalar()
+    )
+    return {
+        "dispatcher_activo": _thread is not None and _thread.is_alive(),
+        "pendientes": por_estado.get(PENDIENTE, 0),
+        "enviados": por_estado.get(ENVIADO, 0),
+        "fallidos": por_estado.get(FALLIDO, 0),
+        "pendiente_mas_antiguo": mas_antiguo.isoformat() if mas_antiguo else None,
+        **_stats,
+        "cliente": webhook_client.stats(),
+    }
@@ -0,0 +1,132 @@
+"""Hash y verificación de contraseñas en un pool de procesos acotado.
+
+pbkdf2 es CPU pura: en el threadpool compartido de AnyIO una ráfaga de logins
+retiene el GIL y deja sin hilos al resto de endpoints. Aquí el cálculo corre en
+`PASSWORD_HASH_WORKERS` procesos y como mucho `PASSWORD_HASH_MAX_PENDING`
+operaciones pueden estar en vuelo; por encima se responde 503 con
+`Retry-After` en lugar de encolar sin límite. Con `PASSWORD_HASH_WORKERS = 0`
+se calcula en el propio hilo (desarrollo y tests).
+
+Login y registro siguen siendo endpoints sync: el hilo del threadpool que los
+atiende queda esperando el resultado (sin GIL, hasta
+`PASSWORD_HASH_TIMEOUT_SECONDS`). El límite de operaciones en vuelo acota
+también cuántos hilos pueden quedar así.
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from ..config import settings
+from ..utils import password_handler
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, settings.PASSWORD_HASH_MAX_PENDING))
+
+_stats_lock = threading.Lock()
+_stats = {"in_flight": 0, "completed": 0, "rejected": 0, "timeouts": 0, "rehashed": 0, "total_seconds": 0.0}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn: el proceso del servidor tiene hilos y fork no es seguro con ellos
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+def _bump(key: str, amount=1) -> None:
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def _release(future=None) -> None:
+    _bump("in_flight", -1)
+    _slots.release()
+
+
+def _busy(key: str) -> HTTPException:
+    _bump(key)
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servidor ocupado, intenta de nuevo en unos segundos",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise _busy("rejected")
+    _bump("in_flight")
+    started = time.perf_counter()
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        try:
+            result = fn(*args)
+        finally:
+            _release()
+    else:
+        try:
+            future = _get_executor().submit(fn, *args)
+        except Exception:
+            _release()
+            raise
+        # el hueco se libera cuando el cálculo termina, no cuando se deja de esperar:
+        # tras un timeout el proceso sigue ocupado con él
+        future.add_done_callback(_release)
+        try:
+            result = future.result(timeout=settings.PASSWORD_HASH_TIMEOUT_SECONDS)
+        except FutureTimeout:
+            future.cancel()
+            raise _busy("timeouts")
+    with _stats_lock:
+        _stats["completed"] += 1
+        _stats["total_seconds"] += time.perf_counter() - started
+    return result
+
+
+def hash_password(password: str) -> str:
+    return _run(password_handler.get_password_hash, password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return _run(password_handler.verify_password, plain_password, hashed_password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verifica y, si el hash usa parámetros antiguos, devuelve el re-hash para guardarlo."""
+    ok, new_hash = _run(password_handler.verify_and_update, plain_password, hashed_password)
+    if ok and new_hash:
+        _bump("rehashed")
+    return ok, new_hash
+
+
+def stats() -> dict:
+    with _stats_lock:
+        data = dict(_stats)
+    completed = data.pop("completed")
+    total = data.pop("total_seconds")
+    return {
+        **data,
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+        "queued": max(0, data["in_flight"] - settings.PASSWORD_HASH_WORKERS),
+        "completed": completed,
+        "avg_ms": round(total / completed * 1000, 2) if completed else None,
+    }
+
+
+def shutdown() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
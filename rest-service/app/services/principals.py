@@ -0,0 +1,125 @@
+"""Identidad autenticada cacheada por worker.
+
+`get_current_user` necesita en cada petición el id, el rol y el estado del
+usuario del token; en vez de cargar la fila completa de `usuario` (y después
+`tipo_usuario` de forma perezosa) se guarda un `Principal` pequeño con TTL
+corto. Las entradas se guardan con la versión `principales` de `cache_version`:
+los endpoints que cambian estado, rol, contraseña o borran el usuario llaman a
+`invalidate_principals` antes del commit y todos los workers dejan de usar sus
+copias en cuanto releen la versión (`CACHE_VERSION_CHECK_SECONDS`). La ventana
+de revocación es la misma para lecturas y escrituras: el menor de ese intervalo
+y `PRINCIPAL_CACHE_TTL_SECONDS`.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.usuario import Usuario
+from ..utils.lru_cache import LRUCache
+from . import cache_versions
+from .catalog import catalog
+
+# Versión que cambia con cualquier cambio de estado, rol o token_version de un usuario
+PRINCIPALES_VERSION = "principales"
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    tipo_usuario_id: int
+    nivel_prioridad: Optional[int]
+    estado: str
+    token_version: int = 0
+
+    @property
+    def activo(self) -> bool:
+        return self.estado == "activo"
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    """Rol firmado dentro del JWT; basta para autorizar lecturas sin ir a la base."""
+    id: int
+    tipo_usuario_id: int
+    nivel_prioridad: int
+    permisos_digest: Optional[str]
+    token_version: int
+
+    @property
+    def es_admin(self) -> bool:
+        return self.nivel_prioridad == 1
+
+    @classmethod
+    def from_payload(cls, user_id: int, payload: dict) -> Optional["TokenClaims"]:
+        """None si el token es anterior a los claims de rol."""
+        try:
+            return cls(
+                id=user_id,
+                tipo_usuario_id=int(payload["tipo_usuario_id"]),
+                nivel_prioridad=int(payload["nivel_prioridad"]),
+                permisos_digest=payload.get("permisos_digest"),
+                token_version=int(payload.get("token_version", 0)),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @classmethod
+    def from_principal(cls, principal: Principal) -> "TokenClaims":
+        return cls(
+            id=principal.id,
+            tipo_usuario_id=principal.tipo_usuario_id,
+            nivel_prioridad=principal.nivel_prioridad,
+            permisos_digest=None,
+            token_version=principal.token_version,
+        )
+
+
+principal_cache = LRUCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def get_principal(db: Session, user_id: int, fresh: bool = False) -> Optional[Principal]:
+    """Principal del usuario, o None si no existe. Solo consulta la base en un fallo de caché.
+
+    Con `fresh=True` se lee la base aunque haya copia (y se refresca la caché).
+    """
+    key = (cache_versions.current_version(db, PRINCIPALES_VERSION), user_id)
+    principal = None if fresh else principal_cache.get(key)
+    if principal is not None:
+        return principal
+    row = (
+        db.query(Usuario.id, Usuario.tipo_usuario_id, Usuario.estado, Usuario.token_version)
+        .filter(Usuario.id == user_id)
+        .first()
+    )
+    if row is None:
+        principal_cache.pop(key)
+        return None
+    tipo = catalog.tipo_usuario(db, row.tipo_usuario_id)
+    principal = Principal(
+        id=row.id,
+        tipo_usuario_id=row.tipo_usuario_id,
+        nivel_prioridad=tipo.nivel_prioridad if tipo else None,
+        estado=row.estado,
+        token_version=row.token_version or 0,
+    )
+    principal_cache.set(key, principal)
+    return principal
+
+
+def peek_principal(db: Session, user_id: int) -> Optional[Principal]:
+    """Principal ya cacheado en este worker, sin consultar la tabla de usuarios."""
+    return principal_cache.get((cache_versions.current_version(db, PRINCIPALES_VERSION), user_id))
+
+
+def invalidate_principals(db: Session) -> None:
+    """Descarta los principales cacheados en todos los workers; se publica con el commit del llamador.
+
+    Los cambios de usuario son escasos (acciones de administrador o cambio de
+    contraseña), así que se versiona la caché completa en vez de cada usuario.
+    """
+    cache_versions.bump_version(db, PRINCIPALES_VERSION)
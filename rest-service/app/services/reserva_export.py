@@ -0,0 +1,116 @@
+"""Exportación en streaming del histórico de reservas (NDJSON / CSV).
+
+Las filas se leen con un cursor del lado del servidor (`yield_per`) y se
+escriben en bloques, así que la memoria del worker no depende del número de
+reservas exportadas.
+"""
+import csv
+import io
+import json
+from datetime import date, time
+from typing import Iterator
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import reserva as reserva_model, estado_reserva, espacio, usuario
+
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+COLUMNAS = [
+    "id", "codigo", "usuario_id", "espacio_id", "tipo_evento_id", "estado_id",
+    "fecha", "hora_inicio", "hora_fin", "titulo", "descripcion", "es_bloqueo",
+]
+COLUMNAS_NOMBRES = ["estado", "espacio_codigo", "espacio_nombre", "usuario_nombre", "usuario_email"]
+
+
+def filtrar_reservas(q, usuario_id=None, espacio_id=None, estado_id=None, fecha_desde=None, fecha_hasta=None):
+    """Aplica los filtros comunes de listado/exportación a una consulta sobre Reserva."""
+    Reserva = reserva_model.Reserva
+    if usuario_id:
+        q = q.filter(Reserva.usuario_id == usuario_id)
+    if espacio_id:
+        q = q.filter(Reserva.espacio_id == espacio_id)
+    if estado_id:
+        q = q.filter(Reserva.estado_id == estado_id)
+    if fecha_desde:
+        q = q.filter(Reserva.fecha >= fecha_desde)
+    if fecha_hasta:
+        q = q.filter(Reserva.fecha <= fecha_hasta)
+    return q
+
+
+def _query(db, incluir_nombres: bool, filtros: dict):
+    Reserva = reserva_model.Reserva
+    cols = [getattr(Reserva, c) for c in COLUMNAS]
+    if incluir_nombres:
+        cols += [
+            estado_reserva.EstadoReserva.nombre.label("estado"),
+            espacio.Espacio.codigo.label("espacio_codigo"),
+            espacio.Espacio.nombre.label("espacio_nombre"),
+            (usuario.Usuario.nombre + " " + usuario.Usuario.apellido).label("usuario_nombre"),
+            usuario.Usuario.email.label("usuario_email"),
+        ]
+    q = db.query(*cols)
+    if incluir_nombres:
+        q = (
+            q.outerjoin(estado_reserva.EstadoReserva, estado_reserva.EstadoReserva.id == Reserva.estado_id)
+            .outerjoin(espacio.Espacio, espacio.Espacio.id == Reserva.espacio_id)
+            .outerjoin(usuario.Usuario, usuario.Usuario.id == Reserva.usuario_id)
+        )
+    q = filtrar_reservas(q, **filtros)
+    return q.order_by(Reserva.fecha, Reserva.id).yield_per(settings.EXPORT_BATCH_SIZE)
+
+
+def _valor(v):
+    # mismo formato que el listado: fechas ISO y horas HH:MM
+    if isinstance(v, time):
+        return v.strftime("%H:%M")
+    if isinstance(v, date):
+        return v.isoformat()
+    return v
+
+
+def _filas(incluir_nombres: bool, filtros: dict) -> Iterator[list]:
+    """Bloques de filas ya serializables; abre su propia sesión porque corre tras devolver la respuesta."""
+    nombres = COLUMNAS + (COLUMNAS_NOMBRES if incluir_nombres else [])
+    db = SessionLocal()
+    try:
+        bloque = []
+        for row in _query(db, incluir_nombres, filtros):
+            bloque.append([_valor(v) for v in row])
+            if len(bloque) >= settings.EXPORT_BATCH_SIZE:
+                yield nombres, bloque
+                bloque = []
+        if bloque:
+            yield nombres, bloque
+    finally:
+        db.close()
+
+
+def stream_ndjson(incluir_nombres: bool, filtros: dict) -> Iterator[str]:
+    for nombres, bloque in _filas(incluir_nombres, filtros):
+        yield "".join(
+            json.dumps(dict(zip(nombres, fila)), ensure_ascii=False, separators=(",", ":")) + "\n"
+            for fila in bloque
+        )
+
+
+def stream_csv(incluir_nombres: bool, filtros: dict) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNAS + (COLUMNAS_NOMBRES if incluir_nombres else []))
+    yield buf.getvalue()
+    for _, bloque in _filas(incluir_nombres, filtros):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(bloque)
+        yield buf.getvalue()
+
+
+def stream_export(formato: str, incluir_nombres: bool, filtros: dict) -> Iterator[str]:
+    if formato == "csv":
+        return stream_csv(incluir_nombres, filtros)
+    return stream_ndjson(incluir_nombres, filtros)
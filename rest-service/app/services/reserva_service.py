@@ -0,0 +1,81 @@
+"""Alta de reservas.
+
+`create_reserva` valida la petición (horario dentro de la jornada del espacio,
+sin solaparse con una reserva Aprobada) y deja la fila en la sesión con un
+flush, sin confirmar: el llamador encola sus eventos y hace un único commit,
+así que reserva y eventos existen juntos o no existen. Si dos peticiones
+concurrentes pasan a la vez la comprobación de solape, la restricción
+`ex_reserva_solape_aprobada` rechaza la segunda en el flush o el commit
+(IntegrityError, ver `utils.db_errors.is_reserva_overlap`).
+"""
+import secrets
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from ..models import espacio as espacio_model, reserva as reserva_model
+from ..schemas.reserva import ReservaCreate
+from .availability import opening_hours
+from .catalog import catalog
+
+
+def _nuevo_codigo(fecha: date) -> str:
+    return f"RES-{fecha:%Y%m%d}-{secrets.token_hex(4).upper()}"
+
+
+def create_reserva(db: Session, usuario_id: int, data: ReservaCreate) -> reserva_model.Reserva:
+    """Crea la reserva (Pendiente, o Aprobada si es un bloqueo) sin hacer commit.
+
+    Lanza ValueError con el motivo si la petición no es válida.
+    """
+    if data.hora_fin <= data.hora_inicio:
+        raise ValueError('hora_fin debe ser posterior a hora_inicio')
+    espacio = db.query(espacio_model.Espacio).filter(espacio_model.Espacio.id == data.espacio_id).first()
+    if espacio is None:
+        raise ValueError('Espacio no encontrado')
+    if espacio.estado != 'activo':
+        raise ValueError('El espacio no está disponible para reservas')
+    if data.tipo_evento_id is not None and catalog.tipo_evento(db, data.tipo_evento_id) is None:
+        raise ValueError('Tipo de evento no encontrado')
+    if data.asistentes_estimada is not None and data.asistentes_estimada > espacio.capacidad_maxima:
+        raise ValueError(f'El espacio admite como mucho {espacio.capacidad_maxima} asistentes')
+    if not any(ini <= data.hora_inicio and data.hora_fin <= fin for ini, fin in opening_hours(db, espacio.id, data.fecha)):
+        raise ValueError('El horario está fuera de la jornada del espacio')
+
+    # las Pendientes pueden solaparse (fila de espera); una Aprobada ocupa el horario
+    Reserva = reserva_model.Reserva
+    aprobada = catalog.estado_por_nombre(db, 'Aprobada')
+    if aprobada is not None:
+        solape = (
+            db.query(Reserva.id)
+            .filter(
+                Reserva.espacio_id == espacio.id,
+                Reserva.fecha == data.fecha,
+                Reserva.estado_id == aprobada.id,
+                Reserva.hora_inicio < data.hora_fin,
+                Reserva.hora_fin > data.hora_inicio,
+            )
+            .first()
+        )
+        if solape is not None:
+            raise ValueError('El espacio ya tiene una reserva aprobada en ese horario')
+
+    estado = aprobada if data.es_bloqueo else catalog.estado_por_nombre(db, 'Pendiente')
+    reserva = Reserva(
+        codigo=_nuevo_codigo(data.fecha),
+        usuario_id=usuario_id,
+        espacio_id=espacio.id,
+        tipo_evento_id=data.tipo_evento_id,
+        estado_id=estado.id if estado else None,
+        fecha=data.fecha,
+        hora_inicio=data.hora_inicio,
+        hora_fin=data.hora_fin,
+        titulo=data.titulo,
+        descripcion=data.descripcion,
+        es_bloqueo=data.es_bloqueo,
+        motivo_bloqueo=data.motivo_bloqueo,
+        asistentes_estimada=data.asistentes_estimada,
+    )
+    db.add(reserva)
+    db.flush()
+    return reserva
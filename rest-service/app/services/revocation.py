@@ -0,0 +1,158 @@
+"""Lista de revocación de JWT (por claim `jti`) con un filtro de Bloom como vía rápida.
+
+Cada worker mantiene un `BloomFilter` con los jti revocados y aún no
+expirados. `is_revoked` responde "no" sin tocar la base en el caso común; solo
+un probable acierto del filtro se confirma contra `token_revocado` (y el
+resultado se cachea). El filtro se completa de forma incremental cada
+`REVOCATION_REFRESH_SECONDS` y se reconstruye entero, descartando expirados,
+cada `REVOCATION_REBUILD_SECONDS`. Si la recarga falla se sigue con el filtro
+anterior; sin filtro, cada comprobación va a la base (falla cerrado).
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.token_revocado import TokenRevocado
+from ..utils.bloom import BloomFilter
+from ..utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# margen para filas confirmadas con un creado_en anterior a la última lectura
+_WATERMARK_OVERLAP = timedelta(seconds=60)
+
+_lock = threading.Lock()
+_bloom: Optional[BloomFilter] = None
+_watermark: Optional[datetime] = None
+_refreshed_at = 0.0
+_rebuilt_at = 0.0
+_confirmed = LRUCache(maxsize=4096, ttl=settings.REVOCATION_REFRESH_SECONDS)
+_stats = {"checks": 0, "bloom_hits": 0, "db_checks": 0, "revoked": 0, "rebuilds": 0}
+
+
+def _new_bloom(expected: int) -> BloomFilter:
+    capacity = max(settings.REVOCATION_BLOOM_CAPACITY, expected * 2)
+    return BloomFilter(capacity, settings.REVOCATION_BLOOM_ERROR_RATE)
+
+
+def _rebuild(now: float) -> None:
+    global _bloom, _watermark, _rebuilt_at, _refreshed_at
+    db = SessionLocal()
+    try:
+        ahora = datetime.utcnow()
+        # limpieza de paso: una fila expirada ya no puede rechazar ningún token
+        db.execute(delete(TokenRevocado).where(TokenRevocado.expira_en < ahora))
+        db.commit()
+        rows = db.execute(
+            select(TokenRevocado.jti, TokenRevocado.creado_en).where(TokenRevocado.expira_en >= ahora)
+        ).all()
+    finally:
+        db.close()
+    bloom = _new_bloom(len(rows))
+    bloom.update(r.jti for r in rows)
+    _bloom = bloom
+    _watermark = max((r.creado_en for r in rows if r.creado_en), default=None)
+    _rebuilt_at = _refreshed_at = now
+    _stats["rebuilds"] += 1
+
+
+def _refresh(now: float) -> None:
+    global _bloom, _watermark, _refreshed_at
+    db = SessionLocal()
+    try:
+        q = select(TokenRevocado.jti, TokenRevocado.creado_en).where(TokenRevocado.expira_en >= datetime.utcnow())
+        if _watermark is not None:
+            q = q.where(TokenRevocado.creado_en >= _watermark - _WATERMARK_OVERLAP)
+        rows = db.execute(q).all()
+    finally:
+        db.close()
+    for r in rows:
+        _bloom.add(r.jti)
+        if r.creado_en and (_watermark is None or r.creado_en > _watermark):
+            _watermark = r.creado_en
+    _refreshed_at = now
+    if _bloom.count > _bloom.capacity:
+        # demasiadas entradas para la tasa de error objetivo: reconstruir a mayor tamaño
+        _rebuild(now)
+
+
+def _ensure_fresh() -> None:
+    now = time.monotonic()
+    if _bloom is not None and now - _refreshed_at < settings.REVOCATION_REFRESH_SECONDS:
+        return
+    # un solo hilo refresca; los demás siguen con el filtro actual
+    if not _lock.acquire(blocking=_bloom is None):
+        return
+    try:
+        if _bloom is None or now - _rebuilt_at >= settings.REVOCATION_REBUILD_SECONDS:
+            _rebuild(now)
+        elif now - _refreshed_at >= settings.REVOCATION_REFRESH_SECONDS:
+            _refresh(now)
+    except Exception:
+        logger.exception("no se pudo recargar el filtro de tokens revocados")
+    finally:
+        _lock.release()
+
+
+def _in_store(jti: str) -> bool:
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(TokenRevocado.jti).where(
+                TokenRevocado.jti == jti, TokenRevocado.expira_en >= datetime.utcnow()
+            )
+        ).first() is not None
+    finally:
+        db.close()
+
+
+def is_revoked(jti: str) -> bool:
+    _stats["checks"] += 1
+    _ensure_fresh()
+    bloom = _bloom
+    if bloom is not None:
+        if jti not in bloom:
+            return False
+        _stats["bloom_hits"] += 1
+    cached = _confirmed.get(jti)
+    if cached is not None:
+        return cached
+    _stats["db_checks"] += 1
+    revoked = _in_store(jti)
+    _confirmed.set(jti, revoked)
+    return revoked
+
+
+def revoke(db, jti: str, usuario_id: Optional[int], expira_en: datetime) -> None:
+    """Registra el jti en la transacción del llamador y lo marca ya en el filtro de este worker."""
+    db.execute(
+        insert(TokenRevocado)
+        .values(jti=jti, usuario_id=usuario_id, expira_en=expira_en)
+        .on_conflict_do_nothing(index_elements=[TokenRevocado.jti])
+    )
+    _ensure_fresh()
+    with _lock:
+        # sin filtro, la próxima reconstrucción lo leerá de la base
+        if _bloom is not None:
+            _bloom.add(jti)
+    _confirmed.set(jti, True)
+    _stats["revoked"] += 1
+
+
+def stats() -> dict:
+    bloom = _bloom
+    return {
+        **_stats,
+        "entries": bloom.count if bloom else 0,
+        "capacity": bloom.capacity if bloom else 0,
+        "bits": bloom.num_bits if bloom else 0,
+        "hashes": bloom.num_hashes if bloom else 0,
+        "confirmed_cache": _confirmed.stats(),
+    }
@@ -0,0 +1,220 @@
+"""Cliente HTTP de los webhooks hacia el servicio WebSocket.
+
+Un único `httpx.AsyncClient` por worker mantiene las conexiones keep-alive, así
+que los envíos no pagan un handshake cada uno. El dispatcher del outbox entrega
+sus lotes con `deliver_batch`: los eventos se agrupan por destino y cada grupo
+va en un solo POST (`{"eventos": [{"id", "evento", "data"}, ...]}`); el `id` es
+el del outbox y permite al receptor descartar duplicados de un reintento. Cada
+destino tiene su circuit breaker, que deja de intentar mientras el receptor
+está caído en lugar de esperar el timeout en cada lote.
+
+Si el receptor no tiene el endpoint de lotes (404/405), o con
+`WEBHOOK_BATCH_ENABLED=false`, los eventos se envían uno a uno a
+`/api/webhooks/{evento}` sobre las mismas conexiones. Los de una misma reserva
+salen en orden de id, uno tras otro; reservas distintas van en paralelo hasta
+`WEBHOOK_MAX_CONNECTIONS`. Si un evento falla, los siguientes de su reserva no
+se envían en esa vuelta, y lo que no cabe en el plazo del envío tampoco: ambos
+quedan `EnvioAplazado` sin gastar intentos.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from ..config import settings
+from ..utils.circuit_breaker import CircuitBreaker, CircuitOpen
+from ..utils.metrics import WEBHOOK_CIRCUITO_ABIERTO, WEBHOOK_LOTE_DURACION, WEBHOOK_LOTE_EVENTOS
+
+logger = logging.getLogger(__name__)
+
+# (id en webhook_outbox, evento, payload)
+Evento = Tuple[int, str, dict]
+
+# respuestas del endpoint de lotes que indican que el receptor no lo implementa
+_LOTES_NO_SOPORTADOS = (404, 405)
+
+
+class EnvioAplazado(Exception):
+    """El evento no se intentó; vuelve a la cola sin gastar un intento.
+
+    `tras` es el id del evento anterior de la misma reserva que falló: el
+    aplazado no debe salir antes que él.
+    """
+
+    def __init__(self, motivo: str, tras: Optional[int] = None):
+        super().__init__(motivo)
+        self.tras = tras
+
+
+def _agregado(id_: int, data: dict):
+    """Clave de orden del envío individual: la reserva del evento, o el propio evento."""
+    reserva_id = data.get("reserva_id") if isinstance(data, dict) else None
+    return ("reserva", reserva_id) if reserva_id is not None else ("evento", id_)
+
+
+def destination(evento: str) -> str:
+    """URL que recibe el evento; hoy todos van al endpoint de lotes del servicio WebSocket."""
+    return settings.WEBSOCKET_SERVICE_URL.rstrip("/") + settings.WEBHOOK_BATCH_PATH
+
+
+def event_url(evento: str) -> str:
+    """URL del envío individual de un evento (receptores sin endpoint de lotes)."""
+    return settings.WEBSOCKET_SERVICE_URL.rstrip("/") + settings.WEBHOOK_EVENT_PATH.format(evento=evento)
+
+
+def _culpa_del_receptor(error: Optional[Exception]) -> bool:
+    """Errores que cuentan para el circuito: 5xx y fallos de red (un 4xx es culpa del envío)."""
+    if error is None or isinstance(error, (CircuitOpen, EnvioAplazado)):
+        return False
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return True
+
+
+class WebhookClient:
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._sin_lotes: set = set()
+        self._lock = threading.Lock()
+        self._stats = {"lotes": 0, "eventos": 0, "errores": 0, "segundos": 0.0}
+
+    def breaker(self, destino: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(destino)
+            if breaker is None:
+                breaker = CircuitBreaker(settings.WEBHOOK_BREAKER_FAILURES, settings.WEBHOOK_BREAKER_RESET_SECONDS)
+                self._breakers[destino] = breaker
+            return breaker
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=settings.WEBHOOK_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+                ),
+            )
+        return self._client
+
+    def _update_gauge(self) -> None:
+        abiertos = any(b.state == CircuitBreaker.ABIERTO for b in list(self._breakers.values()))
+        WEBHOOK_CIRCUITO_ABIERTO.set(1 if abiertos else 0)
+
+    async def _request(self, url: str, body: dict) -> Optional[Exception]:
+        try:
+            resp = await self._http().post(url, json=body)
+            resp.raise_for_status()
+        except Exception as e:
+            return e
+        return None
+
+    async def _post_individual(self, eventos: List[Evento]) -> Dict[int, Optional[Exception]]:
+        # la mitad del aplazamiento del claim: el resto queda para registrar los
+        # resultados antes de que otro worker pueda volver a reclamar las filas
+        plazo = time.monotonic() + settings.OUTBOX_CLAIM_SECONDS / 2
+        slots = asyncio.Semaphore(settings.WEBHOOK_MAX_CONNECTIONS)
+        resultados: Dict[int, Optional[Exception]] = {}
+
+        async def enviar_en_orden(grupo: List[Evento]) -> None:
+            async with slots:
+                fallido = None
+                for id_, evento, data in grupo:
+                    restante = plazo - time.monotonic()
+                    if fallido is not None:
+                        resultados[id_] = EnvioAplazado("espera a un evento anterior de la misma reserva", tras=fallido)
+                    elif restante <= 0:
+                        resultados[id_] = EnvioAplazado("plazo de envío agotado")
+                    else:
+                        try:
+                            resultados[id_] = await asyncio.wait_for(self._request(event_url(evento), data), restante)
+                        except asyncio.TimeoutError:
+                            resultados[id_] = EnvioAplazado("plazo de envío agotado")
+                        if resultados[id_] is not None:
+                            fallido = id_
+
+        grupos: Dict[tuple, List[Evento]] = {}
+        for ev in sorted(eventos, key=lambda ev: ev[0]):
+            grupos.setdefault(_agregado(ev[0], ev[2]), []).append(ev)
+        await asyncio.gather(*(enviar_en_orden(grupo) for grupo in grupos.values()))
+        return resultados
+
+    async def _post(self, destino: str, eventos: List[Evento]) -> Dict[int, Optional[Exception]]:
+        breaker = self.breaker(destino)
+        try:
+            breaker.before_call()
+        except CircuitOpen as e:
+            return {ev[0]: e for ev in eventos}
+        started = time.perf_counter()
+        if destino in self._sin_lotes or not settings.WEBHOOK_BATCH_ENABLED:
+            resultados = await self._post_individual(eventos)
+        else:
+            body = {"eventos": [{"id": id_, "evento": evento, "data": data} for id_, evento, data in eventos]}
+            error = await self._request(destino, body)
+            if isinstance(error, httpx.HTTPStatusError) and error.response.status_code in _LOTES_NO_SOPORTADOS:
+                logger.warning("%s respondió %s: se envían los webhooks uno a uno", destino, error.response.status_code)
+                self._sin_lotes.add(destino)
+                resultados = await self._post_individual(eventos)
+            else:
+                resultados = {ev[0]: error for ev in eventos}
+        errores = [e for e in resultados.values() if e is not None]
+        if any(_culpa_del_receptor(e) for e in errores):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        elapsed = time.perf_counter() - started
+        WEBHOOK_LOTE_DURACION.labels("error" if errores else "ok").observe(elapsed)
+        WEBHOOK_LOTE_EVENTOS.observe(len(eventos))
+        self._update_gauge()
+        self._stats["lotes"] += 1
+        self._stats["eventos"] += len(eventos)
+        self._stats["segundos"] += elapsed
+        if errores:
+            self._stats["errores"] += 1
+        return resultados
+
+    async def send(self, eventos: Iterable[Evento]) -> Dict[int, Optional[Exception]]:
+        """Envía los eventos agrupados por destino; devuelve el error (o None) de cada id."""
+        por_destino: Dict[str, List[Evento]] = {}
+        for ev in eventos:
+            por_destino.setdefault(destination(ev[1]), []).append(ev)
+        resultados: Dict[int, Optional[Exception]] = {}
+        for parcial in await asyncio.gather(*(self._post(d, evs) for d, evs in por_destino.items())):
+            resultados.update(parcial)
+        return resultados
+
+    def deliver_batch(self, eventos: Iterable[Evento]) -> Dict[int, Optional[Exception]]:
+        """Versión sync para el hilo del dispatcher, sobre un event loop propio y persistente."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(self.send(eventos))
+
+    def close(self) -> None:
+        """Cierra las conexiones; llamar cuando el dispatcher ya se detuvo."""
+        if self._loop is None:
+            return
+        if self._client is not None:
+            self._loop.run_until_complete(self._client.aclose())
+        self._loop.close()
+        self._loop = None
+        self._client = None
+
+    def stats(self) -> dict:
+        lotes = self._stats["lotes"]
+        return {
+            "lotes": lotes,
+            "eventos": self._stats["eventos"],
+            "errores": self._stats["errores"],
+            "eventos_por_lote": round(self._stats["eventos"] / lotes, 2) if lotes else 0,
+            "avg_ms": round(self._stats["segundos"] * 1000 / lotes, 2) if lotes else 0,
+            "circuitos": {d: b.stats() for d, b in list(self._breakers.items())},
+            "sin_lotes": sorted(self._sin_lotes),
+        }
+
+
+webhook_client = WebhookClient()
@@ -0,0 +1,84 @@
+import threading
+import time
+from typing import Callable, Optional
+
+
+class CircuitOpen(Exception):
+    """El circuito está abierto: no se intenta la llamada hasta dentro de `retry_after` segundos."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("circuito abierto")
+        self.retry_after = max(retry_after, 0.0)
+
+
+class CircuitBreaker:
+    """Circuit breaker de tres estados (cerrado, abierto, semiabierto).
+
+    Tras `failure_threshold` fallos seguidos se abre y rechaza las llamadas
+    durante `reset_seconds`; pasado ese tiempo deja pasar una sola llamada de
+    prueba: si sale bien se cierra, si falla vuelve a abrirse.
+    """
+
+    CERRADO = "cerrado"
+    ABIERTO = "abierto"
+    SEMIABIERTO = "semiabierto"
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CERRADO
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.ABIERTO and self._clock() - self._opened_at >= self.reset_seconds:
+            self._state = self.SEMIABIERTO
+            self._probe_in_flight = False
+        return self._state
+
+    def before_call(self) -> None:
+        """Lanza `CircuitOpen` si la llamada no debe intentarse."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CERRADO:
+                return
+            if state == self.SEMIABIERTO and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+            raise CircuitOpen(self._opened_at + self.reset_seconds - self._clock())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CERRADO
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.SEMIABIERTO or self._failures >= self.failure_threshold:
+                if self._state != self.ABIERTO:
+                    self.opened += 1
+                self._state = self.ABIERTO
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "estado": self._current_state(),
+                "fallos_seguidos": self._failures,
+                "aperturas": self.opened,
+                "rechazadas": self.rejected,
+            }
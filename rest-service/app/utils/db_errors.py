@@ -0,0 +1,13 @@
+from sqlalchemy.exc import IntegrityError
+
+# SQLSTATE exclusion_violation y nombre de la restricción declarada en app.models.reserva (migración 0003)
+EXCLUSION_VIOLATION = "23P01"
+RESERVA_SOLAPE_CONSTRAINT = "ex_reserva_solape_aprobada"
+
+
+def is_reserva_overlap(exc: IntegrityError) -> bool:
+    """True si el IntegrityError viene de la exclusión GiST de reservas aprobadas solapadas."""
+    orig = getattr(exc, "orig", None)
+    if getattr(orig, "pgcode", None) == EXCLUSION_VIOLATION:
+        return True
+    return RESERVA_SOLAPE_CONSTRAINT in str(orig)
@@ -0,0 +1,111 @@
+"""Pool de conexiones instrumentado.
+
+`InstrumentedQueuePool` mide cuánto espera cada checkout por una conexión (y
+cuántos agotan `pool_timeout`); los eventos de pool cuentan checkouts,
+conexiones nuevas, invalidaciones y el uso de overflow. Los contadores son por
+proceso: cada worker de uvicorn tiene su propio pool.
+"""
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.soft_invalidations = 0
+            self.timeouts = 0
+            self.overflow_checkouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.waits = 0
+            self.peak_checked_out = 0
+            self.peak_overflow = 0
+
+    def record_wait(self, seconds: float, checked_out: int, overflow: int) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            if overflow > 0:
+                self.overflow_checkouts += 1
+                self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def record_timeout(self, seconds: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+                "timeouts": self.timeouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": self.peak_overflow,
+                "wait_avg_ms": round(self.wait_total / self.waits * 1000, 3) if self.waits else None,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+
+pool_metrics = PoolMetrics()
+_local = threading.local()
+
+
+class InstrumentedQueuePool(QueuePool):
+    def _do_get(self):
+        # QueuePool._do_get se llama a sí mismo al reintentar; medir solo la llamada externa
+        if getattr(_local, "inside", False):
+            return super()._do_get()
+        _local.inside = True
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout(time.perf_counter() - started)
+            raise
+        finally:
+            _local.inside = False
+        pool_metrics.record_wait(time.perf_counter() - started, self.checkedout(), self.overflow())
+        return record
+
+
+def instrument(engine) -> None:
+    """Registra los eventos de pool del engine en `pool_metrics`."""
+    event.listen(engine, "checkout", lambda *args: pool_metrics.incr("checkouts"))
+    event.listen(engine, "checkin", lambda *args: pool_metrics.incr("checkins"))
+    event.listen(engine, "connect", lambda *args: pool_metrics.incr("connects"))
+    event.listen(engine, "invalidate", lambda *args: pool_metrics.incr("invalidations"))
+    event.listen(engine, "soft_invalidate", lambda *args: pool_metrics.incr("soft_invalidations"))
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size() if hasattr(pool, "size") else None,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+    }
@@ -0,0 +1,107 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Debouncer:
+    """Agrupa avisos por clave y ejecuta `callback(clave)` una sola vez por ráfaga.
+
+    La llamada se hace cuando pasan `window` segundos sin avisos nuevos para esa
+    clave, o como mucho `max_wait` segundos después del primero de la ráfaga
+    (para que un flujo continuo no la aplace indefinidamente). Los callbacks
+    corren en un hilo propio, fuera de las peticiones.
+    """
+
+    def __init__(self, callback: Callable[[Hashable], None], window: float, max_wait: float,
+                 name: str = "debouncer", clock: Callable[[], float] = time.monotonic):
+        self.callback = callback
+        self.window = window
+        self.max_wait = max(max_wait, window)
+        self.name = name
+        self._clock = clock
+        # clave -> (primer aviso, último aviso)
+        self._pending: Dict[Hashable, Tuple[float, float]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.scheduled = 0
+        self.fired = 0
+        self.errors = 0
+
+    def schedule(self, key: Hashable) -> None:
+        with self._cond:
+            now = self._clock()
+            first = self._pending.get(key, (now, now))[0]
+            self._pending[key] = (first, now)
+            self.scheduled += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _take_due(self, now: float) -> Tuple[List[Hashable], Optional[float]]:
+        due, next_at = [], None
+        for key, (first, last) in self._pending.items():
+            at = min(last + self.window, first + self.max_wait)
+            if at <= now:
+                due.append(key)
+            elif next_at is None or at < next_at:
+                next_at = at
+        for key in due:
+            del self._pending[key]
+        return due, next_at
+
+    def _fire(self, key: Hashable) -> None:
+        try:
+            self.callback(key)
+            self.fired += 1
+        except Exception:
+            self.errors += 1
+            logger.exception("%s: error procesando %r", self.name, key)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    due, next_at = self._take_due(self._clock())
+                    if due:
+                        break
+                    self._cond.wait(None if next_at is None else next_at - self._clock())
+            for key in due:
+                self._fire(key)
+
+    def flush(self) -> int:
+        """Ejecuta ya todo lo pendiente sin esperar a la ventana; devuelve cuántas claves."""
+        with self._cond:
+            keys = list(self._pending)
+            self._pending.clear()
+        for key in keys:
+            self._fire(key)
+        return len(keys)
+
+    def stop(self, timeout: float = 5) -> None:
+        """Detiene el hilo y ejecuta lo pendiente (para el apagado del worker)."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "pendientes": pending,
+            "avisos": self.scheduled,
+            "ejecutados": self.fired,
+            "errores": self.errors,
+            "coalescidos": max(self.scheduled - self.fired - self.errors - pending, 0),
+        }
@@ -1,8 +1,10 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from typing import Union
 from ..database import get_db
-from ..models.usuario import Usuario
+from ..services.catalog import catalog
+from ..services.principals import Principal, TokenClaims, get_principal, peek_principal
 from .jwt_handler import decode_access_token
 import logging
 
@@ -11,10 +13,8 @@ logger = logging.getLogger(__name__)
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> Usuario:
+def _decode_credentials(credentials: HTTPAuthorizationCredentials):
+    """Decodifica el token y devuelve (payload, user_id); lanza 401 si no es válido."""
     token = credentials.credentials
     payload = decode_access_token(token)
 
@@ -49,21 +49,97 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials"
         )
+    return payload, user_id
 
-    user = db.query(Usuario).filter(Usuario.id == user_id).first()
+
+def _check_principal(user: Principal, user_id: int, token_version: int) -> Principal:
     if user is None:
         logger.warning("User referenced in token not found (user_id=%s)", user_id)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
-
+    if token_version != user.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked, please log in again",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not user.activo:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is not active"
+        )
     return user
 
-def require_admin(current_user: Usuario = Depends(get_current_user)) -> Usuario:
-    if current_user.tipo_usuario.nivel_prioridad != 1:
+
+def _load_principal(db: Session, user_id: int, token_version: int) -> Principal:
+    user = get_principal(db, user_id)
+    if user is not None and token_version > user.token_version:
+        # el token es más nuevo que la copia en caché (p. ej. cambio hecho en otro worker)
+        user = get_principal(db, user_id, fresh=True)
+    return _check_principal(user, user_id, token_version)
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Identidad del token (cacheada, ver `services.principals`); no carga la fila de usuario."""
+    payload, user_id = _decode_credentials(credentials)
+    return _load_principal(db, user_id, payload.get("token_version", 0))
+
+
+def get_token_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> TokenClaims:
+    """Autorización para endpoints de solo lectura a partir de los claims firmados del token.
+
+    Los tokens sin rol de administrador no consultan la tabla de usuarios: si este
+    worker ya tiene el principal en caché se usa para rechazar tokens revocados o
+    cuentas suspendidas. Un claim de administrador no basta por sí solo (el usuario
+    pudo ser degradado o suspendido): se comprueba contra el principal cacheado,
+    igual que en `get_current_user`, así lecturas y escrituras de administrador
+    comparten la misma ventana de revocación (ver `services.principals`).
+    """
+    payload, user_id = _decode_credentials(credentials)
+    claims = TokenClaims.from_payload(user_id, payload)
+    if claims is None or claims.es_admin:
+        user = _load_principal(db, user_id, payload.get("token_version", 0))
+        return TokenClaims.from_principal(user)
+    cached = peek_principal(db, user_id)
+    if cached is not None and claims.token_version <= cached.token_version:
+        _check_principal(cached, user_id, claims.token_version)
+    return claims
+
+
+def is_admin(db: Session, user: Union[Principal, TokenClaims]) -> bool:
+    """True si el tipo de usuario tiene nivel_prioridad 1 (resuelto desde el catálogo en memoria)."""
+    if isinstance(user, TokenClaims):
+        return user.es_admin
+    tipo = catalog.tipo_usuario(db, user.tipo_usuario_id)
+    return tipo is not None and tipo.es_admin
+
+
+def require_admin(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Principal:
+    if not is_admin(db, current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
         )
     return current_user
+
+
+def require_admin_claims(claims: TokenClaims = Depends(get_token_claims)) -> TokenClaims:
+    """Como `require_admin` para endpoints de solo lectura; el rol ya viene verificado
+    contra el principal por `get_token_claims`."""
+    if not claims.es_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return claims
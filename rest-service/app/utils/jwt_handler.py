@@ -1,12 +1,21 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import json
 import logging
+import time
+import uuid
 from jose import JWTError, jwt
 from ..config import settings
+from ..services import revocation
+from .lru_cache import LRUCache
 
 # Log via the uvicorn.error logger so messages appear in the uvicorn stdout/stderr
 logger = logging.getLogger("uvicorn.error")
 
+# Payloads ya verificados, por sha256 del token (nunca el token en claro como clave)
+decode_cache = LRUCache(maxsize=settings.JWT_DECODE_CACHE_SIZE)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token with an expiration."""
@@ -23,21 +32,57 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    # identificador único del token para poder revocarlo (logout) antes de exp
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+def permisos_digest(permisos: Optional[dict]) -> str:
+    """Huella corta y estable del JSON de permisos de un tipo de usuario."""
+    raw = json.dumps(permisos or {}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def user_claims(user, tipo) -> dict:
+    """Claims de identidad y rol para `create_access_token`.
+
+    `tipo` es la entrada del catálogo (`TipoUsuarioInfo`) del usuario. Van
+    firmados, así que los endpoints de solo lectura pueden autorizar con ellos
+    sin consultar la base; `token_version` permite revocarlos.
+    """
+    return {
+        "sub": user.id,
+        "tipo_usuario_id": user.tipo_usuario_id,
+        "nivel_prioridad": tipo.nivel_prioridad if tipo else None,
+        "permisos_digest": permisos_digest(tipo.permisos if tipo else None),
+        "token_version": user.token_version or 0,
+    }
+
+
 def decode_access_token(token: str):
     """Decode a JWT token and return the payload or None on failure.
 
     This function logs decode errors so the server operator can see why a token
     is rejected (invalid signature, expired, wrong algorithm, etc.).
     """
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
-    except JWTError as e:
-        # Log at WARNING so it is visible in the server output. Avoid logging
-        # the token itself; include the error message only.
-        logger.warning("JWT decode error: %s", str(e))
+    key = hashlib.sha256(token.encode("utf-8")).digest() if settings.JWT_DECODE_CACHE_ENABLED else None
+    payload = decode_cache.get(key) if key is not None else None
+    if payload is None:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError as e:
+            # Log at WARNING so it is visible in the server output. Avoid logging
+            # the token itself; include the error message only.
+            logger.warning("JWT decode error: %s", str(e))
+            return None
+        if key is not None:
+            # la entrada caduca con el propio token; la firma no vuelve a verificarse hasta entonces
+            remaining = payload.get("exp", 0) - time.time()
+            if remaining > 0:
+                decode_cache.set(key, payload, ttl=remaining)
+    jti = payload.get("jti")
+    if jti and revocation.is_revoked(jti):
+        logger.warning("JWT rejected: token revoked (jti=%s)", jti)
         return None
+    return dict(payload)
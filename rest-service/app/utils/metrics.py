@@ -0,0 +1,117 @@
+"""Métricas Prometheus del servicio.
+
+Latencia, peticiones en curso y códigos de estado por plantilla de ruta
+(`/api/reservas/{reserva_id}`, nunca la ruta real, para acotar la
+cardinalidad), más contadores de negocio. Con varios workers de uvicorn hay
+que definir `PROMETHEUS_MULTIPROC_DIR` (directorio vacío y escribible): cada
+proceso escribe sus valores allí y `/metrics` los agrega.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.routing import Match
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+UNMATCHED_ROUTE = "<sin_ruta>"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Peticiones HTTP en curso",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+REQUESTS_TOTAL = Counter(
+    "http_requests_total",
+    "Peticiones HTTP atendidas",
+    ["method", "route", "status"],
+)
+
+RESERVAS_CREADAS = Counter("reservas_creadas_total", "Reservas creadas")
+RESERVAS_APROBADAS = Counter("reservas_aprobadas_total", "Reservas aprobadas")
+WEBHOOKS_EMITIDOS = Counter("webhooks_emitidos_total", "Webhooks enviados al servicio WebSocket", ["evento"])
+WEBHOOKS_FALLIDOS = Counter("webhooks_fallidos_total", "Webhooks que no pudieron enviarse", ["evento"])
+WEBHOOK_LOTE_DURACION = Histogram(
+    "webhook_lote_duracion_seconds",
+    "Duración del POST de un lote de webhooks",
+    ["resultado"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+WEBHOOK_LOTE_EVENTOS = Histogram(
+    "webhook_lote_eventos",
+    "Eventos por lote de webhooks enviado",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+WEBHOOK_CIRCUITO_ABIERTO = Gauge(
+    "webhook_circuito_abierto",
+    "1 mientras el circuito hacia el servicio WebSocket está abierto",
+    multiprocess_mode="livemax",
+)
+
+
+def render_metrics():
+    """(cuerpo, content-type) en formato de texto Prometheus."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+def _route_template(app, scope) -> str:
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """Middleware ASGI puro (no envuelve el cuerpo, así que no afecta a StreamingResponse)."""
+
+    def __init__(self, app, fastapi_app=None):
+        self.app = app
+        self.fastapi_app = fastapi_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        route = _route_template(self.fastapi_app, scope)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+            REQUESTS_TOTAL.labels(method, route, str(status_code)).inc()
+            in_progress.dec()
@@ -0,0 +1,31 @@
+import base64
+import json
+from datetime import date
+from typing import Optional, Tuple
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(fecha: date, id: int) -> str:
+    """Cursor opaco con la clave (fecha, id) de la última fila devuelta."""
+    raw = json.dumps({"f": fecha.isoformat(), "i": id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return date.fromisoformat(data["f"]), int(data["i"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor(str(exc)) from exc
+
+
+def next_cursor(rows, limit: int) -> Optional[str]:
+    """Cursor de la página siguiente, o None si `rows` (pedidas con limit + 1) era la última."""
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(last.fecha, last.id)
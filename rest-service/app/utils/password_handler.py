@@ -1,10 +1,18 @@
 from passlib.context import CryptContext
+from ..config import settings
 
 # Use pbkdf2_sha256 for password hashing to avoid bcrypt native issues and the
 # 72-byte limit. This will be used for new registrations and for verification.
 # Existing bcrypt hashes (if any) will not be recognized after this change —
 # recommend recreating test users if needed.
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# min_rounds = default_rounds hace que los hashes con menos rondas se marquen para
+# re-hash en el siguiente login (ver verify_and_update).
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -13,3 +21,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str):
+    """Devuelve (válida, nuevo_hash); nuevo_hash no es None si los parámetros cambiaron."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
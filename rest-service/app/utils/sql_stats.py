@@ -0,0 +1,150 @@
+"""Instrumentación SQL por petición (opcional, `SQL_INSTRUMENTATION_ENABLED`).
+
+Cuenta sentencias y tiempo de base de datos de cada petición mediante los
+eventos `before/after_cursor_execute` y los devuelve en `Server-Timing`.
+Si la misma forma de sentencia se repite `SQL_N_PLUS_ONE_THRESHOLD` veces o
+más en una petición se registra como probable N+1. `assert_max_queries`
+reutiliza el mismo contador para fijar presupuestos de consultas en los tests.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+
+from ..config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+_IN_LIST = re.compile(r"\(\s*(%\([^)]+\)s|\?|\$\d+)(\s*,\s*(%\([^)]+\)s|\?|\$\d+))*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Forma normalizada: sin espacios repetidos y con las listas IN (...) colapsadas."""
+    return _IN_LIST.sub("(?)", _SPACES.sub(" ", statement).strip())
+
+
+class SQLStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.shapes[shape] += 1
+
+    def repeated(self, threshold: int):
+        """[(forma, veces)] de las sentencias repetidas al menos `threshold` veces."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+_current: ContextVar[Optional[SQLStats]] = ContextVar("sql_stats", default=None)
+_collectors: List[SQLStats] = []
+_collectors_lock = threading.Lock()
+
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("sql_stats_start", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["sql_stats_start"].pop()
+    elapsed = time.perf_counter() - started
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if _collectors:
+        with _collectors_lock:
+            for collector in _collectors:
+                collector.record(statement, elapsed)
+
+
+def _error(context):
+    # una sentencia que falla no llega a after_cursor_execute: descartar su inicio
+    if context.connection is None or context.execution_context is None:
+        return
+    started = context.connection.info.get("sql_stats_start")
+    if started:
+        started.pop()
+
+
+def install(engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before):
+        event.listen(engine, "before_cursor_execute", _before)
+        event.listen(engine, "after_cursor_execute", _after)
+        event.listen(engine, "handle_error", _error)
+
+
+class SQLStatsMiddleware:
+    """Middleware ASGI: abre un `SQLStats` por petición y añade `Server-Timing` a la respuesta."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = SQLStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                timing = (
+                    f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", '
+                    f"app;dur={total_ms:.1f}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode("latin-1"))]
+                repeated = stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD)
+                if repeated:
+                    message["headers"].append((b"x-sql-repeated", str(len(repeated)).encode("latin-1")))
+                    for shape, n in repeated:
+                        logger.warning(
+                            "Posible N+1 en %s %s: %d ejecuciones de %s",
+                            scope["method"], scope["path"], n, shape[:300],
+                        )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+
+
+@contextmanager
+def count_queries(engine=None):
+    """Cuenta las sentencias ejecutadas en el bloque, en cualquier hilo (p. ej. dentro de TestClient)."""
+    if engine is None:
+        from ..database import engine
+    install(engine)
+    stats = SQLStats()
+    with _collectors_lock:
+        _collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        with _collectors_lock:
+            _collectors.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine=None):
+    """Falla si el bloque ejecuta más de `limit` sentencias SQL; el mensaje lista las formas."""
+    with count_queries(engine) as stats:
+        yield stats
+    if stats.count > limit:
+        detalle = "\n".join(f"  {n}x {shape[:200]}" for shape, n in stats.shapes.most_common())
+        raise AssertionError(f"Se esperaban como mucho {limit} consultas y hubo {stats.count}:\n{detalle}")
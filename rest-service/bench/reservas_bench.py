@@ -0,0 +1,193 @@
+"""Benchmark de reservas con entrega de webhooks medida extremo a extremo.
+
+Arranca el receptor local de `bench.webhook_receiver` en `--receiver-port`,
+crea `--n` reservas (`POST /api/reservas`) y luego las aprueba
+(`PATCH /api/reservas/{id}/estado`) con `--concurrency` peticiones en vuelo.
+Informa la latencia de cada endpoint y el retraso de entrega de sus eventos
+(`reserva_creada`, `reserva_actualizada`): el tiempo entre la respuesta de la
+petición y la llegada del evento al receptor.
+
+La API debe estar levantada con `WEBSOCKET_SERVICE_URL` apuntando al receptor:
+
+    WEBSOCKET_SERVICE_URL=http://127.0.0.1:3001 python -m uvicorn app.main:app --port 8000
+    python -m bench.reservas_bench --email admin@example.com --password ... --espacio-id 1 \\
+        --n 500 --concurrency 32 --latency-ms 20 --failure-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from .webhook_receiver import Recorder, start_receiver
+
+# franjas de una hora dentro de la jornada por defecto (08:00-18:00)
+HORAS_POR_DIA = 10
+
+
+def percentiles(valores: List[float]) -> Dict[str, Optional[float]]:
+    if not valores:
+        return {"n": 0, "p50": None, "p95": None, "p99": None, "max": None}
+    orden = sorted(valores)
+
+    def p(q: float) -> float:
+        return round(orden[min(len(orden) - 1, int(q * len(orden)))] * 1000, 2)
+
+    return {"n": len(orden), "p50": p(0.50), "p95": p(0.95), "p99": p(0.99), "max": round(orden[-1] * 1000, 2)}
+
+
+def slot(i: int, inicio: date) -> Tuple[str, str, str]:
+    fecha = inicio + timedelta(days=i // HORAS_POR_DIA)
+    hora = 8 + i % HORAS_POR_DIA
+    return fecha.isoformat(), f"{hora:02d}:00:00", f"{hora + 1:02d}:00:00"
+
+
+async def _run_phase(client: httpx.AsyncClient, concurrency: int, calls) -> Tuple[List[float], Dict[int, float], int, float]:
+    """Ejecuta las corrutinas de `calls` con un límite de concurrencia.
+
+    Cada llamada devuelve (clave, respuesta); se guarda la latencia y el
+    instante de respuesta por clave (para el retraso de entrega).
+    """
+    sem = asyncio.Semaphore(concurrency)
+    latencias: List[float] = []
+    respondido: Dict[int, float] = {}
+    errores = 0
+
+    async def uno(call):
+        nonlocal errores
+        async with sem:
+            started = time.monotonic()
+            try:
+                clave, resp = await call(client)
+            except httpx.HTTPError:
+                errores += 1
+                return
+            terminado = time.monotonic()
+            latencias.append(terminado - started)
+            if resp.status_code >= 400 or clave is None:
+                errores += 1
+                return
+            respondido[clave] = terminado
+
+    started = time.monotonic()
+    await asyncio.gather(*(uno(c) for c in calls))
+    return latencias, respondido, errores, time.monotonic() - started
+
+
+async def _wait_events(recorder: Recorder, esperados: Dict[Tuple[str, int], float], timeout: float) -> Dict[Tuple[str, int], float]:
+    """Espera a que lleguen los eventos esperados (evento, reserva_id); devuelve sus retrasos."""
+    limite = time.monotonic() + timeout
+    retrasos: Dict[Tuple[str, int], float] = {}
+    while True:
+        for r in recorder.snapshot():
+            clave = (r.evento, r.data.get("reserva_id"))
+            if clave in esperados and clave not in retrasos:
+                retrasos[clave] = max(r.recibido_en - esperados[clave], 0.0)
+        if len(retrasos) == len(esperados) or time.monotonic() > limite:
+            return retrasos
+        await asyncio.sleep(0.05)
+
+
+async def run(args) -> dict:
+    receptor = start_receiver(args.receiver_port, args.latency_ms, args.jitter_ms, args.failure_rate)
+    recorder = receptor.recorder
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=30, limits=limits) as client:
+            login = await client.post("/api/auth/login", json={"email": args.email, "password": args.password})
+            login.raise_for_status()
+            client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+            inicio = date.fromisoformat(args.fecha_inicio) if args.fecha_inicio else date.today() + timedelta(days=30)
+
+            def crear(i):
+                fecha, hora_inicio, hora_fin = slot(i, inicio)
+
+                async def call(c):
+                    resp = await c.post("/api/reservas", json={
+                        "espacio_id": args.espacio_id, "fecha": fecha,
+                        "hora_inicio": hora_inicio, "hora_fin": hora_fin, "titulo": f"bench {i}",
+                    })
+                    return (resp.json()["id"] if resp.status_code == 200 else None), resp
+                return call
+
+            lat_crear, creadas, err_crear, dur_crear = await _run_phase(client, args.concurrency, [crear(i) for i in range(args.n)])
+
+            def aprobar(reserva_id):
+                async def call(c):
+                    resp = await c.patch(f"/api/reservas/{reserva_id}/estado", json={"estado_id": args.estado_aprobada})
+                    return reserva_id, resp
+                return call
+
+            lat_aprobar, aprobadas, err_aprobar, dur_aprobar = await _run_phase(client, args.concurrency, [aprobar(rid) for rid in creadas])
+
+            esperados = {("reserva_creada", rid): t for rid, t in creadas.items()}
+            esperados.update({("reserva_actualizada", rid): t for rid, t in aprobadas.items()})
+            retrasos = await _wait_events(recorder, esperados, args.timeout)
+
+            if args.cleanup:
+                def borrar(reserva_id):
+                    async def call(c):
+                        return reserva_id, await c.delete(f"/api/reservas/{reserva_id}")
+                    return call
+
+                await _run_phase(client, args.concurrency, [borrar(rid) for rid in creadas])
+    finally:
+        receptor.stop()
+
+    recibidos = recorder.snapshot()
+    return {
+        "config": {k: getattr(args, k) for k in ("n", "concurrency", "latency_ms", "jitter_ms", "failure_rate")},
+        "post_reserva": {"latencia_ms": percentiles(lat_crear), "errores": err_crear, "req_s": round(len(lat_crear) / dur_crear, 1) if dur_crear else 0},
+        "update_reserva_estado": {"latencia_ms": percentiles(lat_aprobar), "errores": err_aprobar, "req_s": round(len(lat_aprobar) / dur_aprobar, 1) if dur_aprobar else 0},
+        "entrega_ms": {
+            evento: percentiles([v for (ev, _), v in retrasos.items() if ev == evento])
+            for evento in ("reserva_creada", "reserva_actualizada")
+        },
+        "eventos_perdidos": len(esperados) - len(retrasos),
+        "disponibilidad_actualizada": sum(1 for r in recibidos if r.evento == "disponibilidad_actualizada"),
+        "receptor": recorder.stats(),
+    }
+
+
+def _print_report(resultado: dict) -> None:
+    print(f"config: {resultado['config']}")
+    for endpoint in ("post_reserva", "update_reserva_estado"):
+        r = resultado[endpoint]
+        print(f"{endpoint:<24} {r['req_s']:>8} req/s  errores={r['errores']}  latencia(ms)={r['latencia_ms']}")
+    for evento, p in resultado["entrega_ms"].items():
+        print(f"entrega {evento:<20} retraso(ms)={p}")
+    print(f"eventos perdidos: {resultado['eventos_perdidos']}")
+    print(f"disponibilidad_actualizada recibidos: {resultado['disponibilidad_actualizada']}")
+    print(f"receptor: {resultado['receptor']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True, help="usuario administrador (para aprobar)")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--espacio-id", type=int, required=True)
+    parser.add_argument("--n", type=int, default=200, help="reservas a crear y aprobar")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--fecha-inicio", help="primer día (YYYY-MM-DD); por defecto hoy + 30 días")
+    parser.add_argument("--estado-aprobada", type=int, default=2)
+    parser.add_argument("--receiver-port", type=int, default=3001, help="puerto de WEBSOCKET_SERVICE_URL en la API")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--timeout", type=float, default=60, help="espera máxima de eventos tras la carga")
+    parser.add_argument("--cleanup", action="store_true", help="borrar las reservas creadas al terminar")
+    parser.add_argument("--json", action="store_true", help="imprimir el resultado como JSON")
+    args = parser.parse_args()
+    resultado = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+    else:
+        _print_report(resultado)
+
+
+if __name__ == "__main__":
+    main()
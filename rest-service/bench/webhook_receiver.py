@@ -0,0 +1,146 @@
+"""Receptor local que imita los webhooks del servicio WebSocket.
+
+Acepta `POST /api/webhooks/batch` (lotes del dispatcher del outbox) y
+`POST /api/webhooks/{evento}` (envío individual, como el servicio WebSocket real),
+con latencia y fallos inyectables, y anota la hora de llegada de cada evento
+para medir el retraso de entrega. Se puede arrancar dentro de otro proceso
+(`start_receiver`, como hace `bench.reservas_bench`) o suelto:
+
+    python -m bench.webhook_receiver --port 3001 --latency-ms 20 --failure-rate 0.05
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+
+@dataclass
+class Recibido:
+    evento: str
+    data: dict
+    recibido_en: float  # time.monotonic() del proceso del receptor
+    outbox_id: Optional[int] = None
+
+
+@dataclass
+class Recorder:
+    latency_ms: float = 0
+    jitter_ms: float = 0
+    failure_rate: float = 0
+    eventos: List[Recibido] = field(default_factory=list)
+    peticiones: int = 0
+    lotes: int = 0
+    fallos_inyectados: int = 0
+    duplicados: int = 0
+    _vistos: set = field(default_factory=set)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def registrar(self, evento: str, data: dict, outbox_id: Optional[int] = None) -> None:
+        with self._lock:
+            if outbox_id is not None:
+                if outbox_id in self._vistos:
+                    self.duplicados += 1
+                    return
+                self._vistos.add(outbox_id)
+            self.eventos.append(Recibido(evento, data, time.monotonic(), outbox_id))
+
+    def snapshot(self) -> List[Recibido]:
+        with self._lock:
+            return list(self.eventos)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "peticiones": self.peticiones,
+                "lotes": self.lotes,
+                "eventos": len(self.eventos),
+                "duplicados": self.duplicados,
+                "fallos_inyectados": self.fallos_inyectados,
+            }
+
+
+def create_app(recorder: Recorder) -> FastAPI:
+    app = FastAPI(title="webhook-receiver")
+
+    async def _simular() -> Optional[Response]:
+        recorder.peticiones += 1
+        espera = recorder.latency_ms + random.uniform(0, recorder.jitter_ms)
+        if espera > 0:
+            await asyncio.sleep(espera / 1000)
+        if recorder.failure_rate and random.random() < recorder.failure_rate:
+            recorder.fallos_inyectados += 1
+            return Response(status_code=503)
+        return None
+
+    @app.post("/api/webhooks/batch")
+    async def recibir_lote(request: Request):
+        fallo = await _simular()
+        if fallo is not None:
+            return fallo
+        body = await request.json()
+        recorder.lotes += 1
+        for ev in body.get("eventos", []):
+            recorder.registrar(ev.get("evento"), ev.get("data") or {}, ev.get("id"))
+        return {"recibidos": len(body.get("eventos", []))}
+
+    @app.post("/api/webhooks/{evento}")
+    async def recibir_evento(evento: str, request: Request):
+        fallo = await _simular()
+        if fallo is not None:
+            return fallo
+        recorder.registrar(evento, await request.json())
+        return {"recibidos": 1}
+
+    return app
+
+
+class ReceiverThread:
+    """uvicorn en un hilo aparte; `url` queda disponible tras `start()`."""
+
+    def __init__(self, recorder: Recorder, host: str = "127.0.0.1", port: int = 0):
+        self.recorder = recorder
+        self.server = uvicorn.Server(uvicorn.Config(create_app(recorder), host=host, port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self.server.run, name="webhook-receiver", daemon=True)
+        self.url: Optional[str] = None
+
+    def start(self, timeout: float = 10) -> "ReceiverThread":
+        self._thread.start()
+        limite = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > limite or not self._thread.is_alive():
+                raise RuntimeError("el receptor de webhooks no arrancó")
+            time.sleep(0.01)
+        host, port = self.server.servers[0].sockets[0].getsockname()[:2]
+        self.url = f"http://{host}:{port}"
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self._thread.join(5)
+
+
+def start_receiver(port: int = 0, latency_ms: float = 0, jitter_ms: float = 0, failure_rate: float = 0) -> ReceiverThread:
+    recorder = Recorder(latency_ms=latency_ms, jitter_ms=jitter_ms, failure_rate=failure_rate)
+    return ReceiverThread(recorder, port=port).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3001)
+    parser.add_argument("--latency-ms", type=float, default=0, help="latencia fija por petición")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="latencia extra aleatoria (0..jitter)")
+    parser.add_argument("--failure-rate", type=float, default=0, help="fracción de peticiones que responden 503")
+    args = parser.parse_args()
+    recorder = Recorder(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, failure_rate=args.failure_rate)
+    uvicorn.run(create_app(recorder), host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
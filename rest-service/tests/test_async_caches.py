@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.util import await_only
+
+from app.services import availability, cache_versions
+from app.services.catalog import catalog
+
+
+class _YieldingResult:
+    def all(self):
+        return []
+
+
+class _YieldingQuery:
+    """Cada consulta cede el control al event loop, como asyncpg dentro de run_sync."""
+
+    def filter(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def all(self):
+        await_only(asyncio.sleep(0.01))
+        return []
+
+
+class _YieldingDB:
+    def execute(self, *args, **kwargs):
+        await_only(asyncio.sleep(0.01))
+        return _YieldingResult()
+
+    def query(self, *cols):
+        return _YieldingQuery()
+
+
+def _reset_caches():
+    cache_versions._known.clear()
+    catalog.clear()
+    availability._templates_loaded_at = None
+    availability._templates_version = None
+
+
+async def _two_requests(db):
+    # dos peticiones de la ruta async que recargan a la vez el catálogo y las plantillas
+    a, b = AsyncSession(), AsyncSession()
+    return await asyncio.gather(
+        a.run_sync(lambda s: (catalog.estados(db), availability._get_templates(db))),
+        b.run_sync(lambda s: (catalog.estados(db), availability._get_templates(db))),
+    )
+
+
+def test_concurrent_async_reloads_do_not_deadlock():
+    _reset_caches()
+    resultados = []
+    # en un hilo aparte: si un lock se mantuviera durante la consulta, el event loop
+    # quedaría bloqueado y el test fallaría por tiempo en vez de colgarse
+    hilo = threading.Thread(target=lambda: resultados.extend(asyncio.run(_two_requests(_YieldingDB()))), daemon=True)
+    hilo.start()
+    hilo.join(5)
+    try:
+        assert not hilo.is_alive(), "las recargas concurrentes en run_sync se bloquearon"
+        assert resultados == [([], {}), ([], {})]
+        assert catalog.stats()["version"] == 0
+    finally:
+        # no dejar a otros tests un catálogo vacío cacheado
+        _reset_caches()
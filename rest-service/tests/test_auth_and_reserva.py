@@ -5,6 +5,8 @@ from app.database import Base, engine, SessionLocal
 from app.models.tipo_usuario import TipoUsuario
 from app.models.estado_reserva import EstadoReserva
 import app.routes.reservas as reservas_routes
+import app.routes.notificaciones as notificaciones_routes
+from app.services import availability_events
 
 client = TestClient(app)
 
@@ -78,6 +80,15 @@ def _setup_space(admin_headers):
     return espacios[0]["id"]
 
 
+def _capture_events(monkeypatch, emitted):
+    record = lambda db, event, data: emitted.append((event, data))
+    monkeypatch.setattr(reservas_routes, "enqueue_webhook", record)
+    monkeypatch.setattr(availability_events, "enqueue_webhook", record)
+    # solo flush() emite la disponibilidad agrupada, así el test no depende de tiempos
+    monkeypatch.setattr(availability_events.debouncer, "window", 60)
+    monkeypatch.setattr(availability_events.debouncer, "max_wait", 60)
+
+
 def test_create_reserva_happy_path(monkeypatch):
     _register_user("admin.reserva@example.com", "adminpass123", 1, "Admin", "Reserva")
     admin_token = _login("admin.reserva@example.com", "adminpass123")
@@ -90,11 +101,7 @@ def test_create_reserva_happy_path(monkeypatch):
     esp_id = _setup_space(admin_headers)
 
     emitted = []
-    monkeypatch.setattr(
-        reservas_routes,
-        "schedule_emit_webhook",
-        lambda bt, event, data: emitted.append((event, data)),
-    )
+    _capture_events(monkeypatch, emitted)
 
     payload = {
         "espacio_id": esp_id,
@@ -108,6 +115,7 @@ def test_create_reserva_happy_path(monkeypatch):
     data = resp.json()
     assert data["id"]
     assert data["espacio_id"] == esp_id
+    availability_events.debouncer.flush()
     events = [e for e, _ in emitted]
     assert "reserva_creada" in events
     assert "disponibilidad_actualizada" in events
@@ -135,11 +143,7 @@ def test_pending_queue_then_approve_rejects_others(monkeypatch):
     }
 
     emitted = []
-    monkeypatch.setattr(
-        reservas_routes,
-        "schedule_emit_webhook",
-        lambda bt, event, data: emitted.append((event, data)),
-    )
+    _capture_events(monkeypatch, emitted)
 
     r1 = client.post("/api/reservas", json=payload, headers=h1)
     r2 = client.post("/api/reservas", json=payload, headers=h2)
@@ -154,12 +158,76 @@ def test_pending_queue_then_approve_rejects_others(monkeypatch):
     assert detail2.status_code == 200
     assert detail2.json()["estado"].lower() == "rechazada"
 
+    availability_events.debouncer.flush()
     events = [e for e, _ in emitted]
     assert "reserva_actualizada" in events
     assert events.count("reserva_actualizada") >= 2  # aprobada + rechazada
-    assert "disponibilidad_actualizada" in events
+    # dos altas y una aprobación en el mismo espacio/día: un único evento de disponibilidad
+    assert events.count("disponibilidad_actualizada") == 1
+
+
+
+def test_create_reserva_validates_slot():
+    _register_user("admin.slot@example.com", "adminpass123", 1, "Admin", "Slot")
+    admin_headers = {"Authorization": f"Bearer {_login('admin.slot@example.com', 'adminpass123')}"}
+    _register_user("slotuser@example.com", "pass1234", 3, "Slot", "User")
+    headers = {"Authorization": f"Bearer {_login('slotuser@example.com', 'pass1234')}"}
+    esp_id = _setup_space(admin_headers)
+    base = {"espacio_id": esp_id, "fecha": "2025-11-03", "titulo": "Slot"}
+
+    invertida = {**base, "hora_inicio": "11:00:00", "hora_fin": "10:00:00"}
+    assert client.post("/api/reservas", json=invertida, headers=headers).status_code == 400
+    fuera = {**base, "hora_inicio": "19:00:00", "hora_fin": "20:00:00"}
+    assert client.post("/api/reservas", json=fuera, headers=headers).status_code == 400
+    bloqueo = {**base, "hora_inicio": "08:00:00", "hora_fin": "09:00:00", "es_bloqueo": True}
+    assert client.post("/api/reservas", json=bloqueo, headers=headers).status_code == 403
+
+    # un bloqueo del admin queda Aprobado y ocupa el horario para las nuevas reservas
+    assert client.post("/api/reservas", json=bloqueo, headers=admin_headers).json()["estado_id"] == 2
+    solapada = {**base, "hora_inicio": "08:30:00", "hora_fin": "09:30:00"}
+    assert client.post("/api/reservas", json=solapada, headers=headers).status_code == 400
 
 
+def test_rolled_back_reserva_enqueues_no_event(monkeypatch):
+    from datetime import time
+
+    from app.models.reserva import Reserva
+    from app.models.webhook_outbox import WebhookOutbox
+
+    _register_user("admin.rollback@example.com", "adminpass123", 1, "Admin", "Rollback")
+    admin_headers = {"Authorization": f"Bearer {_login('admin.rollback@example.com', 'adminpass123')}"}
+    esp_id = _setup_space(admin_headers)
+    base = {"espacio_id": esp_id, "fecha": "2025-11-04", "titulo": "Rollback"}
+    bloqueo = client.post("/api/reservas", json={**base, "hora_inicio": "10:00:00", "hora_fin": "11:00:00", "es_bloqueo": True}, headers=admin_headers)
+    assert bloqueo.status_code == 200
+
+    # otra petición pasó la comprobación de solape a la vez: su commit choca con la exclusión
+    real = reservas_routes.create_reserva
+
+    def carrera(db, usuario_id, data):
+        r = real(db, usuario_id, data)
+        r.hora_inicio, r.hora_fin, r.estado_id = time(10, 0), time(11, 0), bloqueo.json()["estado_id"]
+        return r
+
+    monkeypatch.setattr(reservas_routes, "create_reserva", carrera)
+
+    def creadas(session):
+        return [o.payload["reserva_id"] for o in session.query(WebhookOutbox).filter(WebhookOutbox.evento == "reserva_creada")]
+
+    session = SessionLocal()
+    try:
+        antes, reservas_antes = creadas(session), session.query(Reserva).count()
+    finally:
+        session.close()
+    resp = client.post("/api/reservas", json={**base, "hora_inicio": "14:00:00", "hora_fin": "15:00:00"}, headers=admin_headers)
+    assert resp.status_code == 409
+    session = SessionLocal()
+    try:
+        assert creadas(session) == antes
+        assert session.query(Reserva).count() == reservas_antes
+    finally:
+        session.close()
+
 def test_disponibilidad_endpoint_reflects_slots():
     _register_user("admin.disp@example.com", "adminpass123", 1, "Admin", "Disp")
     admin_token = _login("admin.disp@example.com", "adminpass123")
@@ -215,3 +283,95 @@ def test_create_and_list_notifications():
     data = l.json()
     assert isinstance(data, list)
     assert any(n["id"] == nid for n in data)
+
+
+def test_notification_fan_out_is_one_insert_per_table(monkeypatch):
+    _register_user("admin.difusion@example.com", "adminpass123", 1, "Admin", "Difusion")
+    admin_headers = {"Authorization": f"Bearer {_login('admin.difusion@example.com', 'adminpass123')}"}
+    ids = [_register_user(f"difusion{i}@example.com", "pass1234", 3, "Dif", str(i))["user"]["id"] for i in range(3)]
+    user_headers = {"Authorization": f"Bearer {_login('difusion0@example.com', 'pass1234')}"}
+
+    emitted = []
+    monkeypatch.setattr(notificaciones_routes, "enqueue_webhooks", lambda db, event, datos: emitted.append((event, datos)))
+
+    body = {"titulo": "Auditorio cerrado", "mensaje": "El viernes no hay servicio", "usuario_ids": ids + [999999]}
+    assert client.post("/api/notificaciones/difusion", json=body, headers=user_headers).status_code == 403
+    assert client.post("/api/notificaciones/difusion", json={**body, "tipo_usuario_id": 3}, headers=admin_headers).status_code == 400
+
+    resp = client.post("/api/notificaciones/difusion", json=body, headers=admin_headers)
+    assert resp.status_code == 200
+    assert resp.json()["enviadas"] == 3
+    # un solo encolado con un evento 'notificacion' por destinatario, el que ya conoce el receptor
+    assert [e for e, _ in emitted] == ["notificacion"]
+    assert sorted(n["usuario_id"] for n in emitted[0][1]) == sorted(ids)
+
+    listado = client.get(f"/api/notificaciones?usuario_id={ids[0]}", headers=user_headers).json()
+    assert any(n["titulo"] == "Auditorio cerrado" for n in listado)
+
+
+def test_catalog_and_espacios_etag_not_modified():
+    _register_user("admin.etag@example.com", "adminpass123", 1, "Admin", "Etag")
+    admin_headers = {"Authorization": f"Bearer {_login('admin.etag@example.com', 'adminpass123')}"}
+    _setup_space(admin_headers)
+
+    first = client.get("/api/espacios")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    cached = client.get("/api/espacios", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    client.post(
+        "/api/espacios",
+        json={"codigo": "ETAG1", "nombre": "Sala ETag", "categoria_id": first.json()[0]["categoria_id"], "capacidad_maxima": 10},
+        headers=admin_headers,
+    )
+    changed = client.get("/api/espacios", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+    tipos = client.get("/api/tipos-evento")
+    assert client.get("/api/tipos-evento", headers={"If-None-Match": tipos.headers["etag"]}).status_code == 304
+
+
+def test_list_reservas_include_and_cursor():
+    # usa las reservas creadas por los tests anteriores del módulo
+    assert client.get("/api/reservas?include=categoria").status_code == 400
+    assert client.get("/api/reservas?cursor=basura").status_code == 400
+
+    page = client.get("/api/reservas?limit=1&include=estado,espacio")
+    rows = page.json()
+    assert len(rows) == 1
+    assert rows[0]["estado"]["nombre"]
+    assert rows[0]["espacio"]["codigo"]
+    # el listado no requiere autenticación: el usuario embebido no lleva email
+    usuario = client.get("/api/reservas?limit=1&include=usuario").json()[0]["usuario"]
+    assert usuario["nombre"] and "email" not in usuario
+    cursor = page.headers.get("x-next-cursor")
+    if cursor:
+        nxt = client.get(f"/api/reservas?limit=1&cursor={cursor}").json()
+        assert nxt and (nxt[0]["fecha"], nxt[0]["id"]) < (rows[0]["fecha"], rows[0]["id"])
+
+
+def test_logout_revokes_token():
+    _register_user("logout@example.com", "pass1234", 3, "Log", "Out")
+    headers = {"Authorization": f"Bearer {_login('logout@example.com', 'pass1234')}"}
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+
+
+def test_query_budgets():
+    from app.utils.sql_stats import assert_max_queries
+
+    esp_id = client.get("/api/espacios").json()[0]["id"]
+    url_lista = "/api/reservas?limit=50&include=estado,espacio,usuario"
+    # primera llamada para calentar catálogo y versiones de caché
+    client.get(url_lista)
+    client.get(f"/api/espacios/{esp_id}")
+
+    # listado + un IN por relación (+ una posible relectura de cache_version), sin importar el nº de filas
+    with assert_max_queries(4):
+        assert client.get(url_lista).status_code == 200
+    with assert_max_queries(3):
+        assert client.get(f"/api/espacios/{esp_id}").status_code == 200
@@ -0,0 +1,61 @@
+from datetime import time
+
+from app.services.availability import _merge, _subtract, _weekday
+
+
+def t(h, m=0):
+    return time(h, m)
+
+
+def test_subtract_sweeps_occupied_over_opening_windows():
+    ventanas = [(t(8), t(12)), (t(14), t(18))]
+    ocupados = [(t(7), t(9)), (t(10), t(10, 30)), (t(10, 15), t(11)), (t(11, 30), t(15)), (t(17), t(19))]
+    assert _subtract(ventanas, ocupados) == [
+        (t(9), t(10)),
+        (t(11), t(11, 30)),
+        (t(15), t(17)),
+    ]
+
+
+def test_subtract_without_occupied_returns_windows():
+    assert _subtract([(t(8), t(18))], []) == [(t(8), t(18))]
+    assert _subtract([], [(t(8), t(9))]) == []
+
+
+def test_merge_and_weekday_normalization():
+    assert _merge([(t(14), t(16)), (t(8), t(12)), (t(11), t(13))]) == [(t(8), t(13)), (t(14), t(16))]
+    assert _weekday("Miércoles") == 2
+    assert _weekday(" SABADO ") == 5
+    assert _weekday("monday") == 0
+    assert _weekday("7") == 6
+    assert _weekday("feriado") is None
+
+
+def test_batch_rejects_more_espacios_than_the_cap():
+    import pytest
+    from datetime import date
+    from app.services.availability import MAX_BATCH_ESPACIOS, calc_availability_batch
+
+    with pytest.raises(ValueError):
+        calc_availability_batch(None, date(2026, 1, 1), date(2026, 1, 1), list(range(MAX_BATCH_ESPACIOS + 1)))
+
+
+def test_cached_availability_follows_the_shared_versions(monkeypatch):
+    from datetime import date
+
+    from app.services import availability, cache_versions
+
+    versions = {"disponibilidad:3": 0, availability.HORARIOS_VERSION: 0}
+    monkeypatch.setattr(cache_versions, "current_version", lambda db, nombre: versions.get(nombre, 0))
+    calculos = []
+    monkeypatch.setattr(availability, "_compute_availability", lambda db, e, f, p: calculos.append(e) or {"n": len(calculos)})
+    availability.availability_cache.clear()
+
+    dia = date(2025, 11, 4)
+    assert availability.calc_availability(None, 3, dia) is availability.calc_availability(None, 3, dia)
+    # otro worker cambió una reserva del espacio, y después sus horarios
+    versions["disponibilidad:3"] += 1
+    assert availability.calc_availability(None, 3, dia) == {"n": 2}
+    versions[availability.HORARIOS_VERSION] += 1
+    assert availability.calc_availability(None, 3, dia) == {"n": 3}
+    assert calculos == [3, 3, 3]
@@ -0,0 +1,18 @@
+from app.utils.bloom import BloomFilter
+
+
+def test_no_false_negatives_and_low_false_positive_rate():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    revocados = [f"jti-{i}" for i in range(5000)]
+    bloom.update(revocados)
+
+    assert all(j in bloom for j in revocados)
+    falsos = sum(f"otro-{i}" in bloom for i in range(20000))
+    assert falsos / 20000 < 0.03
+
+
+def test_sizing_follows_capacity_and_error_rate():
+    small = BloomFilter(capacity=1000, error_rate=0.01)
+    strict = BloomFilter(capacity=1000, error_rate=0.0001)
+    assert strict.num_bits > small.num_bits
+    assert strict.num_hashes > small.num_hashes
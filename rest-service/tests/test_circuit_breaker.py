@@ -0,0 +1,52 @@
+import pytest
+
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpen
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_opens_after_consecutive_failures_and_recovers_after_probe():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=10, clock=clock)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CERRADO
+
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.ABIERTO
+    clock.now = 4
+    with pytest.raises(CircuitOpen) as exc:
+        breaker.before_call()
+    assert exc.value.retry_after == 6
+
+    clock.now = 10
+    breaker.before_call()  # una sola llamada de prueba
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CERRADO
+    assert breaker.stats()["aperturas"] == 1
+
+
+def test_failed_probe_reopens():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=5, clock=clock)
+    breaker.before_call()
+    breaker.record_failure()
+    clock.now = 5
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.ABIERTO
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.utils.db_pool import InstrumentedQueuePool, instrument, pool_metrics, pool_status
+
+
+def test_pool_metrics_count_checkouts_overflow_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    instrument(engine)
+    pool_metrics.reset()
+
+    c1 = engine.connect()
+    c1.execute(text("select 1"))
+    c2 = engine.connect()  # usa el overflow
+    assert pool_status(engine)["checked_out"] == 2
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    c1.close()
+    c2.close()
+
+    stats = pool_metrics.snapshot()
+    assert stats["checkouts"] == 2
+    assert stats["checkins"] == 2
+    assert stats["connects"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["overflow_checkouts"] == 1 and stats["peak_overflow"] == 1
+    assert stats["peak_checked_out"] == 2
+    assert stats["wait_max_ms"] >= 50
+    engine.dispose()
@@ -0,0 +1,47 @@
+import threading
+
+from app.utils.debounce import Debouncer
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_key_is_due_after_quiet_window():
+    clock = _Clock()
+    d = Debouncer(lambda key: None, window=1, max_wait=10, clock=clock)
+    # primer aviso en 0, último en 0.9
+    d._pending[(1, "2026-10-17")] = (0.0, 0.9)
+    clock.now = 1.5
+    assert d._take_due(clock()) == ([], 1.9)
+    clock.now = 1.9
+    assert d._take_due(clock())[0] == [(1, "2026-10-17")]
+
+
+def test_max_wait_bounds_a_continuous_stream():
+    clock = _Clock()
+    d = Debouncer(lambda key: None, window=1, max_wait=3, clock=clock)
+    d._pending["k"] = (0.0, 2.9)
+    clock.now = 3.0
+    assert d._take_due(clock())[0] == ["k"]
+
+
+def test_schedule_coalesces_and_runs_outside_caller():
+    done = threading.Event()
+    fired = []
+
+    def callback(key):
+        fired.append((key, threading.current_thread().name))
+        done.set()
+
+    d = Debouncer(callback, window=0.05, max_wait=1, name="test-debounce")
+    for _ in range(20):
+        d.schedule(("espacio", 1))
+    assert done.wait(2)
+    d.stop()
+    assert fired == [(("espacio", 1), "test-debounce")]
+    assert d.stats()["coalescidos"] == 19
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from app.services import revocation
+from app.utils import jwt_handler
+
+
+def test_decode_is_cached_until_exp(monkeypatch):
+    monkeypatch.setattr(revocation, "is_revoked", lambda jti: False)
+    jwt_handler.decode_cache.clear()
+    calls = []
+    real_decode = jwt_handler.jwt.decode
+    monkeypatch.setattr(jwt_handler.jwt, "decode", lambda *a, **kw: calls.append(1) or real_decode(*a, **kw))
+
+    token = jwt_handler.create_access_token({"sub": 1})
+    first = jwt_handler.decode_access_token(token)
+    first["sub"] = "mutado"
+    second = jwt_handler.decode_access_token(token)
+    assert second["sub"] == "1"
+    assert len(calls) == 1
+
+    expired = jwt_handler.create_access_token({"sub": 1}, expires_delta=timedelta(seconds=-5))
+    assert jwt_handler.decode_access_token(expired) is None
+    assert jwt_handler.decode_access_token(expired) is None
+    assert len(calls) == 3
+
+
+def test_cache_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(revocation, "is_revoked", lambda jti: False)
+    monkeypatch.setattr(jwt_handler.settings, "JWT_DECODE_CACHE_ENABLED", False)
+    jwt_handler.decode_cache.clear()
+    token = jwt_handler.create_access_token({"sub": 2})
+    assert jwt_handler.decode_access_token(token)["sub"] == "2"
+    assert len(jwt_handler.decode_cache) == 0
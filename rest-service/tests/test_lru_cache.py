@@ -0,0 +1,27 @@
+import time
+from app.utils.lru_cache import LRUCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" pasa a ser el más reciente
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_lru_entries_expire_after_ttl():
+    cache = LRUCache(maxsize=4, ttl=0.01)
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    time.sleep(0.02)
+    assert cache.get("k") is None
+    cache.set("k", "v", ttl=60)
+    time.sleep(0.02)
+    assert cache.get("k") == "v"
@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils import metrics
+
+
+def _sample(name, labels):
+    from prometheus_client import REGISTRY
+
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+    app.add_middleware(metrics.PrometheusMiddleware, fastapi_app=app)
+
+    @app.get("/api/cosas/{cosa_id}")
+    def get_cosa(cosa_id: int):
+        return {"id": cosa_id}
+
+    labels = {"method": "GET", "route": "/api/cosas/{cosa_id}", "status": "200"}
+    before = _sample("http_requests_total", labels)
+    client = TestClient(app)
+    assert client.get("/api/cosas/1").status_code == 200
+    assert client.get("/api/cosas/2").status_code == 200
+    assert client.get("/no-existe").status_code == 404
+
+    assert _sample("http_requests_total", labels) == before + 2
+    assert _sample("http_requests_total", {"method": "GET", "route": metrics.UNMATCHED_ROUTE, "status": "404"}) >= 1
+    assert _sample("http_requests_in_progress", {"method": "GET", "route": "/api/cosas/{cosa_id}"}) == 0
+
+    body, content_type = metrics.render_metrics()
+    assert content_type.startswith("text/plain")
+    assert b"http_request_duration_seconds_bucket" in body
@@ -0,0 +1,134 @@
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.config import settings
+from app.services import outbox
+from app.services.webhook_client import EnvioAplazado
+from app.utils.circuit_breaker import CircuitOpen
+
+
+class _FakeQuery:
+    def __init__(self, db):
+        self.db = db
+
+    def filter(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def limit(self, n):
+        return self
+
+    def with_for_update(self, skip_locked=False):
+        self.db.skip_locked = skip_locked
+        return self
+
+    def all(self):
+        return self.db.rows
+
+
+class _FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.commits = 0
+        self.skip_locked = False
+
+    def query(self, *cols):
+        return _FakeQuery(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _row(id, evento, intentos=0):
+    return SimpleNamespace(
+        id=id, evento=evento, payload={"id": id}, estado=outbox.PENDIENTE, intentos=intentos,
+        proximo_intento=datetime.utcnow(), ultimo_error=None, enviado_en=None,
+    )
+
+
+def test_backoff_grows_and_is_capped(monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_BACKOFF_BASE_SECONDS", 2)
+    monkeypatch.setattr(settings, "OUTBOX_BACKOFF_MAX_SECONDS", 60)
+    for intentos, esperado in [(1, 2), (2, 4), (3, 8), (10, 60)]:
+        delay = outbox.backoff_seconds(intentos)
+        assert esperado * 0.5 <= delay <= esperado
+
+
+def test_drain_once_marks_sent_retries_and_gives_up(monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 3)
+    ok, retry, dead = _row(1, "reserva_creada"), _row(2, "notificacion"), _row(3, "notificacion", intentos=2)
+    db = _FakeDB([ok, retry, dead])
+    monkeypatch.setattr(outbox, "SessionLocal", lambda: db)
+
+    def deliver_batch(eventos):
+        return {id_: None if id_ == 1 else RuntimeError("ws caído") for id_, _, _ in eventos}
+
+    assert outbox.drain_once(deliver_batch) == 3
+    # reclamar y registrar en dos transacciones; el envío va entre ambas
+    assert db.skip_locked and db.commits == 2
+    assert ok.estado == outbox.ENVIADO and ok.enviado_en is not None
+    assert retry.estado == outbox.PENDIENTE and retry.intentos == 1
+    assert retry.proximo_intento > datetime.utcnow() and retry.ultimo_error == "ws caído"
+    assert dead.estado == outbox.FALLIDO and dead.intentos == 3
+
+
+def test_claimed_rows_are_committed_before_delivery(monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_CLAIM_SECONDS", 120)
+    row = _row(1, "reserva_creada")
+    db = _FakeDB([row])
+    monkeypatch.setattr(outbox, "SessionLocal", lambda: db)
+    vistos = []
+
+    def deliver_batch(eventos):
+        # durante el envío la fila ya está reclamada y confirmada, sin transacción abierta
+        vistos.append((db.commits, (row.proximo_intento - datetime.utcnow()).total_seconds()))
+        return {id_: None for id_, _, _ in eventos}
+
+    assert outbox.drain_once(deliver_batch) == 1
+    assert vistos[0][0] == 1 and vistos[0][1] > 100
+    assert row.estado == outbox.ENVIADO and db.commits == 2
+
+
+def test_open_circuit_defers_without_spending_attempts(monkeypatch):
+    row = _row(1, "reserva_actualizada", intentos=1)
+    db = _FakeDB([row])
+    monkeypatch.setattr(outbox, "SessionLocal", lambda: db)
+
+    assert outbox.drain_once(lambda eventos: {id_: CircuitOpen(30) for id_, _, _ in eventos}) == 1
+    assert row.estado == outbox.PENDIENTE and row.intentos == 1
+    assert (row.proximo_intento - datetime.utcnow()).total_seconds() > 25
+
+
+
+def test_deferred_events_wait_for_the_failed_one_before_them(monkeypatch):
+    primero, segundo = _row(1, "reserva_creada", intentos=0), _row(2, "reserva_actualizada", intentos=0)
+    db = _FakeDB([segundo, primero])
+    monkeypatch.setattr(outbox, "SessionLocal", lambda: db)
+
+    outbox.drain_once(lambda eventos: {1: RuntimeError("500"), 2: EnvioAplazado("espera", tras=1)})
+    assert primero.intentos == 1 and segundo.intentos == 0
+    assert segundo.estado == outbox.PENDIENTE and segundo.proximo_intento == primero.proximo_intento
+
+
+def test_drain_with_batch_disabled_uses_the_webhook_client(monkeypatch):
+    row = _row(1, "notificacion")
+    db = _FakeDB([row])
+    monkeypatch.setattr(outbox, "SessionLocal", lambda: db)
+    monkeypatch.setattr(settings, "WEBHOOK_BATCH_ENABLED", False)
+    enviados = []
+    monkeypatch.setattr(outbox.webhook_client, "deliver_batch", lambda eventos: enviados.extend(eventos) or {1: None})
+
+    assert outbox.drain_once() == 1
+    assert enviados == [(1, "notificacion", {"id": 1})] and row.estado == outbox.ENVIADO
@@ -0,0 +1,23 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor, next_cursor
+
+
+def test_cursor_roundtrip():
+    token = encode_cursor(date(2025, 3, 1), 42)
+    assert decode_cursor(token) == (date(2025, 3, 1), 42)
+
+
+@pytest.mark.parametrize("token", ["no-es-un-cursor", "", "e30"])
+def test_invalid_cursor(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token)
+
+
+def test_next_cursor_only_when_more_rows():
+    rows = [SimpleNamespace(fecha=date(2025, 3, d), id=d) for d in (3, 2, 1)]
+    assert next_cursor(rows, 3) is None
+    assert decode_cursor(next_cursor(rows, 2)) == (date(2025, 3, 2), 2)
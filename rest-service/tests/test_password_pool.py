@@ -0,0 +1,59 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services import password_pool
+
+
+@pytest.fixture
+def inline(monkeypatch):
+    monkeypatch.setattr(password_pool.settings, "PASSWORD_HASH_WORKERS", 0)
+
+
+def test_hash_and_verify_inline(inline):
+    hashed = password_pool.hash_password("secreto123")
+    assert password_pool.verify_password("secreto123", hashed)
+    assert password_pool.verify_and_update("otra", hashed) == (False, None)
+
+
+def test_rehash_when_rounds_are_below_minimum(inline):
+    from passlib.hash import pbkdf2_sha256
+
+    old = pbkdf2_sha256.using(rounds=1000).hash("secreto123")
+    ok, new_hash = password_pool.verify_and_update("secreto123", old)
+    assert ok and new_hash and new_hash != old
+
+
+def test_rejects_when_no_slots_left(inline, monkeypatch):
+    import threading
+
+    monkeypatch.setattr(password_pool, "_slots", threading.BoundedSemaphore(1))
+    password_pool._slots.acquire()
+    with pytest.raises(HTTPException) as exc:
+        password_pool.hash_password("x")
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"]
+    assert password_pool.stats()["rejected"] >= 1
+
+
+def test_timed_out_hash_keeps_its_slot_until_it_finishes(monkeypatch):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    fin = threading.Event()
+    monkeypatch.setattr(password_pool.settings, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(password_pool.settings, "PASSWORD_HASH_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(password_pool, "_get_executor", lambda: executor)
+    monkeypatch.setattr(password_pool, "_slots", threading.BoundedSemaphore(1))
+    try:
+        with pytest.raises(HTTPException):
+            password_pool._run(fin.wait)
+        # el cálculo sigue en curso: no hay hueco para otro
+        with pytest.raises(HTTPException):
+            password_pool._run(lambda: None)
+        fin.set()
+        executor.shutdown(wait=True)
+        assert password_pool._slots.acquire(blocking=False)
+    finally:
+        fin.set()
+        executor.shutdown(wait=True)
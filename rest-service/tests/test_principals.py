@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+
+import app.services.principals as principals
+from app.services import cache_versions, revocation
+
+
+class _FakeQuery:
+    def __init__(self, db):
+        self.db = db
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        self.db.queries += 1
+        return self.db.row
+
+
+class _FakeDB:
+    def __init__(self, row):
+        self.row = row
+        self.queries = 0
+
+    def query(self, *cols):
+        return _FakeQuery(self)
+
+
+def _version(monkeypatch, version=0):
+    """Fija la versión 'principales' que vería el worker al releer cache_version."""
+    versions = {principals.PRINCIPALES_VERSION: version}
+    monkeypatch.setattr(cache_versions, "current_version", lambda db, nombre: versions[nombre])
+    return versions
+
+
+def test_principal_is_cached_until_invalidated(monkeypatch):
+    monkeypatch.setattr(principals.catalog, "tipo_usuario", lambda db, tid: SimpleNamespace(nivel_prioridad=1))
+    versions = _version(monkeypatch)
+    principals.principal_cache.clear()
+    db = _FakeDB(SimpleNamespace(id=7, tipo_usuario_id=1, estado="activo", token_version=0))
+
+    first = principals.get_principal(db, 7)
+    assert first.activo and first.nivel_prioridad == 1
+    assert principals.get_principal(db, 7) is first
+    assert db.queries == 1
+
+    # otro worker suspendió al usuario e incrementó la versión 'principales'
+    db.row = SimpleNamespace(id=7, tipo_usuario_id=1, estado="suspendido", token_version=1)
+    versions[principals.PRINCIPALES_VERSION] += 1
+    assert not principals.get_principal(db, 7).activo
+    assert db.queries == 2
+
+
+def test_missing_user_is_not_cached(monkeypatch):
+    _version(monkeypatch)
+    principals.principal_cache.clear()
+    db = _FakeDB(None)
+    assert principals.get_principal(db, 99) is None
+    assert principals.get_principal(db, 99) is None
+    assert db.queries == 2
+
+
+def test_token_claims_roundtrip_and_revocation(monkeypatch):
+    import pytest
+    from fastapi import HTTPException
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    from app.utils import dependencies
+    from app.utils.jwt_handler import create_access_token, user_claims
+
+    monkeypatch.setattr(revocation, "is_revoked", lambda jti: False)
+    _version(monkeypatch)
+
+    user = SimpleNamespace(id=5, tipo_usuario_id=3, token_version=2)
+    tipo = SimpleNamespace(nivel_prioridad=3, permisos={"reservas": ["solicitar"]})
+    token = create_access_token(data=user_claims(user, tipo))
+    creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    principals.principal_cache.clear()
+    claims = dependencies.get_token_claims(creds, db=None)
+    assert not claims.es_admin and claims.token_version == 2 and claims.permisos_digest
+
+    # un principal cacheado con una versión posterior revoca el token sin consultar la base
+    principals.principal_cache.set((0, 5), principals.Principal(5, 3, 3, "activo", token_version=3))
+    with pytest.raises(HTTPException) as exc:
+        dependencies.get_token_claims(creds, db=None)
+    assert exc.value.status_code == 401
+
+
+def test_admin_claims_share_the_principal_cache(monkeypatch):
+    import pytest
+    from fastapi import HTTPException
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    from app.utils import dependencies
+    from app.utils.jwt_handler import create_access_token, user_claims
+
+    monkeypatch.setattr(revocation, "is_revoked", lambda jti: False)
+    monkeypatch.setattr(principals.catalog, "tipo_usuario", lambda db, tid: SimpleNamespace(nivel_prioridad=1))
+    versions = _version(monkeypatch)
+
+    user = SimpleNamespace(id=8, tipo_usuario_id=1, token_version=0)
+    token = create_access_token(data=user_claims(user, SimpleNamespace(nivel_prioridad=1, permisos={})))
+    creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    principals.principal_cache.clear()
+    db = _FakeDB(SimpleNamespace(id=8, tipo_usuario_id=1, estado="activo", token_version=0))
+    assert dependencies.require_admin_claims(dependencies.get_token_claims(creds, db=db)).es_admin
+    # las lecturas de admin usan el principal cacheado, como get_current_user
+    dependencies.get_token_claims(creds, db=db)
+    dependencies.get_current_user(creds, db=db)
+    assert db.queries == 1
+
+    # suspendido en otro worker: en cuanto se ve la nueva versión se relee la base
+    db.row = SimpleNamespace(id=8, tipo_usuario_id=1, estado="suspendido", token_version=1)
+    versions[principals.PRINCIPALES_VERSION] += 1
+    with pytest.raises(HTTPException) as exc:
+        dependencies.get_token_claims(creds, db=db)
+    assert exc.value.status_code == 401
+    assert db.queries == 2
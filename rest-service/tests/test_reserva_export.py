@@ -0,0 +1,22 @@
+from datetime import date, time
+
+import app.services.reserva_export as export
+
+
+def _fake_filas(incluir_nombres, filtros):
+    nombres = export.COLUMNAS
+    fila = [export._valor(v) for v in (1, "R-1", 2, 3, None, 1, date(2025, 5, 2), time(9), time(10, 30), "Clase, grupo A", None, False)]
+    yield nombres, [fila]
+    yield nombres, [fila]
+
+
+def test_ndjson_and_csv_stream_in_blocks(monkeypatch):
+    monkeypatch.setattr(export, "_filas", _fake_filas)
+
+    ndjson = list(export.stream_export("ndjson", False, {}))
+    assert len(ndjson) == 2
+    assert '"fecha":"2025-05-02"' in ndjson[0] and '"hora_fin":"10:30"' in ndjson[0]
+
+    csv_chunks = list(export.stream_export("csv", False, {}))
+    assert csv_chunks[0].startswith("id,codigo,usuario_id")
+    assert csv_chunks[1] == '1,R-1,2,3,,1,2025-05-02,09:00,10:30,"Clase, grupo A",,False\r\n'
@@ -0,0 +1,32 @@
+from app.services import revocation
+
+
+def _sin_base():
+    raise RuntimeError("base no disponible")
+
+
+def test_without_a_filter_every_check_goes_to_the_database(monkeypatch):
+    monkeypatch.setattr(revocation, "_bloom", None)
+    monkeypatch.setattr(revocation, "SessionLocal", _sin_base)
+    monkeypatch.setattr(revocation, "_in_store", lambda jti: jti == "revocado")
+    revocation._confirmed.clear()
+
+    # la reconstrucción falla: no hay filtro, se consulta token_revocado en cada caso
+    assert revocation.is_revoked("revocado")
+    assert not revocation.is_revoked("vigente")
+
+
+def test_failed_refresh_keeps_the_previous_filter(monkeypatch):
+    bloom = revocation._new_bloom(1)
+    bloom.add("revocado")
+    monkeypatch.setattr(revocation, "_bloom", bloom)
+    monkeypatch.setattr(revocation, "_refreshed_at", 0.0)
+    monkeypatch.setattr(revocation, "_rebuilt_at", 0.0)
+    monkeypatch.setattr(revocation, "SessionLocal", _sin_base)
+    consultas = []
+    monkeypatch.setattr(revocation, "_in_store", lambda jti: consultas.append(jti) or True)
+    revocation._confirmed.clear()
+
+    assert not revocation.is_revoked("vigente") and consultas == []
+    assert revocation.is_revoked("revocado") and consultas == ["revocado"]
+    assert revocation._bloom is bloom
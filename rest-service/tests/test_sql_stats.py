@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.utils.sql_stats import assert_max_queries, count_queries, statement_shape
+
+
+def test_statement_shape_collapses_in_lists_and_spaces():
+    a = statement_shape("SELECT * FROM reserva\n WHERE id IN (%(id_1)s, %(id_2)s)")
+    b = statement_shape("SELECT * FROM reserva WHERE id IN (%(id_1)s)")
+    assert a == b == "SELECT * FROM reserva WHERE id IN (?)"
+
+
+def test_count_and_budget(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'q.db'}")
+    with engine.connect() as conn:
+        with count_queries(engine) as stats:
+            for i in range(6):
+                conn.execute(text("select :i"), {"i": i})
+        assert stats.count == 6
+        assert stats.repeated(5) == [("select ?", 6)]
+
+        with assert_max_queries(1, engine):
+            conn.execute(text("select 1"))
+        with pytest.raises(AssertionError, match="como mucho 1 consultas y hubo 2"):
+            with assert_max_queries(1, engine):
+                conn.execute(text("select 1"))
+                conn.execute(text("select 2"))
+    engine.dispose()
+
+
+def test_failed_statement_does_not_leak_start_time(tmp_path):
+    from sqlalchemy.exc import OperationalError
+
+    from app.utils.sql_stats import install
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'q.db'}")
+    install(engine)
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("select * from no_existe"))
+        conn.execute(text("select 1"))
+        assert conn.info["sql_stats_start"] == []
+    engine.dispose()
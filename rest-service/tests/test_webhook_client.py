@@ -0,0 +1,139 @@
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+import httpx
+
+from app.services.webhook_client import EnvioAplazado, WebhookClient
+from app.utils.circuit_breaker import CircuitOpen
+
+
+def _client(monkeypatch, handler):
+    client = WebhookClient()
+    monkeypatch.setattr(client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return client
+
+
+def test_events_go_in_one_batched_post(monkeypatch):
+    bodies = []
+
+    def handler(request):
+        bodies.append(request.read())
+        return httpx.Response(200)
+
+    client = _client(monkeypatch, handler)
+    try:
+        result = client.deliver_batch([(1, "reserva_actualizada", {"a": 1}), (2, "notificacion", {"b": 2})])
+    finally:
+        client.close()
+    assert result == {1: None, 2: None}
+    assert len(bodies) == 1 and b'"id":2' in bodies[0].replace(b" ", b"")
+    assert client.stats()["eventos_por_lote"] == 2
+
+
+def test_server_errors_open_the_circuit(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "WEBHOOK_BREAKER_FAILURES", 2)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    client = _client(monkeypatch, handler)
+    try:
+        for _ in range(2):
+            assert isinstance(client.deliver_batch([(1, "notificacion", {})])[1], httpx.HTTPStatusError)
+        assert isinstance(client.deliver_batch([(1, "notificacion", {})])[1], CircuitOpen)
+    finally:
+        client.close()
+    assert len(calls) == 2
+
+
+def test_missing_batch_endpoint_falls_back_to_one_post_per_event(monkeypatch):
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        if request.url.path.endswith("/batch"):
+            return httpx.Response(404)
+        return httpx.Response(200)
+
+    client = _client(monkeypatch, handler)
+    try:
+        eventos = [(1, "reserva_actualizada", {"a": 1}), (2, "notificacion", {"b": 2})]
+        assert client.deliver_batch(eventos) == {1: None, 2: None}
+        # el destino queda marcado: los lotes siguientes van directos a /api/webhooks/{evento}
+        assert client.deliver_batch([(3, "notificacion", {})]) == {3: None}
+    finally:
+        client.close()
+    assert paths[0] == "/api/webhooks/batch"
+    assert sorted(paths[1:3]) == ["/api/webhooks/notificacion", "/api/webhooks/reserva_actualizada"]
+    assert paths[3:] == ["/api/webhooks/notificacion"]
+    assert client.stats()["sin_lotes"]
+
+
+def test_individual_posts_keep_reserva_order_and_stop_after_a_failure(monkeypatch):
+    paths = []
+
+    def handler(request):
+        if request.url.path.endswith("/batch"):
+            return httpx.Response(404)
+        paths.append((request.url.path, request.read()))
+        if b'"n":1' in request.read().replace(b" ", b""):
+            return httpx.Response(500)
+        return httpx.Response(200)
+
+    client = _client(monkeypatch, handler)
+    try:
+        eventos = [
+            (3, "reserva_actualizada", {"reserva_id": 7, "n": 3}),
+            (1, "reserva_creada", {"reserva_id": 7, "n": 1}),
+            (2, "reserva_creada", {"reserva_id": 8, "n": 2}),
+        ]
+        result = client.deliver_batch(eventos)
+    finally:
+        client.close()
+    assert isinstance(result[1], httpx.HTTPStatusError) and result[2] is None
+    # el 3 es de la misma reserva que el 1, que falló: no se envía antes que él
+    assert isinstance(result[3], EnvioAplazado) and result[3].tras == 1
+    assert sorted(p for p, _ in paths) == ["/api/webhooks/reserva_creada", "/api/webhooks/reserva_creada"]
+
+
+def test_individual_posts_stop_at_the_claim_deadline(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "OUTBOX_CLAIM_SECONDS", 0)
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(404 if request.url.path.endswith("/batch") else 200)
+
+    client = _client(monkeypatch, handler)
+    try:
+        result = client.deliver_batch([(1, "notificacion", {}), (2, "notificacion", {})])
+    finally:
+        client.close()
+    assert all(isinstance(e, EnvioAplazado) for e in result.values())
+    assert calls == ["/api/webhooks/batch"]
+
+
+def test_batch_disabled_posts_each_event(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "WEBHOOK_BATCH_ENABLED", False)
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        return httpx.Response(200)
+
+    client = _client(monkeypatch, handler)
+    try:
+        assert client.deliver_batch([(1, "reserva_creada", {"reserva_id": 4}), (2, "notificacion", {})]) == {1: None, 2: None}
+    finally:
+        client.close()
+    assert sorted(paths) == ["/api/webhooks/notificacion", "/api/webhooks/reserva_creada"]
+    assert not client.stats()["sin_lotes"]
@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from bench.webhook_receiver import start_receiver
+from app.config import settings
+from app.services.webhook_client import WebhookClient
+
+
+def test_client_batches_reach_local_receiver(monkeypatch):
+    receptor = start_receiver()
+    monkeypatch.setattr(settings, "WEBSOCKET_SERVICE_URL", receptor.url)
+    client = WebhookClient()
+    try:
+        eventos = [(1, "reserva_creada", {"reserva_id": 10}), (2, "notificacion", {"notificacion_id": 3})]
+        assert client.deliver_batch(eventos) == {1: None, 2: None}
+        # un reintento del mismo lote no duplica eventos en el receptor
+        assert client.deliver_batch(eventos[:1]) == {1: None}
+
+        receptor.recorder.failure_rate = 1
+        assert client.deliver_batch([(3, "notificacion", {})])[3] is not None
+    finally:
+        client.close()
+        receptor.stop()
+    stats = receptor.recorder.stats()
+    assert stats["lotes"] == 2 and stats["eventos"] == 2 and stats["duplicados"] == 1
+    assert stats["fallos_inyectados"] == 1